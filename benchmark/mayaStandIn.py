@@ -0,0 +1,1881 @@
+import ctypes
+import math
+import sys
+import types
+
+# Intro: Stand-in for the parts of maya.cmds, maya.OpenMaya and maya.OpenMayaMPx used by the vsa* plugins
+# It keeps a small in-memory scene graph, counts every cmds and OpenMaya call and adds up a simulated cost,
+# so the plugins can be exercised and benchmarked without a Maya license.
+# Call install() before importing any plugin module.
+
+# Simulated cost of one call in seconds, roughly a MEL round-trip and an API call
+kCmdsCallCost   = 50e-6
+kApiCallCost    = 2e-6
+
+##########################################################
+# Call counters.
+##########################################################
+class CallCounter(object):
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.cmdsCalls = {}
+        self.apiCalls = {}
+
+    def countCmds(self, name):
+        self.cmdsCalls[name] = self.cmdsCalls.get(name, 0) + 1
+
+    def countApi(self, name):
+        self.apiCalls[name] = self.apiCalls.get(name, 0) + 1
+
+    def simulatedCost(self):
+        return self.totalCmdsCalls() * kCmdsCallCost + self.totalApiCalls() * kApiCallCost
+
+    def totalCmdsCalls(self):
+        return sum(self.cmdsCalls.values())
+
+    def totalApiCalls(self):
+        return sum(self.apiCalls.values())
+
+counter = CallCounter()
+
+# Wrap every public method of an OpenMaya stand-in class so its calls are counted
+# Constructors are not counted, they are cheap value objects in Maya too
+def countedClass(cls):
+    for attrName, value in list(vars(cls).items()):
+        if attrName.startswith('_') and attrName not in ('__mul__', '__call__'):
+            continue
+        if isinstance(value, staticmethod):
+            setattr(cls, attrName, staticmethod(countedFunction(cls.__name__ + '.' + attrName, value.__func__)))
+        elif isinstance(value, types.FunctionType):
+            setattr(cls, attrName, countedFunction(cls.__name__ + '.' + attrName, value))
+    return cls
+
+def countedFunction(name, function):
+    def wrapper(*args, **kwargs):
+        apiCalls = counter.apiCalls
+        apiCalls[name] = apiCalls.get(name, 0) + 1
+        return function(*args, **kwargs)
+    wrapper.__name__ = function.__name__
+    return wrapper
+
+##########################################################
+# Matrix math, row vectors like Maya.
+##########################################################
+def identity():
+    return [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]]
+
+def multiply(a, b):
+    b0, b1, b2, b3 = b
+    return [[row[0] * b0[c] + row[1] * b1[c] + row[2] * b2[c] + row[3] * b3[c] for c in range(4)] for row in a]
+
+def translation(t):
+    m = identity()
+    m[3][0], m[3][1], m[3][2] = t[0], t[1], t[2]
+    return m
+
+def scaling(s):
+    m = identity()
+    m[0][0], m[1][1], m[2][2] = s[0], s[1], s[2]
+    return m
+
+# Euler rotation in degrees with xyz order
+def rotation(r):
+    x, y, z = [math.radians(value) for value in r]
+    rx = [[1.0, 0.0, 0.0, 0.0], [0.0, math.cos(x), math.sin(x), 0.0], [0.0, -math.sin(x), math.cos(x), 0.0], [0.0, 0.0, 0.0, 1.0]]
+    ry = [[math.cos(y), 0.0, -math.sin(y), 0.0], [0.0, 1.0, 0.0, 0.0], [math.sin(y), 0.0, math.cos(y), 0.0], [0.0, 0.0, 0.0, 1.0]]
+    rz = [[math.cos(z), math.sin(z), 0.0, 0.0], [-math.sin(z), math.cos(z), 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]]
+    return multiply(multiply(rx, ry), rz)
+
+def negate(v):
+    return (-v[0], -v[1], -v[2])
+
+# Inverse of an affine matrix
+def inverse(m):
+    a, b, c = m[0][0], m[0][1], m[0][2]
+    d, e, f = m[1][0], m[1][1], m[1][2]
+    g, h, i = m[2][0], m[2][1], m[2][2]
+    det = a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+    if abs(det) < 1e-12:
+        raise RuntimeError('Singular matrix')
+    inv = [[(e * i - f * h) / det, (c * h - b * i) / det, (b * f - c * e) / det, 0.0],
+           [(f * g - d * i) / det, (a * i - c * g) / det, (c * d - a * f) / det, 0.0],
+           [(d * h - e * g) / det, (b * g - a * h) / det, (a * e - b * d) / det, 0.0],
+           [0.0, 0.0, 0.0, 1.0]]
+    for column in range(3):
+        inv[3][column] = -sum(m[3][k] * inv[k][column] for k in range(3))
+    return inv
+
+def transformPoint(p, m):
+    return tuple(p[0] * m[0][c] + p[1] * m[1][c] + p[2] * m[2][c] + m[3][c] for c in range(3))
+
+def transformVector(v, m):
+    return tuple(v[0] * m[0][c] + v[1] * m[1][c] + v[2] * m[2][c] for c in range(3))
+
+##########################################################
+# Scene graph.
+##########################################################
+kTransformAttributes = {
+    'translate': ('t', (0.0, 0.0, 0.0)),
+    'rotate': ('r', (0.0, 0.0, 0.0)),
+    'scale': ('s', (1.0, 1.0, 1.0)),
+    'rotatePivot': ('rp', (0.0, 0.0, 0.0)),
+    'scalePivot': ('sp', (0.0, 0.0, 0.0)),
+    'rotatePivotTranslate': ('rpt', (0.0, 0.0, 0.0)),
+    'scalePivotTranslate': ('spt', (0.0, 0.0, 0.0)),
+}
+kTransformTypes = ('transform', 'joint', 'clusterHandle', 'ikHandle')
+kShapeTypes = ('nurbsCurve', 'mesh')
+
+class Node(object):
+    __slots__ = ('name', 'type', 'parent', 'children', 'attrs', 'data')
+
+    def __init__(self, name, nodeType, parent=None):
+        self.name = name
+        self.type = nodeType
+        self.parent = parent
+        self.children = []
+        self.attrs = {}
+        self.data = {}
+        if nodeType in kTransformTypes:
+            for longName, (shortName, default) in kTransformAttributes.items():
+                for axis, value in zip('XYZ', default):
+                    self.attrs[longName + axis] = value
+        if nodeType in kTransformTypes or nodeType in kShapeTypes:
+            self.attrs['intermediateObject'] = False
+            self.attrs['overrideEnabled'] = False
+            self.attrs['overrideRGBColors'] = False
+            for channel in 'RGB':
+                self.attrs['overrideColor' + channel] = 0.0
+        if parent is not None:
+            parent.children.append(self)
+
+    def isDag(self):
+        return self.type in kTransformTypes or self.type in kShapeTypes
+
+    def isTransform(self):
+        return self.type in kTransformTypes
+
+    def get3(self, longName):
+        return tuple(self.attrs[longName + axis] for axis in 'XYZ')
+
+    def set3(self, longName, value):
+        for axis, v in zip('XYZ', value):
+            self.attrs[longName + axis] = float(v)
+
+    def fullPath(self):
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.name)
+            node = node.parent
+        return '|' + '|'.join(reversed(names))
+
+    # Local matrix of the transform, SP^-1 S SP ST RP^-1 R RP RT T
+    def localMatrix(self):
+        if not self.isTransform():
+            return identity()
+        sp = self.get3('scalePivot')
+        rp = self.get3('rotatePivot')
+        spt = self.get3('scalePivotTranslate')
+        rpt = self.get3('rotatePivotTranslate')
+        t = self.get3('translate')
+        s = self.get3('scale')
+        r = rotation(self.get3('rotate'))
+
+        # Linear part is S R, the constant part is ((-sp S + sp + spt - rp) R + rp + rpt + t)
+        m = [[s[row] * r[row][c] for c in range(3)] + [0.0] for row in range(3)]
+        offset = [-sp[i] * s[i] + sp[i] + spt[i] - rp[i] for i in range(3)]
+        m.append([sum(offset[k] * r[k][c] for k in range(3)) + rp[c] + rpt[c] + t[c] for c in range(3)] + [1.0])
+        return m
+
+    def worldMatrix(self):
+        m = self.localMatrix()
+        parent = self.parent
+        while parent is not None:
+            m = multiply(m, parent.localMatrix())
+            parent = parent.parent
+        return m
+
+    def parentMatrix(self):
+        if self.parent is None:
+            return identity()
+        return self.parent.worldMatrix()
+
+class Scene(object):
+    def __init__(self):
+        self.nodes = {}
+        self.selection = []
+        self.nameCounters = {}
+        # Node: {callback id: function} of MNodeMessage callbacks
+        self.dirtyCallbacks = {}
+        self.removalCallbacks = {}
+        self.currentTime = 1.0
+        self.evaluationMode = 'parallel'
+        # Profiler events as (name, description, microseconds)
+        self.profilerEvents = []
+        self.profilerSampling = False
+
+    # Make a unique node name like Maya does, "name1", "name2"...
+    def uniqueName(self, name):
+        if name not in self.nodes:
+            return name
+        base = name.rstrip('0123456789') or name
+        index = self.nameCounters.get(base, 1)
+        while base + str(index) in self.nodes:
+            index += 1
+        self.nameCounters[base] = index + 1
+        return base + str(index)
+
+    def createNode(self, nodeType, name=None, parent=None):
+        name = self.uniqueName(name or nodeType + '1')
+        node = Node(name, nodeType, parent)
+        self.nodes[name] = node
+        return node
+
+    # Find a node by short name or path, component and attribute suffixes are ignored
+    def find(self, name):
+        name = name.split('.')[0].split('|')[-1]
+        node = self.nodes.get(name)
+        if node is None:
+            raise RuntimeError('No object matches name: ' + name)
+        return node
+
+    def reparent(self, node, newParent):
+        world = node.worldMatrix()
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        node.parent = newParent
+        if newParent is not None:
+            newParent.children.append(node)
+        # Keep the world transform by moving the translation into the new parent space
+        if node.isTransform():
+            local = multiply(world, inverse(node.parentMatrix()))
+            offset = transformPoint((0.0, 0.0, 0.0), local)
+            current = transformPoint((0.0, 0.0, 0.0), node.localMatrix())
+            translate = node.get3('translate')
+            node.set3('translate', [translate[i] + offset[i] - current[i] for i in range(3)])
+
+scene = Scene()
+
+# Start again from an empty scene and reset counters
+def newScene():
+    global scene
+    # Nodes of the previous scene are removed, like file -new does
+    for node in list(scene.removalCallbacks):
+        for function in list(scene.removalCallbacks.get(node, {}).values()):
+            function(MObject(node))
+    scene = Scene()
+    counter.reset()
+    return scene
+
+##########################################################
+# Components.
+##########################################################
+kComponentNames = {'vtx': 'kMeshVertComponent', 'e': 'kMeshEdgeComponent', 'f': 'kMeshPolygonComponent',
+                   'cv': 'kCurveCVComponent'}
+
+class Component(object):
+    __slots__ = ('apiType', 'elements')
+
+    def __init__(self, apiType, elements=None):
+        self.apiType = apiType
+        self.elements = list(elements or [])
+
+##########################################################
+# maya.OpenMaya stand-in.
+##########################################################
+class MFn(object):
+    kInvalid = 0
+    kTransform = 1
+    kJoint = 2
+    kNurbsCurve = 3
+    kMesh = 4
+    kSingleIndexedComponent = 5
+    kMeshVertComponent = 6
+    kMeshEdgeComponent = 7
+    kMeshPolygonComponent = 8
+    kCurveCVComponent = 9
+    kDependencyNode = 10
+    kDagNode = 11
+
+kApiTypes = {'transform': MFn.kTransform, 'joint': MFn.kJoint, 'clusterHandle': MFn.kTransform,
+             'ikHandle': MFn.kTransform, 'nurbsCurve': MFn.kNurbsCurve, 'mesh': MFn.kMesh}
+
+def hasFn(apiType, fnType, isNode):
+    if apiType == fnType:
+        return True
+    if fnType == MFn.kTransform:
+        return apiType in (MFn.kTransform, MFn.kJoint)
+    if fnType == MFn.kSingleIndexedComponent:
+        return apiType in (MFn.kMeshVertComponent, MFn.kMeshEdgeComponent,
+                           MFn.kMeshPolygonComponent, MFn.kCurveCVComponent)
+    if fnType == MFn.kDependencyNode:
+        return isNode
+    return False
+
+class MSpace(object):
+    kInvalid = 0
+    kTransform = 1
+    kPreTransform = 2
+    kPostTransform = 3
+    kWorld = 4
+    kObject = kPreTransform
+
+@countedClass
+class MObject(object):
+    def __init__(self, value=None):
+        if isinstance(value, MObject):
+            value = value.value
+        self.value = value
+
+    def isNull(self):
+        return self.value is None
+
+    def apiType(self):
+        if isinstance(self.value, Node):
+            return kApiTypes.get(self.value.type, MFn.kDependencyNode)
+        if isinstance(self.value, Component):
+            return self.value.apiType
+        if isinstance(self.value, Attribute):
+            return MFn.kInvalid
+        return MFn.kInvalid
+
+    def hasFn(self, fnType):
+        return hasFn(self.apiType(), fnType, isinstance(self.value, Node))
+
+    def __eq__(self, other):
+        return isinstance(other, MObject) and self.value is other.value
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+class MPoint(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0, w=1.0):
+        if isinstance(x, (MPoint, MVector)):
+            x, y, z = x.x, x.y, x.z
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z)[i]
+
+    def __sub__(self, other):
+        if isinstance(other, MPoint):
+            return MVector(self.x - other.x, self.y - other.y, self.z - other.z)
+        return MPoint(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __add__(self, other):
+        return MPoint(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __mul__(self, matrix):
+        return MPoint(*transformPoint((self.x, self.y, self.z), matrix.rows))
+
+class MVector(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        if isinstance(x, (MPoint, MVector)):
+            x, y, z = x.x, x.y, x.z
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z)[i]
+
+    def __add__(self, other):
+        return MVector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return MVector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __neg__(self):
+        return MVector(-self.x, -self.y, -self.z)
+
+    def __mul__(self, other):
+        if isinstance(other, MMatrix):
+            return MVector(*transformVector((self.x, self.y, self.z), other.rows))
+        return MVector(self.x * other, self.y * other, self.z * other)
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def normal(self):
+        length = self.length()
+        return MVector(self.x / length, self.y / length, self.z / length) if length else MVector(self)
+
+@countedClass
+class MMatrix(object):
+    def __init__(self, rows=None):
+        self.rows = rows or identity()
+
+    def __call__(self, row, column):
+        return self.rows[row][column]
+
+    def __mul__(self, other):
+        return MMatrix(multiply(self.rows, other.rows))
+
+    def inverse(self):
+        return MMatrix(inverse(self.rows))
+
+@countedClass
+class MTransformationMatrix(object):
+    def __init__(self, node):
+        self.node = node
+
+    def asMatrix(self):
+        return MMatrix(self.node.localMatrix())
+
+    # RP^-1 R RP
+    def asRotateMatrix(self):
+        rp = self.node.get3('rotatePivot')
+        m = multiply(translation(negate(rp)), rotation(self.node.get3('rotate')))
+        return MMatrix(multiply(m, translation(rp)))
+
+    # SP^-1 S SP
+    def asScaleMatrix(self):
+        sp = self.node.get3('scalePivot')
+        m = multiply(translation(negate(sp)), scaling(self.node.get3('scale')))
+        return MMatrix(multiply(m, translation(sp)))
+
+@countedClass
+class MIntArray(object):
+    def __init__(self, values=None):
+        self.values = list(values or [])
+
+    def append(self, value):
+        self.values.append(int(value))
+
+    def length(self):
+        return len(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+@countedClass
+class MDoubleArray(MIntArray):
+    def append(self, value):
+        self.values.append(float(value))
+
+@countedClass
+class MObjectArray(object):
+    def __init__(self):
+        self.values = []
+
+    def append(self, value):
+        self.values.append(MObject(value))
+
+    def length(self):
+        return len(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+@countedClass
+class MPointArray(object):
+    def __init__(self):
+        self.values = []
+
+    def length(self):
+        return len(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+@countedClass
+class MScriptUtil(object):
+    def createIntArrayFromList(self, values, intArray):
+        intArray.values = [int(value) for value in values]
+
+@countedClass
+class MDagPath(object):
+    def __init__(self, other=None):
+        self.nodes = list(other.nodes) if other is not None else []
+
+    def node(self):
+        return MObject(self.nodes[-1])
+
+    def transform(self):
+        for node in reversed(self.nodes):
+            if node.isTransform():
+                return MObject(node)
+        return MObject()
+
+    def apiType(self):
+        return kApiTypes.get(self.nodes[-1].type, MFn.kDependencyNode)
+
+    def hasFn(self, fnType):
+        return hasFn(self.apiType(), fnType, True)
+
+    def pop(self, num=1):
+        del self.nodes[-num:]
+
+    def push(self, child):
+        self.nodes.append(child.value)
+
+    def childCount(self):
+        return len(self.nodes[-1].children)
+
+    def extendToShape(self):
+        shape = shapeOf(self.nodes[-1])
+        if shape is self.nodes[-1]:
+            raise RuntimeError('(kInvalidParameter): No shape below ' + shape.name)
+        self.nodes.append(shape)
+
+    def child(self, i):
+        return MObject(self.nodes[-1].children[i])
+
+    def length(self):
+        return len(self.nodes)
+
+    def fullPathName(self):
+        return self.nodes[-1].fullPath()
+
+    def partialPathName(self):
+        return self.nodes[-1].name
+
+    def isValid(self):
+        return bool(self.nodes) and self.nodes[-1].name in scene.nodes
+
+    def inclusiveMatrix(self):
+        return MMatrix(self.nodes[-1].worldMatrix())
+
+    def inclusiveMatrixInverse(self):
+        return MMatrix(inverse(self.nodes[-1].worldMatrix()))
+
+    def exclusiveMatrix(self):
+        return MMatrix(self.nodes[-1].parentMatrix())
+
+    def exclusiveMatrixInverse(self):
+        return MMatrix(inverse(self.nodes[-1].parentMatrix()))
+
+    @staticmethod
+    def getAPathTo(node, dagPath):
+        dagPath.nodes = pathTo(node.value)
+
+def pathTo(node):
+    nodes = []
+    while node is not None:
+        nodes.append(node)
+        node = node.parent
+    return list(reversed(nodes))
+
+@countedClass
+class MItDag(object):
+    kDepthFirst = 0
+    kBreadthFirst = 1
+
+    def __init__(self, traversalType=0, filterType=0):
+        self.items = [node for node in scene.nodes.values() if node.parent is None]
+        self.index = 0
+
+    def reset(self, root, traversalType=0, filterType=0):
+        self.items = []
+        stack = [root.nodes[-1] if isinstance(root, MDagPath) else root.value]
+        while stack:
+            node = stack.pop()
+            self.items.append(node)
+            stack.extend(reversed(node.children))
+        self.index = 0
+
+    def isDone(self):
+        return self.index >= len(self.items)
+
+    def next(self):
+        self.index += 1
+
+    def currentItem(self):
+        return MObject(self.items[self.index])
+
+    def getPath(self, dagPath):
+        dagPath.nodes = pathTo(self.items[self.index])
+
+@countedClass
+class MSelectionList(object):
+    def __init__(self, other=None):
+        self.items = list(other.items) if other is not None else []
+
+    def length(self):
+        return len(self.items)
+
+    def clear(self):
+        self.items = []
+
+    def remove(self, index):
+        del self.items[index]
+
+    def add(self, item, component=None, mergeWithExisting=False):
+        if isinstance(item, str):
+            self.items.extend(parseSelectionString(item))
+        elif isinstance(item, MDagPath):
+            value = component.value if component is not None and not component.isNull() else None
+            self.items.append((item.nodes[-1], value))
+        else:
+            self.items.append((item.value, None))
+
+    def getDagPath(self, i, dagPath, component=None):
+        node, value = self.items[i]
+        if not node.isDag():
+            raise RuntimeError('(kInvalidParameter): Object is not a DAG Node')
+        dagPath.nodes = pathTo(node)
+        if component is not None:
+            component.value = value
+
+    def getDependNode(self, i, dependNode):
+        dependNode.value = self.items[i][0]
+
+    def getSelectionStrings(self, strings):
+        for node, value in self.items:
+            strings.append(node.name)
+
+@countedClass
+class MItSelectionList(object):
+    kDagSelectionItem = 1
+    kDNselectionItem = 2
+
+    def __init__(self, selection, filterType=0):
+        self.items = selection.items
+        self.index = 0
+
+    def isDone(self):
+        return self.index >= len(self.items)
+
+    def next(self):
+        self.index += 1
+
+    def itemType(self):
+        if self.items[self.index][0].isDag():
+            return MItSelectionList.kDagSelectionItem
+        return MItSelectionList.kDNselectionItem
+
+    def getDagPath(self, dagPath, component=None):
+        node, value = self.items[self.index]
+        dagPath.nodes = pathTo(node)
+        if component is not None:
+            component.value = value
+
+    def getDependNode(self, dependNode):
+        dependNode.value = self.items[self.index][0]
+
+# Parse "node" or "node.vtx[0:9]" to selection items
+def parseSelectionString(name):
+    node = scene.find(name)
+    if '.' not in name:
+        return [(node, None)]
+    componentName, indices = name.split('.', 1)[1].rstrip(']').split('[')
+    if indices == '*':
+        elements = range(componentCount(node, componentName))
+    elif ':' in indices:
+        start, end = indices.split(':')
+        elements = range(int(start), int(end) + 1)
+    else:
+        elements = [int(indices)]
+    apiType = getattr(MFn, kComponentNames[componentName])
+    return [(shapeOf(node), Component(apiType, elements))]
+
+def shapeOf(node):
+    if node.isTransform():
+        for child in node.children:
+            if child.type in kShapeTypes:
+                return child
+    return node
+
+def componentCount(node, componentName):
+    node = shapeOf(node)
+    if componentName == 'cv':
+        return len(node.data['cvs'])
+    if componentName == 'e':
+        return len(node.data['edges'])
+    if componentName == 'f':
+        return len(node.data['faces'])
+    return node.data.get('vertexCount', 0)
+
+@countedClass
+class MGlobal(object):
+    kReplaceList = 0
+
+    @staticmethod
+    def getActiveSelectionList(selection, orderedSelectionIfAvailable=False):
+        selection.items = list(scene.selection)
+
+    @staticmethod
+    def setActiveSelectionList(selection, listAdjustment=0):
+        scene.selection = list(selection.items)
+
+    @staticmethod
+    def displayError(message):
+        sys.stderr.write(message + '\n')
+
+    @staticmethod
+    def displayWarning(message):
+        sys.stderr.write(message + '\n')
+
+class Attribute(object):
+    __slots__ = ('longName', 'shortName', 'children')
+
+    def __init__(self, longName, shortName, children=()):
+        self.longName = longName
+        self.shortName = shortName
+        self.children = children
+
+# Attributes are shared by every node like static Maya attributes
+kAttributes = {}
+
+def getAttribute(name):
+    attribute = kAttributes.get(name)
+    if attribute is None:
+        shortName = name
+        for longName, (short, default) in kTransformAttributes.items():
+            if name.startswith(longName) and len(name) == len(longName) + 1:
+                shortName = short + name[-1].lower()
+        children = ()
+        if name == 'overrideColorRGB':
+            children = tuple(getAttribute('overrideColor' + channel) for channel in 'RGB')
+        elif name in kTransformAttributes:
+            children = tuple(getAttribute(name + axis) for axis in 'XYZ')
+        attribute = Attribute(name, shortName, children)
+        kAttributes[name] = attribute
+    return attribute
+
+@countedClass
+class MPlug(object):
+    def __init__(self, node=None, attribute=None):
+        self.nodeObject = node
+        self.attributeObject = attribute
+
+    def node(self):
+        return MObject(self.nodeObject)
+
+    def attribute(self):
+        return MObject(self.attributeObject)
+
+    def partialName(self, *args):
+        return self.attributeObject.value.shortName
+
+    def name(self):
+        return self.nodeObject.value.name + '.' + self.attributeObject.value.longName
+
+    def child(self, i):
+        return MPlug(self.nodeObject, MObject(self.attributeObject.value.children[i]))
+
+    def numChildren(self):
+        return len(self.attributeObject.value.children)
+
+    def isNull(self):
+        return self.attributeObject is None
+
+    def asDouble(self):
+        return float(self.nodeObject.value.attrs[self.attributeObject.value.longName])
+
+    def asFloat(self):
+        return self.asDouble()
+
+    def asBool(self):
+        return bool(self.nodeObject.value.attrs[self.attributeObject.value.longName])
+
+    def asInt(self):
+        return int(self.nodeObject.value.attrs[self.attributeObject.value.longName])
+
+    def setDouble(self, value):
+        self.nodeObject.value.attrs[self.attributeObject.value.longName] = float(value)
+        if scene.dirtyCallbacks:
+            notifyDirty(self.nodeObject.value, self.attributeObject.value)
+
+    def setFloat(self, value):
+        self.setDouble(value)
+
+    def setBool(self, value):
+        self.nodeObject.value.attrs[self.attributeObject.value.longName] = bool(value)
+        if scene.dirtyCallbacks:
+            notifyDirty(self.nodeObject.value, self.attributeObject.value)
+
+    def setInt(self, value):
+        self.nodeObject.value.attrs[self.attributeObject.value.longName] = int(value)
+        if scene.dirtyCallbacks:
+            notifyDirty(self.nodeObject.value, self.attributeObject.value)
+
+# Matrices made from transform attributes, dirtied with them like in Maya
+kMatrixAttributeNames   = ('xformMatrix', 'matrix', 'worldMatrix')
+
+# Call dirty plug callbacks registered on a node
+# A transform attribute also dirties the node's matrices and the world matrix of everything below it
+def notifyDirty(node, attribute):
+    callDirtyCallbacks(node, attribute)
+    if attribute.longName.rstrip('XYZ') not in kTransformAttributes:
+        return
+    for name in kMatrixAttributeNames:
+        callDirtyCallbacks(node, getAttribute(name))
+    stack = list(node.children)
+    while stack:
+        child = stack.pop()
+        callDirtyCallbacks(child, getAttribute('worldMatrix'))
+        stack.extend(child.children)
+
+def callDirtyCallbacks(node, attribute):
+    for function in list(scene.dirtyCallbacks.get(node, {}).values()):
+        function(MObject(node), MPlug(MObject(node), MObject(attribute)))
+
+@countedClass
+class MMessage(object):
+    nextId = [1]
+
+    @staticmethod
+    def removeCallback(callbackId):
+        for callbacks in (scene.dirtyCallbacks, scene.removalCallbacks):
+            for node in list(callbacks):
+                if callbacks[node].pop(callbackId, None) is not None and not callbacks[node]:
+                    del callbacks[node]
+
+def addCallback(callbacks, node, function):
+    callbackId = MMessage.nextId[0]
+    MMessage.nextId[0] += 1
+    callbacks.setdefault(node.value, {})[callbackId] = function
+    return callbackId
+
+@countedClass
+class MNodeMessage(MMessage):
+    @staticmethod
+    def addNodeDirtyPlugCallback(node, function, clientData=None):
+        return addCallback(scene.dirtyCallbacks, node, function)
+
+    @staticmethod
+    def addNodePreRemovalCallback(node, function, clientData=None):
+        return addCallback(scene.removalCallbacks, node, function)
+
+@countedClass
+class MFnDependencyNode(object):
+    def __init__(self, node=None):
+        self.nodeObject = MObject(node) if node is not None else MObject()
+
+    def setObject(self, node):
+        self.nodeObject = MObject(node)
+
+    def object(self):
+        return MObject(self.nodeObject)
+
+    def name(self):
+        return self.nodeObject.value.name
+
+    def typeName(self):
+        return self.nodeObject.value.type
+
+    def findPlug(self, name, wantNetworkedPlug=True):
+        node = self.nodeObject.value
+        attribute = getAttribute(name)
+        if name not in node.attrs and not attribute.children:
+            raise RuntimeError('(kInvalidParameter): Object does not have attribute ' + name)
+        return MPlug(MObject(node), MObject(attribute))
+
+    def attribute(self, name):
+        return MObject(getAttribute(name))
+
+@countedClass
+class MFnDagNode(MFnDependencyNode):
+    def __init__(self, path=None):
+        if isinstance(path, MDagPath):
+            self.dagPath = MDagPath(path)
+            MFnDependencyNode.__init__(self, MObject(path.nodes[-1]))
+        else:
+            MFnDependencyNode.__init__(self, path)
+            self.dagPath = MDagPath()
+            if path is not None:
+                self.dagPath.nodes = pathTo(path.value)
+
+    def fullPathName(self):
+        return self.dagPath.fullPathName()
+
+    def isIntermediateObject(self):
+        return bool(self.nodeObject.value.attrs.get('intermediateObject'))
+
+    def parentCount(self):
+        return 0 if self.nodeObject.value.parent is None else 1
+
+    def childCount(self):
+        return len(self.nodeObject.value.children)
+
+@countedClass
+class MFnTransform(MFnDagNode):
+    def rotatePivot(self, space):
+        node = self.nodeObject.value
+        if space == MSpace.kWorld:
+            return MPoint(*transformPoint(node.get3('rotatePivot'), node.worldMatrix()))
+        return MPoint(*node.get3('rotatePivot'))
+
+    def scalePivot(self, space):
+        node = self.nodeObject.value
+        if space == MSpace.kWorld:
+            return MPoint(*transformPoint(node.get3('scalePivot'), node.worldMatrix()))
+        return MPoint(*node.get3('scalePivot'))
+
+    def rotatePivotTranslation(self, space):
+        return MVector(*self.nodeObject.value.get3('rotatePivotTranslate'))
+
+    def scalePivotTranslation(self, space):
+        return MVector(*self.nodeObject.value.get3('scalePivotTranslate'))
+
+    def translation(self, space):
+        node = self.nodeObject.value
+        if space == MSpace.kWorld:
+            return MVector(*transformPoint(node.get3('translate'), node.parentMatrix()))
+        return MVector(*node.get3('translate'))
+
+    def transformation(self):
+        return MTransformationMatrix(self.nodeObject.value)
+
+@countedClass
+class MFnSingleIndexedComponent(object):
+    def __init__(self, component=None):
+        self.componentObject = component
+
+    def create(self, componentType):
+        self.componentObject = MObject(Component(componentType))
+        return self.componentObject
+
+    def componentType(self):
+        return self.componentObject.value.apiType
+
+    def elementCount(self):
+        return len(self.componentObject.value.elements)
+
+    def element(self, i):
+        return self.componentObject.value.elements[i]
+
+    def getElements(self, intArray):
+        intArray.values = list(self.componentObject.value.elements)
+
+    def addElements(self, intArray):
+        self.componentObject.value.elements.extend(intArray.values)
+
+    def addElement(self, element):
+        self.componentObject.value.elements.append(int(element))
+
+# A C pointer as SWIG returns it, int() gives its address
+class RawPointer(object):
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __int__(self):
+        return ctypes.addressof(self.buffer)
+
+@countedClass
+class MFnMesh(MFnDagNode):
+    def mesh(self):
+        return shapeOf(self.nodeObject.value)
+
+    def numVertices(self):
+        return len(self.mesh().data['points'])
+
+    def numEdges(self):
+        return len(self.mesh().data['edges'])
+
+    def numPolygons(self):
+        return len(self.mesh().data['faces'])
+
+    # Object space points in a float buffer owned by the mesh, like the pointer Maya returns
+    def getRawPoints(self):
+        mesh = self.mesh()
+        points = mesh.data['points']
+        mesh.data['rawPoints'] = (ctypes.c_float * (len(points) * 3))(*[value for point in points for value in point])
+        return RawPointer(mesh.data['rawPoints'])
+
+    def getPoints(self, pointArray, space=MSpace.kObject):
+        mesh = self.mesh()
+        matrix = mesh.worldMatrix() if space == MSpace.kWorld else identity()
+        pointArray.values = [MPoint(*transformPoint(point, matrix)) for point in mesh.data['points']]
+
+    def getVertices(self, vertexCounts, vertexList):
+        faces = self.mesh().data['faces']
+        vertexCounts.values = [len(face) for face in faces]
+        vertexList.values = [vertexId for face in faces for vertexId in face]
+
+    def getEdgeVertices(self, edgeId, vertexList):
+        vertexList[0], vertexList[1] = self.mesh().data['edges'][edgeId]
+
+@countedClass
+class MItMeshPolygon(object):
+    def __init__(self, dagPath, component=None):
+        mesh = shapeOf(dagPath.nodes[-1])
+        self.faces = mesh.data['faces']
+        if 'edgeIds' not in mesh.data:
+            mesh.data['edgeIds'] = dict(((min(edge), max(edge)), i) for i, edge in enumerate(mesh.data['edges']))
+        self.edgeIds = mesh.data['edgeIds']
+        if component is not None and not component.isNull():
+            self.faceIds = list(component.value.elements)
+        else:
+            self.faceIds = list(range(len(self.faces)))
+        self.position = 0
+
+    def isDone(self):
+        return self.position >= len(self.faceIds)
+
+    def next(self):
+        self.position += 1
+
+    def index(self):
+        return self.faceIds[self.position]
+
+    def getVertices(self, vertexList):
+        vertexList.values = list(self.faces[self.faceIds[self.position]])
+
+    def getEdges(self, edgeList):
+        face = self.faces[self.faceIds[self.position]]
+        edgeList.values = [self.edgeIds[(min(a, b), max(a, b))] for a, b in zip(face, face[1:] + face[:1])]
+
+@countedClass
+class MItMeshEdge(object):
+    def __init__(self, dagPath, component=None):
+        self.edges = shapeOf(dagPath.nodes[-1]).data['edges']
+        if component is not None and not component.isNull():
+            self.edgeIds = list(component.value.elements)
+        else:
+            self.edgeIds = list(range(len(self.edges)))
+        self.position = 0
+
+    def isDone(self):
+        return self.position >= len(self.edgeIds)
+
+    def next(self):
+        self.position += 1
+
+    def index(self, side=None):
+        edgeId = self.edgeIds[self.position]
+        if side is None:
+            return edgeId
+        return self.edges[edgeId][side]
+
+@countedClass
+class MDGModifier(object):
+    def __init__(self):
+        self.operations = []
+        self.done = 0
+
+    def newPlugValueDouble(self, plug, value):
+        self.operations.append((plug, 'Double', value, None))
+
+    def newPlugValueFloat(self, plug, value):
+        self.operations.append((plug, 'Double', value, None))
+
+    def newPlugValueBool(self, plug, value):
+        self.operations.append((plug, 'Bool', value, None))
+
+    def newPlugValueInt(self, plug, value):
+        self.operations.append((plug, 'Int', value, None))
+
+    def doIt(self):
+        for i in range(len(self.operations)):
+            plug, kind, value, before = self.operations[i]
+            if i >= self.done:
+                before = getattr(plug, 'as' + kind)()
+                self.operations[i] = (plug, kind, value, before)
+            getattr(plug, 'set' + kind)(value)
+        self.done = len(self.operations)
+
+    def undoIt(self):
+        for plug, kind, value, before in reversed(self.operations):
+            getattr(plug, 'set' + kind)(before)
+
+@countedClass
+class MDagModifier(MDGModifier):
+    pass
+
+class MSyntax(object):
+    kNoArg = 0
+    kBoolean = 1
+    kLong = 2
+    kDouble = 3
+    kString = 4
+    kUnsigned = 5
+    kDistance = 6
+    kAngle = 7
+    kTime = 8
+    kSelectionItem = 9
+
+    def __init__(self):
+        self.flags = {}
+        self.multiUse = set()
+
+    def addFlag(self, shortName, longName, *argTypes):
+        argTypes = tuple(argType for argType in argTypes if argType != MSyntax.kNoArg)
+        self.flags[shortName] = (longName, argTypes)
+
+    def makeFlagMultiUse(self, shortName):
+        self.multiUse.add(shortName)
+
+    # Short name of a flag given by short or long name
+    def shortName(self, name):
+        for shortName, (longName, argTypes) in self.flags.items():
+            if name in (shortName, longName):
+                return shortName
+        raise RuntimeError('Invalid flag: ' + name)
+
+@countedClass
+class MArgList(object):
+    def __init__(self, values=None):
+        self.values = list(values or [])
+
+    # Build an argument list from python keyword style flags, e.g. {'color': (1, 0, 0)}
+    @staticmethod
+    def fromFlags(flags):
+        values = []
+        for name, value in flags.items():
+            uses = value if isinstance(value, list) else [value]
+            for use in uses:
+                values.append('-' + name)
+                if isinstance(use, (tuple, list)):
+                    values.extend(use)
+                else:
+                    values.append(use)
+        return MArgList(values)
+
+    def length(self):
+        return len(self.values)
+
+    def asString(self, i):
+        return str(self.values[i])
+
+    def asInt(self, i):
+        return int(self.values[i])
+
+    def asDouble(self, i):
+        return float(self.values[i])
+
+    def asBool(self, i):
+        return bool(self.values[i])
+
+@countedClass
+class MArgParser(object):
+    def __init__(self, syntax, args):
+        self.uses = {}
+        values = list(args.values)
+        i = 0
+        while i < len(values):
+            shortName = syntax.shortName(values[i])
+            argCount = len(syntax.flags[shortName][1])
+            self.uses.setdefault(shortName, []).append(values[i + 1:i + 1 + argCount])
+            i += 1 + argCount
+            # flag=True of a flag without arguments, like cmds does
+            if argCount == 0 and i < len(values) and values[i] is True:
+                i += 1
+        self.syntax = syntax
+
+    def isFlagSet(self, name):
+        return self.syntax.shortName(name) in self.uses
+
+    def numberOfFlagUses(self, name):
+        return len(self.uses.get(self.syntax.shortName(name), []))
+
+    def getFlagArgumentList(self, name, use, argList):
+        argList.values = list(self.uses[self.syntax.shortName(name)][use])
+
+    def flagArgumentInt(self, name, i):
+        return int(self.uses[self.syntax.shortName(name)][0][i])
+
+    def flagArgumentDouble(self, name, i):
+        return float(self.uses[self.syntax.shortName(name)][0][i])
+
+    def flagArgumentString(self, name, i):
+        return str(self.uses[self.syntax.shortName(name)][0][i])
+
+    def flagArgumentBool(self, name, i):
+        return bool(self.uses[self.syntax.shortName(name)][0][i])
+
+##########################################################
+# maya.OpenMayaMPx stand-in.
+##########################################################
+class MPxCommand(object):
+    def __init__(self):
+        self.standInSyntax = MSyntax()
+        self.result = None
+
+    def syntax(self):
+        return self.standInSyntax
+
+    def setResult(self, result):
+        self.result = result
+
+    def appendToResult(self, result):
+        if self.result is None:
+            self.result = []
+        self.result.append(result)
+
+    def clearResult(self):
+        self.result = None
+
+class MTypeId(object):
+    def __init__(self, value):
+        self.value = value
+
+class MPxNode(object):
+    def __init__(self):
+        pass
+
+class MFnPlugin(object):
+    commands = {}
+    nodes = {}
+
+    def __init__(self, mobject=None, vendor='', version='', apiVersion=''):
+        pass
+
+    def registerCommand(self, name, cmdCreator, syntaxCreator=None):
+        MFnPlugin.commands[name] = (cmdCreator, syntaxCreator)
+
+    def deregisterCommand(self, name):
+        del MFnPlugin.commands[name]
+
+    def registerNode(self, name, typeId, nodeCreator, nodeInitializer):
+        MFnPlugin.nodes[typeId.value] = (name, nodeCreator, nodeInitializer)
+
+    def deregisterNode(self, typeId):
+        del MFnPlugin.nodes[typeId.value]
+
+def asMPxPtr(command):
+    return command
+
+##########################################################
+# maya.cmds stand-in.
+##########################################################
+cmdsFunctions = {}
+
+def command(function):
+    def wrapper(*args, **kwargs):
+        counter.countCmds(function.__name__)
+        return function(*args, **kwargs)
+    wrapper.__name__ = function.__name__
+    cmdsFunctions[function.__name__] = wrapper
+    return wrapper
+
+def flag(kwargs, *names, **default):
+    for name in names:
+        if name in kwargs:
+            return kwargs[name]
+    return default.get('default')
+
+def itemNames(items):
+    names = []
+    for node, value in items:
+        if value is None:
+            names.append(node.name)
+        else:
+            prefix = {MFn.kMeshVertComponent: 'vtx', MFn.kMeshEdgeComponent: 'e',
+                      MFn.kMeshPolygonComponent: 'f', MFn.kCurveCVComponent: 'cv'}[value.apiType]
+            names.extend('%s.%s[%d]' % (node.name, prefix, element) for element in value.elements)
+    return names
+
+def toList(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+@command
+def ls(*args, **kwargs):
+    if flag(kwargs, 'selection', 'sl'):
+        names = itemNames(scene.selection)
+        if flag(kwargs, 'long', 'l'):
+            names = [scene.find(name).fullPath() + ('.' + name.split('.', 1)[1] if '.' in name else '')
+                     for name in names]
+        return names
+    patterns = [pattern for arg in args for pattern in toList(arg)]
+    if patterns and not any('*' in pattern for pattern in patterns):
+        # Plain names are looked up like Maya does, without scanning the scene
+        nodes = []
+        for pattern in patterns:
+            try:
+                nodes.append(scene.find(pattern))
+            except RuntimeError:
+                pass
+    else:
+        nodes = list(scene.nodes.values())
+    if patterns and nodes and any('*' in pattern for pattern in patterns):
+        nodes = [node for node in nodes if any(matches(node.name, pattern.split('.')[0]) for pattern in patterns)]
+        if not flag(kwargs, 'recursive', 'r'):
+            # Wildcards only match the root namespace unless recursive
+            nodes = [node for node in nodes if ':' not in node.name]
+        # "*.attr" keeps nodes having the attribute, listed as nodes like ls -objectsOnly
+        attrNames = [pattern.split('.', 1)[1] for pattern in patterns if '.' in pattern]
+        if attrNames:
+            nodes = [node for node in nodes if any(attrName in node.attrs for attrName in attrNames)]
+    nodeType = flag(kwargs, 'type', 'typ')
+    if nodeType:
+        nodes = [node for node in nodes if node.type in toList(nodeType)]
+    if flag(kwargs, 'long', 'l'):
+        return [node.fullPath() for node in nodes]
+    return [node.name for node in nodes]
+
+def matches(name, pattern):
+    if pattern.endswith('*'):
+        return name.startswith(pattern[:-1])
+    return name == pattern.split('|')[-1]
+
+@command
+def select(*args, **kwargs):
+    items = []
+    for arg in args:
+        for name in toList(arg):
+            items.extend(parseSelectionString(name))
+    if flag(kwargs, 'clear', 'cl'):
+        scene.selection = []
+    elif flag(kwargs, 'deselect', 'd'):
+        removed = set(itemNames(items))
+        kept = []
+        for node, value in scene.selection:
+            if value is None:
+                if node.name not in removed:
+                    kept.append((node, None))
+            else:
+                for name in itemNames([(node, value)]):
+                    if name not in removed:
+                        kept.extend(parseSelectionString(name))
+        scene.selection = kept
+    elif flag(kwargs, 'add', 'af'):
+        scene.selection.extend(items)
+    else:
+        scene.selection = items
+
+@command
+def selectPref(*args, **kwargs):
+    pass
+
+@command
+def undoInfo(*args, **kwargs):
+    pass
+
+@command
+def refresh(*args, **kwargs):
+    pass
+
+@command
+def undo(*args, **kwargs):
+    pass
+
+@command
+def about(*args, **kwargs):
+    # Benchmarks always run like mayapy
+    return bool(flag(kwargs, 'batch', 'b'))
+
+@command
+def progressWindow(*args, **kwargs):
+    if flag(kwargs, 'query', 'q'):
+        return False
+
+# Nothing is animated, every frame evaluates each node once for the profiler
+@command
+def playbackOptions(*args, **kwargs):
+    if flag(kwargs, 'minTime', 'min'):
+        return 1.0
+    if flag(kwargs, 'maxTime', 'max'):
+        return 24.0
+
+@command
+def currentTime(*args, **kwargs):
+    if flag(kwargs, 'query', 'q'):
+        return scene.currentTime
+    scene.currentTime = float(args[0])
+    if scene.profilerSampling:
+        scene.profilerEvents.extend((node.name, node.type, 1.0) for node in scene.nodes.values())
+    return scene.currentTime
+
+@command
+def evaluationManager(*args, **kwargs):
+    if flag(kwargs, 'query', 'q'):
+        return [scene.evaluationMode]
+    scene.evaluationMode = flag(kwargs, 'mode', 'm', default=scene.evaluationMode)
+
+@command
+def profiler(*args, **kwargs):
+    if flag(kwargs, 'query', 'q'):
+        if flag(kwargs, 'eventCount', 'ec'):
+            return len(scene.profilerEvents)
+        name, description, duration = scene.profilerEvents[flag(kwargs, 'eventIndex', 'ei')]
+        if flag(kwargs, 'eventName', 'en'):
+            return name
+        if flag(kwargs, 'eventDescription', 'ed'):
+            return description
+        return duration
+    if flag(kwargs, 'reset', 'r'):
+        scene.profilerEvents = []
+    sampling = flag(kwargs, 'sampling', 's')
+    if sampling is not None:
+        scene.profilerSampling = sampling
+
+@command
+def error(message):
+    raise RuntimeError(message)
+
+@command
+def warning(message):
+    sys.stderr.write('Warning: ' + message + '\n')
+
+@command
+def objExists(name):
+    try:
+        scene.find(name)
+    except RuntimeError:
+        return False
+    return True
+
+@command
+def objectType(name, isAType=None, **kwargs):
+    node = scene.find(name)
+    if isAType is not None:
+        if isAType == 'transform':
+            return node.isTransform()
+        return node.type == isAType
+    return node.type
+
+@command
+def listRelatives(name, **kwargs):
+    node = scene.find(toList(name)[0])
+    if flag(kwargs, 'allDescendents', 'ad'):
+        nodes = []
+        stack = list(node.children)
+        while stack:
+            child = stack.pop()
+            nodes.append(child)
+            stack.extend(child.children)
+    elif flag(kwargs, 'parent', 'p'):
+        nodes = [node.parent] if node.parent is not None else []
+    elif flag(kwargs, 'shapes', 's'):
+        nodes = [child for child in node.children if not child.isTransform()]
+    else:
+        nodes = list(node.children)
+    nodeType = flag(kwargs, 'type', 'typ')
+    if nodeType:
+        nodes = [child for child in nodes if child.type in toList(nodeType)]
+    if not nodes:
+        return None
+    if flag(kwargs, 'fullPath', 'f'):
+        return [child.fullPath() for child in nodes]
+    return [child.name for child in nodes]
+
+@command
+def getAttr(name, **kwargs):
+    nodeName, attrName = name.split('.', 1)
+    node = scene.find(nodeName)
+    if attrName in kTransformAttributes:
+        return [node.get3(attrName)]
+    if attrName in shapeOf(node).data:
+        return shapeOf(node).data[attrName]
+    value = node.attrs[attrName]
+    # Compound values such as double3 come as a list of one tuple
+    return [value] if isinstance(value, tuple) else value
+
+@command
+def setAttr(name, *values, **kwargs):
+    nodeName, attrName = name.split('.', 1)
+    node = scene.find(nodeName)
+    if attrName in kTransformAttributes:
+        node.set3(attrName, values)
+    elif attrName == 'overrideColorRGB':
+        for channel, value in zip('RGB', values):
+            node.attrs['overrideColor' + channel] = float(value)
+    else:
+        node.attrs[attrName] = values[0] if len(values) == 1 else tuple(values)
+    if 'update' in node.data:
+        # History node, recompute its output shape
+        node.data['update']()
+    if scene.dirtyCallbacks:
+        notifyDirty(node, getAttribute(attrName))
+
+@command
+def addAttr(name, **kwargs):
+    node = scene.find(name)
+    node.attrs[flag(kwargs, 'longName', 'ln')] = '' if flag(kwargs, 'dataType', 'dt') == 'string' else 0.0
+
+@command
+def attributeQuery(attrName, **kwargs):
+    node = scene.find(flag(kwargs, 'node', 'n'))
+    return attrName in node.attrs
+
+# Connections are only recorded on the destination node, plug-in nodes are not evaluated
+@command
+def connectAttr(source, destination, **kwargs):
+    nodeName, attrName = destination.split('.', 1)
+    node = scene.find(nodeName)
+    if attrName in node.data.setdefault('inputs', {}) and not flag(kwargs, 'force', 'f'):
+        raise RuntimeError('connectAttr: ' + destination + ' is already connected')
+    scene.find(source.split('.', 1)[0])
+    node.data['inputs'][attrName] = source
+
+@command
+def disconnectAttr(source, destination, **kwargs):
+    nodeName, attrName = destination.split('.', 1)
+    scene.find(nodeName).data.get('inputs', {}).pop(attrName, None)
+
+@command
+def listConnections(name, **kwargs):
+    nodeName, attrName = name.split('.', 1)
+    source = scene.find(nodeName).data.get('inputs', {}).get(attrName)
+    # Only incoming connections are recorded
+    if source is None:
+        return []
+    return [source if flag(kwargs, 'plugs', 'p') else source.split('.', 1)[0]]
+
+@command
+def objectCenter(name, **kwargs):
+    node = scene.find(name)
+    points = worldPoints(node)
+    if not points:
+        return list(transformPoint((0.0, 0.0, 0.0), node.worldMatrix()))
+    low = [min(point[i] for point in points) for i in range(3)]
+    high = [max(point[i] for point in points) for i in range(3)]
+    return [(low[i] + high[i]) * 0.5 for i in range(3)]
+
+# World positions of all points of a node's shapes
+def worldPoints(node):
+    points = []
+    for shape in [node] + list(node.children):
+        for point in shape.data.get('cvs', shape.data.get('points', [])):
+            points.append(transformPoint(point, shape.worldMatrix()))
+    return points
+
+@command
+def xform(*args, **kwargs):
+    name = toList(args[0])[0] if args else itemNames(scene.selection)[0]
+    worldSpace = flag(kwargs, 'worldSpace', 'ws')
+    if flag(kwargs, 'query', 'q'):
+        if '.cv[' in name:
+            node = shapeOf(scene.find(name))
+            return [value for point in worldPoints(node) for value in point]
+        node = scene.find(name)
+        if flag(kwargs, 'matrix', 'm'):
+            matrix = node.worldMatrix() if worldSpace else node.localMatrix()
+            return [value for row in matrix for value in row]
+        if flag(kwargs, 'pivots', 'piv'):
+            rotatePivot = transformPoint(node.get3('rotatePivot'), node.worldMatrix())
+            scalePivot = transformPoint(node.get3('scalePivot'), node.worldMatrix())
+            return list(rotatePivot) + list(scalePivot)
+        if flag(kwargs, 'translation', 't'):
+            if worldSpace:
+                return list(transformPoint((0.0, 0.0, 0.0), node.worldMatrix()))
+            return list(node.get3('translate'))
+        if flag(kwargs, 'rotatePivot', 'rp'):
+            return list(transformPoint(node.get3('rotatePivot'), node.worldMatrix()))
+        raise RuntimeError('xform: unsupported query')
+
+    for name in toList(args[0]) if args else itemNames(scene.selection):
+        node = scene.find(name)
+        pivots = flag(kwargs, 'pivots', 'piv')
+        if pivots is not None:
+            setPivots(node, pivots, worldSpace)
+        translate = flag(kwargs, 'translation', 't')
+        if translate is not None:
+            if flag(kwargs, 'relative', 'r'):
+                current = node.get3('translate')
+                translate = [current[i] + translate[i] for i in range(3)]
+            node.set3('translate', translate)
+            if scene.dirtyCallbacks:
+                notifyDirty(node, getAttribute('translate'))
+
+# Move both pivots to a point without moving the node, like xform -pivots
+def setPivots(node, point, worldSpace):
+    localPivot = transformPoint(point, inverse(node.worldMatrix())) if worldSpace else tuple(point)
+    transformation = MTransformationMatrix(node)
+    for pivotName, translateName, matrix in (('scalePivot', 'scalePivotTranslate', transformation.asScaleMatrix()),
+                                             ('rotatePivot', 'rotatePivotTranslate', transformation.asRotateMatrix())):
+        pivot = node.get3(pivotName)
+        delta = [pivot[i] - localPivot[i] for i in range(3)]
+        moved = transformVector(delta, matrix.rows)
+        current = node.get3(translateName)
+        node.set3(translateName, [current[i] + delta[i] - moved[i] for i in range(3)])
+        node.set3(pivotName, localPivot)
+
+@command
+def parent(*args, **kwargs):
+    names = [name for arg in args for name in toList(arg)]
+    if flag(kwargs, 'world', 'w'):
+        children, newParent = names, None
+    else:
+        children, newParent = names[:-1], scene.find(names[-1])
+    for name in children:
+        scene.reparent(scene.find(name), newParent)
+    return [scene.find(name).name for name in children]
+
+@command
+def rename(name, newName):
+    node = scene.find(name)
+    del scene.nodes[node.name]
+    node.name = scene.uniqueName(newName)
+    scene.nodes[node.name] = node
+    return node.name
+    return [scene.find(name).name for name in children]
+
+@command
+def ikHandle(**kwargs):
+    startJoint = scene.find(flag(kwargs, 'startJoint', 'sj'))
+    endEffector = scene.find(flag(kwargs, 'endEffector', 'ee'))
+    chain = [endEffector]
+    while chain[-1] is not startJoint:
+        if chain[-1].parent is None:
+            raise RuntimeError('ikHandle: end effector is not below the start joint')
+        chain.append(chain[-1].parent)
+    positions = [transformPoint((0.0, 0.0, 0.0), joint.worldMatrix()) for joint in reversed(chain)]
+
+    handle = scene.createNode('ikHandle', 'ikHandle1')
+    effector = scene.createNode('ikEffector', 'effector1', endEffector.parent)
+    # A curve fitted to the joints, parameterized by length along them
+    parameters, points = samplePolyline(positions, kFitSamples * len(positions))
+    curve = createCurve('curve1', fitCurve(points, parameters, flag(kwargs, 'numSpans', 'ns', default=1)))
+    return [handle.name, effector.name, curve.name]
+
+def createCurve(name, cvs, parentNode=None):
+    transform = scene.createNode('transform', name, parentNode)
+    shape = scene.createNode('nurbsCurve', transform.name + 'Shape', transform)
+    shape.data['cvs'] = list(cvs)
+    shape.data['degree'] = 3
+    shape.data['spans'] = len(cvs) - 3
+    return transform
+
+##########################################################
+# Curve fitting, a least squares stand-in for Maya's curve fits.
+##########################################################
+# Samples per fitted CV, enough to keep the fit determined
+kFitSamples = 8
+
+# Clamped uniform knots of a cubic curve of spans spans, from 0 to 1
+def uniformKnots(spans):
+    return [0.0] * 4 + [i / float(spans) for i in range(1, spans)] + [1.0] * 4
+
+# Values of every cubic B-spline basis function of knots at parameter u, Cox-de Boor
+def basisValues(knots, u):
+    cvCount = len(knots) - 4
+    span = 3
+    while span < cvCount - 1 and knots[span + 1] <= u:
+        span += 1
+    values = [0.0] * len(knots)
+    values[span] = 1.0
+    for degree in range(1, 4):
+        for i in range(max(0, span - degree), span + 1):
+            value = 0.0
+            if knots[i + degree] > knots[i]:
+                value += (u - knots[i]) / (knots[i + degree] - knots[i]) * values[i]
+            if knots[i + degree + 1] > knots[i + 1]:
+                value += (knots[i + degree + 1] - u) / (knots[i + degree + 1] - knots[i + 1]) * values[i + 1]
+            values[i] = value
+    return values[:cvCount]
+
+def evaluateCurve(cvs, u):
+    values = basisValues(uniformKnots(len(cvs) - 3), u)
+    return tuple(sum(value * cv[axis] for value, cv in zip(values, cvs)) for axis in range(3))
+
+# CVs of the uniform cubic curve of spans spans closest to points at parameters, by least squares
+# The first and last CVs are the first and last points, like a clamped curve ends on them
+def fitCurve(points, parameters, spans):
+    knots = uniformKnots(spans)
+    cvCount = spans + 3
+    rows = [basisValues(knots, u) for u in parameters]
+    # Normal equations of the inner CVs, the end CVs are fixed
+    size = cvCount - 2
+    matrix = [[0.0] * size for i in range(size)]
+    rhs = [[0.0] * 3 for i in range(size)]
+    for row, point in zip(rows, points):
+        rest = [point[axis] - row[0] * points[0][axis] - row[-1] * points[-1][axis] for axis in range(3)]
+        for i in range(size):
+            if row[i + 1] == 0.0:
+                continue
+            for j in range(size):
+                matrix[i][j] += row[i + 1] * row[j + 1]
+            for axis in range(3):
+                rhs[i][axis] += row[i + 1] * rest[axis]
+    return [tuple(points[0])] + [tuple(cv) for cv in solve(matrix, rhs)] + [tuple(points[-1])]
+
+# Solve matrix x = rhs by Gaussian elimination with partial pivoting, rhs has one row of values per unknown
+def solve(matrix, rhs):
+    size = len(matrix)
+    matrix = [list(row) for row in matrix]
+    rhs = [list(row) for row in rhs]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda row: abs(matrix[row][column]))
+        matrix[column], matrix[pivot] = matrix[pivot], matrix[column]
+        rhs[column], rhs[pivot] = rhs[pivot], rhs[column]
+        for row in range(column + 1, size):
+            factor = matrix[row][column] / matrix[column][column]
+            if factor == 0.0:
+                continue
+            for k in range(column, size):
+                matrix[row][k] -= factor * matrix[column][k]
+            for k in range(len(rhs[row])):
+                rhs[row][k] -= factor * rhs[column][k]
+    for row in reversed(range(size)):
+        for k in range(row + 1, size):
+            for axis in range(len(rhs[row])):
+                rhs[row][axis] -= matrix[row][k] * rhs[k][axis]
+        rhs[row] = [value / matrix[row][row] for value in rhs[row]]
+    return rhs
+
+# count points evenly spaced along a polyline with their length fractions, as (parameters, points)
+def samplePolyline(points, count):
+    if len(points) == 1:
+        return [i / float(count - 1) for i in range(count)], [tuple(points[0])] * count
+    lengths = [0.0]
+    for a, b in zip(points[:-1], points[1:]):
+        lengths.append(lengths[-1] + math.sqrt(sum((b[i] - a[i]) ** 2 for i in range(3))))
+    parameters = [i / float(count - 1) for i in range(count)]
+    samples = []
+    segment = 0
+    for parameter in parameters:
+        target = lengths[-1] * parameter
+        while segment < len(points) - 2 and lengths[segment + 1] < target:
+            segment += 1
+        span = lengths[segment + 1] - lengths[segment] or 1.0
+        weight = (target - lengths[segment]) / span
+        a, b = points[segment], points[segment + 1]
+        samples.append(tuple(a[i] + (b[i] - a[i]) * weight for i in range(3)))
+    return parameters, samples
+
+@command
+def rebuildCurve(name, **kwargs):
+    shape = shapeOf(scene.find(name))
+    history = scene.createNode('rebuildCurve', 'rebuildCurve1')
+    history.attrs['spans'] = flag(kwargs, 'spans', 's', default=4)
+    source = list(shape.data['cvs'])
+    # Refit the input curve at its own parameters, like keepRange 0 to 1
+    def update():
+        spans = history.attrs['spans']
+        parameters = [i / float(kFitSamples * (spans + 3) - 1) for i in range(kFitSamples * (spans + 3))]
+        shape.data['cvs'] = fitCurve([evaluateCurve(source, u) for u in parameters], parameters, spans)
+        shape.data['spans'] = history.attrs['spans']
+    history.data['update'] = update
+    update()
+    return [name, history.name]
+
+@command
+def cluster(*args, **kwargs):
+    members = [name for arg in args for name in toList(arg)]
+    shape = shapeOf(scene.find(members[0]))
+    cvs = shape.data['cvs']
+    indices = [int(member.split('[')[1].rstrip(']')) for member in members]
+    center = [sum(cvs[i][axis] for i in indices) / len(indices) for axis in range(3)]
+
+    clusterName = flag(kwargs, 'name', 'n') or 'cluster1'
+    deformer = scene.createNode('cluster', clusterName)
+    handle = scene.createNode('transform', deformer.name + 'Handle')
+    scene.createNode('clusterHandle', handle.name + 'Shape', handle)
+    handle.set3('rotatePivot', center)
+    handle.set3('scalePivot', center)
+    deformer.data['members'] = (shape, indices)
+    return [deformer.name, handle.name]
+
+@command
+def circle(**kwargs):
+    transform = createCurve(flag(kwargs, 'name', 'n') or 'nurbsCircle1', [])
+    shape = shapeOf(transform)
+    history = scene.createNode('makeNurbCircle', 'makeNurbCircle1')
+    history.attrs['radius'] = flag(kwargs, 'radius', 'r', default=1.0)
+    history.attrs['center'] = tuple(flag(kwargs, 'center', 'c', default=(0.0, 0.0, 0.0)))
+    history.attrs['normal'] = tuple(flag(kwargs, 'normal', 'nr', default=(0.0, 0.0, 1.0)))
+    def update():
+        shape.data['cvs'] = circlePoints(history.attrs['radius'], history.attrs['center'], history.attrs['normal'])
+        shape.data['spans'] = len(shape.data['cvs']) - 3
+    history.data['update'] = update
+    update()
+    return [transform.name, history.name]
+
+def circlePoints(radius, center, normal):
+    # Two axes perpendicular to the normal
+    helper = (1.0, 0.0, 0.0) if abs(normal[0]) < 0.9 else (0.0, 1.0, 0.0)
+    u = cross(normal, helper)
+    u = [value / math.sqrt(sum(x * x for x in u)) for value in u]
+    v = cross(normal, u)
+    cvs = []
+    for k in range(8):
+        angle = 2.0 * math.pi * k / 8
+        cvs.append(tuple(center[i] + radius * (math.cos(angle) * u[i] + math.sin(angle) * v[i]) for i in range(3)))
+    return cvs
+
+def cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+@command
+def parentConstraint(*args, **kwargs):
+    names = [name for arg in args for name in toList(arg)]
+    constrained = scene.find(names[-1])
+    node = scene.createNode('parentConstraint', constrained.name + '_parentConstraint1', constrained)
+    node.data['targets'] = names[:-1]
+    return [node.name]
+
+@command
+def delete(*args, **kwargs):
+    for name in [name for arg in args for name in toList(arg)]:
+        deleteNode(scene.find(name))
+
+def deleteNode(node):
+    for function in list(scene.removalCallbacks.get(node, {}).values()):
+        function(MObject(node))
+    for child in list(node.children):
+        deleteNode(child)
+    if node.parent is not None:
+        node.parent.children.remove(node)
+    scene.nodes.pop(node.name, None)
+
+@command
+def createNode(nodeType, **kwargs):
+    parentName = flag(kwargs, 'parent', 'p')
+    parentNode = scene.find(parentName) if parentName else None
+    return scene.createNode(nodeType, flag(kwargs, 'name', 'n'), parentNode).name
+
+##########################################################
+# Scene building helpers for benchmarks.
+##########################################################
+# Create a transform with random-like but deterministic transform values
+def createTransform(name, index, parentNode=None, nodeType='transform'):
+    node = scene.createNode(nodeType, name, parentNode)
+    node.set3('translate', ((index * 7) % 13 - 6.0, (index * 3) % 5 + 1.0, (index * 11) % 17 - 8.0))
+    node.set3('rotate', ((index * 5) % 90, (index * 13) % 180, 0.0))
+    node.set3('scale', (1.0 + index % 3, 1.0, 1.0 + index % 2))
+    node.set3('rotatePivot', (0.5, 0.0, -0.25))
+    node.set3('scalePivot', (0.5, 0.0, -0.25))
+    return node
+
+# Create a flat grid mesh of vertexCount vertices, rows of width columns
+def createMesh(name, vertexCount, width=None):
+    transform = scene.createNode('transform', name)
+    shape = scene.createNode('mesh', transform.name + 'Shape', transform)
+    width = width or max(2, int(math.ceil(math.sqrt(vertexCount))))
+    shape.data['vertexCount'] = vertexCount
+    shape.data['points'] = [(float(i % width), 0.0, float(i // width)) for i in range(vertexCount)]
+    faces = []
+    edges = []
+    for i in range(vertexCount):
+        if i % width < width - 1 and i + 1 < vertexCount:
+            edges.append((i, i + 1))
+        if i + width < vertexCount:
+            edges.append((i, i + width))
+        if i % width < width - 1 and i + width + 1 < vertexCount:
+            faces.append((i, i + 1, i + width + 1, i + width))
+    shape.data['faces'] = faces
+    shape.data['edges'] = edges
+    return transform
+
+##########################################################
+# Installation.
+##########################################################
+def makeModule(name, namespace):
+    module = types.ModuleType(name)
+    for key, value in namespace.items():
+        setattr(module, key, value)
+    return module
+
+# Register maya, maya.cmds, maya.OpenMaya and maya.OpenMayaMPx in sys.modules
+def install():
+    thisModule = sys.modules[__name__]
+    openMaya = makeModule('maya.OpenMaya', dict(
+        (name, getattr(thisModule, name)) for name in dir(thisModule) if name.startswith('M')))
+    openMayaMPx = makeModule('maya.OpenMayaMPx', {'MPxCommand': MPxCommand, 'MPxNode': MPxNode, 'MFnPlugin': MFnPlugin,
+                                                  'asMPxPtr': asMPxPtr})
+    cmdsModule = makeModule('maya.cmds', cmdsFunctions)
+    maya = makeModule('maya', {'OpenMaya': openMaya, 'OpenMayaMPx': openMayaMPx, 'cmds': cmdsModule})
+    sys.modules['maya'] = maya
+    sys.modules['maya.OpenMaya'] = openMaya
+    sys.modules['maya.OpenMayaMPx'] = openMayaMPx
+    sys.modules['maya.cmds'] = cmdsModule
+    return maya
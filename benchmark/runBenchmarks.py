@@ -0,0 +1,188 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Intro: Offline benchmarks of every vsa* command on the maya stand-in
+# Usage: python benchmark/runBenchmarks.py [--scales 1000 10000 100000] [--commands vsaTailRigging] [--json out.json]
+# Fails when the number of cmds/OpenMaya calls per object grows with the scale
+
+benchmarkDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, benchmarkDir)
+sys.path.insert(0, os.path.dirname(benchmarkDir))
+
+import mayaStandIn
+mayaStandIn.install()
+import vsaRegistry
+
+defaultScales = [1000, 10000, 100000]
+# Allowed growth of calls per object from the smallest to the largest scale
+defaultTolerance = 1.2
+
+##########################################################
+# Scenes, each returns (flags, number of objects).
+##########################################################
+def transformScene(scale):
+    nodes = [mayaStandIn.createTransform('node1', i) for i in range(scale)]
+    mayaStandIn.scene.selection = [(node, None) for node in nodes]
+    return {}, scale
+
+def pivotToWorldCenterScene(scale):
+    return transformScene(scale)
+
+def moveToWorldCenterScene(scale):
+    flags, count = transformScene(scale)
+    flags['axis'] = 'xz'
+    return flags, count
+
+def pivotToLastSelectScene(scale):
+    flags, count = transformScene(scale - 1)
+    target = mayaStandIn.createCurve('target1', [(0.0, 0.0, 0.0), (1.0, 2.0, 0.0), (2.0, 0.0, 1.0), (3.0, 1.0, 0.0)])
+    mayaStandIn.scene.selection.append((target, None))
+    return flags, scale
+
+def curveColorChangerScene(scale):
+    curves = [mayaStandIn.createCurve('curve1', [(i, 0.0, 0.0)] * 4) for i in range(scale)]
+    mayaStandIn.scene.selection = [(curve, None) for curve in curves]
+    return {'color': (1.0, 0.5, 0.0)}, scale
+
+def deselectSpecialScene(scale):
+    mesh = mayaStandIn.createMesh('mesh1', scale)
+    mayaStandIn.scene.selection = mayaStandIn.parseSelectionString('%s.vtx[0:%d]' % (mesh.name, scale - 1))
+    return {'deselectPerComponent': 3, 'delta': 1}, scale
+
+# One chain of 10 joints per 10 objects
+def tailRiggingScene(scale):
+    chains = []
+    for c in range(max(1, scale // 10)):
+        parentNode = None
+        joints = []
+        for j in range(10):
+            joint = mayaStandIn.scene.createNode('joint', 'joint1', parentNode)
+            joint.set3('translate', (c * 2.0, 0.0, 0.0) if j == 0 else (1.0, 0.0, 0.0))
+            joints.append(joint)
+            parentNode = joint
+        chains.append((joints[0].fullPath(), joints[-1].fullPath()))
+    return {'chain': chains, 'prefix': 'bench_', 'spans': 4}, len(chains) * 10
+
+kScenes = {
+    'vsaCurveColorChanger': curveColorChangerScene,
+    'vsaDeselectSpecial': deselectSpecialScene,
+    'vsaMoveToWorldCenter': moveToWorldCenterScene,
+    'vsaPivotToLastSelect': pivotToLastSelectScene,
+    'vsaPivotToWorldCenter': pivotToWorldCenterScene,
+    'vsaTailRigging': tailRiggingScene,
+}
+
+##########################################################
+# Runner.
+##########################################################
+# Create a command like Maya does and run doIt with flags
+def runCommand(commandName, flags):
+    command = vsaRegistry.getCommand(commandName)
+    module = importlib.import_module(command['module'])
+    instance = getattr(module, command['class'])()
+    instance.standInSyntax = vsaRegistry.createSyntax(commandName)
+    instance.doIt(mayaStandIn.MArgList.fromFlags(flags))
+    return instance
+
+def benchmark(commandName, scale, measureMemory=True):
+    mayaStandIn.newScene()
+    flags, objectCount = kScenes[commandName](scale)
+    mayaStandIn.counter.reset()
+
+    # Tracing memory slows python down, the wall time includes it when enabled
+    measureMemory = measureMemory and tracemalloc is not None
+    if measureMemory:
+        tracemalloc.start()
+    startTime = timeit.default_timer()
+    instance = runCommand(commandName, flags)
+    wallTime = timeit.default_timer() - startTime
+    peakMemory = None
+    if measureMemory:
+        peakMemory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    result = {
+        'command': commandName,
+        'scale': scale,
+        'objects': objectCount,
+        'wallTime': wallTime,
+        'cmdsCalls': mayaStandIn.counter.totalCmdsCalls(),
+        'apiCalls': mayaStandIn.counter.totalApiCalls(),
+        'simulatedTime': mayaStandIn.counter.simulatedCost(),
+        'peakMemory': peakMemory,
+        'undoTime': None,
+    }
+
+    # Undo and redo must work on everything the command recorded
+    if instance.isUndoable():
+        startTime = timeit.default_timer()
+        instance.undoIt()
+        instance.redoIt()
+        result['undoTime'] = timeit.default_timer() - startTime
+    return result
+
+# Commands whose calls per object grow from the smallest to the largest scale
+def findSuperLinear(results, tolerance):
+    failures = []
+    byCommand = {}
+    for result in results:
+        byCommand.setdefault(result['command'], []).append(result)
+    for commandName, commandResults in sorted(byCommand.items()):
+        commandResults.sort(key=lambda result: result['objects'])
+        first, last = commandResults[0], commandResults[-1]
+        if first is last:
+            continue
+        firstRate = float(first['cmdsCalls'] + first['apiCalls']) / first['objects']
+        lastRate = float(last['cmdsCalls'] + last['apiCalls']) / last['objects']
+        if lastRate > firstRate * tolerance:
+            failures.append('%s: %.1f calls per object at %d objects, %.1f at %d objects'
+                            % (commandName, lastRate, last['objects'], firstRate, first['objects']))
+    return failures
+
+def formatTable(results):
+    lines = ['%-22s %8s %10s %10s %10s %12s %10s %10s' % ('command', 'objects', 'wall ms', 'cmds', 'api',
+                                                         'simulated ms', 'peak KB', 'undo ms')]
+    for result in results:
+        lines.append('%-22s %8d %10.1f %10d %10d %12.1f %10s %10s' % (
+            result['command'], result['objects'], result['wallTime'] * 1000.0, result['cmdsCalls'],
+            result['apiCalls'], result['simulatedTime'] * 1000.0,
+            '-' if result['peakMemory'] is None else '%d' % (result['peakMemory'] // 1024),
+            '-' if result['undoTime'] is None else '%.1f' % (result['undoTime'] * 1000.0)))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the vsa* commands on the maya stand-in.')
+    parser.add_argument('--scales', type=int, nargs='+', default=defaultScales)
+    parser.add_argument('--commands', nargs='+', default=sorted(kScenes))
+    parser.add_argument('--tolerance', type=float, default=defaultTolerance)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='Do not trace peak memory')
+    args = parser.parse_args(argv)
+
+    results = []
+    for commandName in args.commands:
+        for scale in args.scales:
+            results.append(benchmark(commandName, scale, args.memory))
+            print(formatTable(results[-1:]).split('\n')[1])
+
+    print('')
+    print(formatTable(results))
+    failures = findSuperLinear(results, args.tolerance)
+    if args.json:
+        with open(args.json, 'w') as jsonFile:
+            json.dump({'results': results, 'failures': failures}, jsonFile, indent=2)
+    for failure in failures:
+        print('Super-linear call count: ' + failure)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
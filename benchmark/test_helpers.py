@@ -0,0 +1,278 @@
+import os
+import sys
+import unittest
+
+# Intro: Assertion tests of the Maya free helpers and of a few selections on the maya stand-in
+# Usage: python -m pytest benchmark or python -m unittest discover benchmark
+
+benchmarkDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, benchmarkDir)
+sys.path.insert(0, os.path.dirname(benchmarkDir))
+
+import mayaStandIn
+mayaStandIn.install()
+import maya.OpenMaya as OpenMaya
+import maya.cmds as cmds
+import runBenchmarks
+import curveColorChanger
+import deselectSpecial
+import moveToWorldCenter
+import tailRigging
+import vsaProgress
+import vsaTopology
+
+# Run a test with a module's optional numpy turned off
+class NoNumpy(object):
+    def __init__(self, module):
+        self.module = module
+
+    def __enter__(self):
+        self.numpy = self.module.numpy
+        self.module.numpy = None
+
+    def __exit__(self, *args):
+        self.module.numpy = self.numpy
+
+def flatten(values):
+    return [float(value) for triple in values for value in triple]
+
+def selectedNames():
+    return sorted(mayaStandIn.itemNames(mayaStandIn.scene.selection))
+
+##########################################################
+# vsaDeselectSpecial.
+##########################################################
+class DeselectSpecialTest(unittest.TestCase):
+    def setUp(self):
+        mayaStandIn.newScene()
+
+    def testKeptRanges(self):
+        self.assertEqual(list(deselectSpecial.iterKeptRanges(0, 9, 0, 3, {0})), [(1, 2), (4, 5), (7, 8)])
+        self.assertEqual(list(deselectSpecial.iterKeptRanges(0, 9, 0, 5, {0, 2})), [(1, 1), (3, 4), (6, 6), (8, 9)])
+
+    def testKeptRangesOffset(self):
+        # Indices 10..14 sit at positions 2..6, positions 3 and 6 are removed
+        self.assertEqual(list(deselectSpecial.iterKeptRanges(10, 14, 2, 3, {0})), [(10, 10), (12, 13)])
+
+    def testKeptRangesEdges(self):
+        self.assertEqual(list(deselectSpecial.iterKeptRanges(0, 9, 0, 1, {0})), [])
+        self.assertEqual(list(deselectSpecial.iterKeptRanges(0, 9, 0, 2, {1})), [(0, 0), (2, 2), (4, 4), (6, 6), (8, 8)])
+        self.assertEqual(list(deselectSpecial.iterKeptRanges(5, 5, 0, 2, {1})), [(5, 5)])
+        self.assertEqual(list(deselectSpecial.iterKeptRanges(5, 5, 1, 2, {1})), [])
+
+    def testValidate(self):
+        self.assertIsNone(deselectSpecial.DeselectParameters(3, (0, 2)).validate())
+        self.assertIsNone(deselectSpecial.DeselectParameters(1, (0,)).validate())
+        self.assertIsNone(deselectSpecial.DeselectParameters(2, (0,), 'checker').validate())
+        for parameters in (deselectSpecial.DeselectParameters(0, (0,)),
+                           deselectSpecial.DeselectParameters(3, ()),
+                           deselectSpecial.DeselectParameters(3, (3,)),
+                           deselectSpecial.DeselectParameters(3, (-1,)),
+                           deselectSpecial.DeselectParameters(3, (0,), 'spiral')):
+            self.assertIsNotNone(parameters.validate())
+
+    def testValidateCount(self):
+        parameters = deselectSpecial.DeselectParameters(3, (0,))
+        self.assertIsNotNone(parameters.validateCount(2))
+        self.assertIsNone(parameters.validateCount(3))
+        self.assertIsNone(deselectSpecial.DeselectParameters(3, (0,), 'loop').validateCount(2))
+
+    # Positions run on over objects and components, whichever chunk they fall in
+    def testStrideOverObjectsAndComponents(self):
+        mesh = mayaStandIn.createMesh('mesh1', 9)
+        mayaStandIn.createTransform('child1', 1, mayaStandIn.createTransform('parent1', 0))
+        mayaStandIn.scene.selection = (mayaStandIn.parseSelectionString('parent1') +
+                                       mayaStandIn.parseSelectionString('child1') +
+                                       mayaStandIn.parseSelectionString(mesh.name + '.vtx[0:4]'))
+        runBenchmarks.runCommand('vsaDeselectSpecial', {'deselectPerComponent': 2, 'delta': 1, 'chunkSize': 2})
+        self.assertEqual(selectedNames(), ['mesh1Shape.vtx[0]', 'mesh1Shape.vtx[2]', 'mesh1Shape.vtx[4]', 'parent1'])
+
+    def testStrideNeedsEnoughElements(self):
+        mayaStandIn.createTransform('node1', 0)
+        mayaStandIn.scene.selection = mayaStandIn.parseSelectionString('node1')
+        self.assertRaises(RuntimeError, runBenchmarks.runCommand, 'vsaDeselectSpecial', {'deselectPerComponent': 2})
+
+##########################################################
+# vsaMoveToWorldCenter.
+##########################################################
+class MoveToWorldCenterTest(unittest.TestCase):
+    pivots = [1.0, 2.0, 3.0, 4.0, 6.0, 8.0, 5.0, 5.0, 5.0]
+    parentInverses = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0,
+                      0.0, 1.0, 0.0, -1.0, 0.0, 0.0, 0.0, 0.0, 1.0,
+                      0.5, 0.0, 0.0, 0.0, 2.0, 0.0, 0.0, 0.0, 1.0]
+    translates = [1.0, 1.0, 1.0, 0.0, 0.0, 0.0, 2.0, 0.0, -2.0]
+
+    def setUp(self):
+        mayaStandIn.newScene()
+
+    def testFindSelectedAncestors(self):
+        self.assertEqual(moveToWorldCenter.findSelectedAncestors(['|a', '|a|b', '|a|b|c|d', '|e', '|a|f']),
+                         [-1, 0, 1, -1, 0])
+
+    def testRelativePivots(self):
+        expected = [1.0, 2.0, 3.0, 3.0, 4.0, 5.0, 1.0, -1.0, -3.0]
+        self.assertEqual([float(value) for value in moveToWorldCenter.relativePivots(self.pivots, [-1, 0, 1])],
+                         expected)
+        with NoNumpy(moveToWorldCenter):
+            self.assertEqual(moveToWorldCenter.relativePivots(self.pivots, [-1, 0, 1]), expected)
+
+    def testComputeTranslations(self):
+        for axisMask, expected in (((1.0, 1.0, 1.0), [0.0, -1.0, -2.0, 6.0, -4.0, -8.0, -0.5, -10.0, -7.0]),
+                                   ((1.0, 0.0, 1.0), [0.0, 1.0, -2.0, 0.0, -4.0, -8.0, -0.5, 0.0, -7.0])):
+            results = [moveToWorldCenter.computeTranslations(self.pivots, self.parentInverses, self.translates,
+                                                             axisMask)]
+            with NoNumpy(moveToWorldCenter):
+                results.append(moveToWorldCenter.computeTranslations(self.pivots, self.parentInverses,
+                                                                     self.translates, axisMask))
+            for result in results:
+                for value, expectedValue in zip(flatten(result), expected):
+                    self.assertAlmostEqual(value, expectedValue)
+
+    def testParseAxisMask(self):
+        self.assertEqual(moveToWorldCenter.parseAxisMask('XZ'), (1.0, 0.0, 1.0))
+
+    # A selected child moves only by what its selected parent did not, all end at the world center
+    def testParentAndChildSelected(self):
+        self.checkParentAndChildSelected()
+        with NoNumpy(moveToWorldCenter):
+            self.checkParentAndChildSelected()
+
+    def checkParentAndChildSelected(self):
+        mayaStandIn.newScene()
+        parent = mayaStandIn.createTransform('parent1', 1)
+        child = mayaStandIn.createTransform('child1', 2, parent)
+        grandChild = mayaStandIn.createTransform('grandChild1', 3, child)
+        # Children selected before their parents
+        mayaStandIn.scene.selection = [(node, None) for node in (grandChild, parent, child)]
+        runBenchmarks.runCommand('vsaMoveToWorldCenter', {})
+        for node in (parent, child, grandChild):
+            for value in cmds.xform(node.name, q=True, ws=True, rotatePivot=True):
+                self.assertAlmostEqual(value, 0.0)
+
+##########################################################
+# vsaTopology.
+##########################################################
+class TopologyTest(unittest.TestCase):
+    # 0 - 1 - 2 - 3 - 4 - 5 in a row, 6 alone
+    def rowNeighbors(self, element):
+        if element == 6:
+            return []
+        return [neighbor for neighbor in (element - 1, element + 1) if 0 <= neighbor <= 5]
+
+    def testWalkDepths(self):
+        depths = vsaTopology.walkDepths([0, 1, 2, 4, 5, 6], 8, self.rowNeighbors)
+        self.assertEqual(list(depths), [0, 1, 2, -1, 0, 1, 0, -1])
+
+    def testWalkDepthsSameNeighbors(self):
+        # 0 and 1 are one loop, 2 and 3 the next one
+        sameNeighbors = lambda element: [element ^ 1]
+        nextNeighbors = lambda element: [other for other in (element - 2, element + 2) if 0 <= other < 6]
+        depths = vsaTopology.walkDepths([5, 4, 3, 2, 1, 0], 6, nextNeighbors, sameNeighbors)
+        self.assertEqual(list(depths), [0, 0, 1, 1, 2, 2])
+
+    def testWalkPathOrder(self):
+        order = vsaTopology.walkPathOrder([3, 2, 1, 4], 7, self.rowNeighbors)
+        self.assertEqual(list(order), [-1, 0, 1, 2, 3, -1, -1])
+
+##########################################################
+# vsaTailRigging.
+##########################################################
+class TailRiggingTest(unittest.TestCase):
+    def setUp(self):
+        mayaStandIn.newScene()
+
+    def createChain(self, offsets, parent=None):
+        joints = []
+        for offset in offsets:
+            parent = mayaStandIn.scene.createNode('joint', 'joint1', parent)
+            parent.set3('translate', offset)
+            joints.append(parent)
+        return joints
+
+    def testGrevilleParameters(self):
+        expected = [0.0, 1.0 / 12, 0.25, 0.5, 0.75, 11.0 / 12, 1.0]
+        for value, expectedValue in zip(tailRigging.grevilleParameters(4), expected):
+            self.assertAlmostEqual(value, expectedValue)
+        self.assertEqual(len(tailRigging.grevilleParameters(1)), 4)
+
+    def testNameAllocator(self):
+        mayaStandIn.createTransform('a_ctrller_1', 0)
+        mayaStandIn.createTransform('a_ctrller_3', 0)
+        allocator = tailRigging.NameAllocator('a_ctrller_')
+        self.assertEqual([allocator.allocate(index) for index in (1, 2, 3, 1)],
+                         ['a_ctrller_2', 'a_ctrller_4', 'a_ctrller_5', 'a_ctrller_6'])
+
+    def testFindLeafChains(self):
+        root = self.createChain([(0.0, 0.0, 0.0), (1.0, 0.0, 0.0)])
+        left = self.createChain([(1.0, 1.0, 0.0), (1.0, 0.0, 0.0), (1.0, 0.0, 0.0)], root[-1])
+        right = self.createChain([(1.0, -1.0, 0.0)], root[-1])
+        # A single joint below the branching is no chain
+        self.assertEqual(tailRigging.findLeafChains(root[0].fullPath()), [(left[0].fullPath(), left[-1].fullPath())])
+        self.assertEqual(tailRigging.findLeafChains(right[0].fullPath()), [])
+        self.assertEqual(tailRigging.findLeafChains(root[-1].fullPath()), [(left[0].fullPath(), left[-1].fullPath())])
+
+    # Plans not flagged approximate are where the rig puts its controllers
+    def testPlanMatchesRig(self):
+        straight = self.createChain([(0.0, 0.0, 0.0)] + [(1.0, 0.0, 0.0)] * 6)
+        bent = self.createChain([(10.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 0.5, 0.0), (1.0, 0.0, 0.3)] +
+                                [(1.0, 0.0, 0.0)] * 3)
+        chains = [(joints[0].fullPath(), joints[-1].fullPath()) for joints in (straight, bent)]
+        plan = tailRigging.TailRiggingCommand().planRig(chains, 'a_', 4)
+        columnCount = len(plan.columns)
+        rows = [plan.values[i * columnCount:(i + 1) * columnCount] for i in range(plan.rowCount())]
+        self.assertEqual(set(row[-1] for row in rows if row[0] == 0), set([0.0]))
+        self.assertEqual(set(row[-1] for row in rows if row[0] == 1), set([1.0]))
+
+        runBenchmarks.runCommand('vsaTailRigging', {'chain': chains, 'spans': 4, 'prefix': 'a_'})
+        for name, row in zip(plan.names, rows):
+            if row[-1]:
+                continue
+            pivot = cmds.xform(name, q=True, ws=True, rotatePivot=True)
+            for value, planned in zip(pivot, row[2:5]):
+                self.assertAlmostEqual(value, planned)
+
+##########################################################
+# vsaCurveColorChanger.
+##########################################################
+class CurveColorChangerTest(unittest.TestCase):
+    def setUp(self):
+        mayaStandIn.newScene()
+
+    def getShapePath(self, name):
+        selection = OpenMaya.MSelectionList()
+        selection.add(name)
+        dagPath = OpenMaya.MDagPath()
+        selection.getDagPath(0, dagPath)
+        return dagPath
+
+    def testComputeGradient(self):
+        colors = curveColorChanger.computeGradient([0, 1, 2], (0.0, 0.0, 0.0), (1.0, 0.5, 0.0))
+        self.assertEqual(colors, [(0.0, 0.0, 0.0), (0.5, 0.25, 0.0), (1.0, 0.5, 0.0)])
+
+    def testComputeGradientGroups(self):
+        # Every group runs from start to end on its own, a group of one gets start
+        colors = curveColorChanger.computeGradient([0, 1, 0, 1, 2, 0], (0.0, 0.0, 0.0), (1.0, 1.0, 1.0),
+                                                   [0, 0, 1, 1, 1, 2])
+        self.assertEqual([color[0] for color in colors], [0.0, 1.0, 0.0, 0.5, 1.0, 0.0])
+
+    def testGetSide(self):
+        for name, x, side in (('L_hand', -5.0, 'left'), ('hand_r', 5.0, 'right'), ('ns:C_spine', 5.0, 'center'),
+                              ('tail', 5.0, 'left'), ('tail', -5.0, 'right'), ('tail', 0.0, 'center')):
+            mayaStandIn.newScene()
+            curve = mayaStandIn.createCurve(name, [(0.0, 0.0, 0.0)] * 4)
+            curve.set3('translate', (x, 0.0, 0.0))
+            self.assertEqual(curveColorChanger.getSide(self.getShapePath(name + 'Shape')), side)
+            self.assertEqual(curveColorChanger.getSide(self.getShapePath(name)), side)
+
+##########################################################
+# vsaProgress.
+##########################################################
+class ProgressTest(unittest.TestCase):
+    def testSplitBySize(self):
+        self.assertEqual(vsaProgress.splitBySize([5, 0, 3], 4), [[(0, 0, 4)], [(0, 4, 5), (2, 0, 3)]])
+        self.assertEqual(vsaProgress.splitBySize([2, 2], 2), [[(0, 0, 2)], [(1, 0, 2)]])
+        self.assertEqual(vsaProgress.splitBySize([], 4), [])
+        self.assertEqual(vsaProgress.splitBySize([2], 0), [[(0, 0, 1)], [(0, 1, 2)]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,78 +1,296 @@
 import sys
+import os
+import json
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaMPx as OpenMayaMPx
 import maya.cmds as cmds
+import vsaJournal
+import vsaProfile
+import vsaRegistry
+import vsaSelection
+import vsaWindow
 
 # Intro: Simple color changer for curve
 # Plug-in information:
 kPluginCmdName = 'vsaCurveColorChanger'
 
+# RGB color in 0 - 1 range
+kColorFlag              = '-c'
+kColorLongFlag          = '-color'
+defaultColor            = (1.0, 1.0, 1.0)
+# How colors are picked
+# solid: color for every curve, depth: gradient from color to endColor along hierarchy depth,
+# chain: gradient from color to endColor over the selected roots, side: left/right/center colors
+kModeFlag               = '-m'
+kModeLongFlag           = '-mode'
+kModes                  = ('solid', 'depth', 'chain', 'side')
+defaultMode             = 'solid'
+# Last color of depth and chain gradients
+kEndColorFlag           = '-ec'
+kEndColorLongFlag       = '-endColor'
+defaultEndColor         = (0.0, 0.0, 0.0)
+# Color every curve under the selected transforms, not only the selected ones
+kHierarchyFlag          = '-hi'
+kHierarchyLongFlag      = '-hierarchy'
+# Named preset from the presets file, flags given with it win over its values
+kPresetFlag             = '-pr'
+kPresetLongFlag         = '-preset'
+kPresetFileFlag         = '-pf'
+kPresetFileLongFlag     = '-presetFile'
+defaultPresetFile       = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'curveColorPresets.json')
+# Side colors, sides are read from name tokens such as L_arm or arm_R, then from world X
+defaultSideColors       = {'left': (0.0, 0.35, 1.0), 'right': (1.0, 0.1, 0.1), 'center': (1.0, 0.85, 0.0)}
+kSideTokens             = {'l': 'left', 'lf': 'left', 'left': 'left',
+                           'r': 'right', 'rt': 'right', 'right': 'right',
+                           'c': 'center', 'ct': 'center', 'm': 'center', 'mid': 'center', 'center': 'center'}
+# World X closer to 0 than this is the center
+kSideTolerance          = 1e-4
+# Open the window instead of changing colors directly
+kUIFlag                 = '-ui'
+kUILongFlag             = '-userInterface'
+kWindowName             = 'CCCWindow'
+
 # Special deselect main function
 class CurveColorChangerCommand( OpenMayaMPx.MPxCommand ):
     def __init__(self):
         ''' Constructor '''
         OpenMayaMPx.MPxCommand.__init__(self)
 
+    def parseArgs(self, pArgs):
+        # set default arguments
+        self.color = defaultColor
+        self.mode = defaultMode
+        self.endColor = defaultEndColor
+        self.sideColors = dict(defaultSideColors)
+        self.showUI = False
+        # Window values given by flags, pushed into an open window
+        self.changedKeys = []
+
+        # Obtain the flag value, if the flag is set
+        argData = OpenMaya.MArgParser( self.syntax(), pArgs )
+        if argData.isFlagSet( kPresetFlag ):
+            presetFile = defaultPresetFile
+            if argData.isFlagSet( kPresetFileFlag ):
+                presetFile = argData.flagArgumentString( kPresetFileFlag, 0 )
+            self.applyPreset(loadPreset(presetFile, argData.flagArgumentString( kPresetFlag, 0 )))
+            self.changedKeys.extend(('color', 'endColor', 'mode'))
+        if argData.isFlagSet( kColorFlag ):
+            self.color = (argData.flagArgumentDouble( kColorFlag, 0 ),
+                          argData.flagArgumentDouble( kColorFlag, 1 ),
+                          argData.flagArgumentDouble( kColorFlag, 2 ))
+            self.changedKeys.append('color')
+        if argData.isFlagSet( kEndColorFlag ):
+            self.endColor = (argData.flagArgumentDouble( kEndColorFlag, 0 ),
+                             argData.flagArgumentDouble( kEndColorFlag, 1 ),
+                             argData.flagArgumentDouble( kEndColorFlag, 2 ))
+            self.changedKeys.append('endColor')
+        if argData.isFlagSet( kModeFlag ):
+            self.mode = argData.flagArgumentString( kModeFlag, 0 )
+            self.changedKeys.append('mode')
+        if self.mode not in kModes:
+            cmds.error("Mode must be one of " + ", ".join(kModes) + "!")
+        self.hierarchy = argData.isFlagSet( kHierarchyFlag )
+        if self.hierarchy:
+            self.changedKeys.append('hierarchy')
+        self.showUI = argData.isFlagSet( kUIFlag )
+        # A bare call opened the window before flags existed, it must not recolor every selected curve white
+        if not self.showUI and 'color' not in self.changedKeys and self.mode != 'side':
+            cmds.error("Give a color, a preset or mode side to change colors, or ui to open the window!")
+
+    # Take mode and colors of a preset
+    def applyPreset(self, preset):
+        self.mode = preset.get('mode', self.mode)
+        self.color = tuple(preset.get('color', self.color))
+        self.endColor = tuple(preset.get('endColor', self.endColor))
+        for side in defaultSideColors:
+            self.sideColors[side] = tuple(preset.get(side, self.sideColors[side]))
+
+    @vsaProfile.profiled(kPluginCmdName)
     def doIt( self, args ):
         ''' Command Execution '''
-
-        # Create an instance of MDagModifier to keep track of the created objects,
-        # and to undo their creation in our undoIt() function
-        self.dagModifier = OpenMaya.MDagModifier()
-        self.createWindow()
+        # Parse the passed arguments
+        self.parseArgs( args )
+
+        # Keep before and after values of every changed plug for undoIt() and redoIt()
+        self.journal = vsaJournal.Journal()
+        if self.showUI:
+            self.createWindow()
+        else:
+            self.applyColor()
+
+    # Change color of all curve shapes under the selection in one undoable batch
+    def applyColor(self):
+        selection = vsaSelection.getActiveSelection()
+        shapePaths, depths, rootIndices = self.getCurveShapes(selection, self.hierarchy)
+        if self.mode == 'depth':
+            colors = computeGradient(depths, self.color, self.endColor, rootIndices)
+        elif self.mode == 'chain':
+            colors = computeGradient(rootIndices, self.color, self.endColor)
+        elif self.mode == 'side':
+            colors = [self.sideColors[getSide(shapePath)] for shapePath in shapePaths]
+        else:
+            colors = [self.color] * len(shapePaths)
+        self.curveColorChanger(shapePaths, colors)
+        self.journal.redo()
+
+    # Resolve selected transforms and curves to their nurbsCurve shapes
+    # With hierarchy, every transform under a selected one is visited too
+    # Returns shape paths with the depth of each below its selected root and the index of that root
+    def getCurveShapes(self, selection, hierarchy=False):
+        shapePaths = []
+        depths = []
+        rootIndices = []
+        visited = set()
+        rootIndex = 0
+        for dagPath, component in vsaSelection.iterSelection(selection):
+            if dagPath is None:
+                # Not a DAG node
+                continue
+
+            transforms = [(dagPath, 0)]
+            if hierarchy and dagPath.hasFn(OpenMaya.MFn.kTransform):
+                dagIterator = OpenMaya.MItDag()
+                dagIterator.reset(dagPath, OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kTransform)
+                dagIterator.next()
+                while not dagIterator.isDone():
+                    transformPath = OpenMaya.MDagPath()
+                    dagIterator.getPath(transformPath)
+                    if transformPath.hasFn(OpenMaya.MFn.kTransform):
+                        transforms.append((transformPath, transformPath.length() - dagPath.length()))
+                    dagIterator.next()
+
+            found = False
+            for transformPath, depth in transforms:
+                candidates = []
+                if transformPath.hasFn(OpenMaya.MFn.kTransform):
+                    for c in range(transformPath.childCount()):
+                        child = transformPath.child(c)
+                        if child.hasFn(OpenMaya.MFn.kNurbsCurve):
+                            childPath = OpenMaya.MDagPath(transformPath)
+                            childPath.push(child)
+                            candidates.append(childPath)
+                elif transformPath.hasFn(OpenMaya.MFn.kNurbsCurve):
+                    candidates.append(transformPath)
+
+                for shapePath in candidates:
+                    fullName = shapePath.fullPathName()
+                    if fullName in visited or OpenMaya.MFnDagNode(shapePath).isIntermediateObject():
+                        continue
+                    visited.add(fullName)
+                    shapePaths.append(shapePath)
+                    depths.append(depth)
+                    rootIndices.append(rootIndex)
+                    found = True
+            if found:
+                rootIndex += 1
+        return shapePaths, depths, rootIndices
 
     # Color changer implement
-    def curveColorChanger(self, object, color):
-        cmds.setAttr(object + '.overrideEnabled', 1)
-        cmds.setAttr(object + '.overrideRGBColors', 1)
-        rgb = ("R", "G", "B")
-        for channel, color in zip(rgb, color): 
-            cmds.setAttr(object + ".overrideColor%s" % channel, color)
+    # Record the override flags and the overrideColorRGB channels of every shape, one color per shape
+    def curveColorChanger(self, shapePaths, colors):
+        for shapePath, color in zip(shapePaths, colors):
+            fnShape = OpenMaya.MFnDagNode(shapePath)
+            self.journal.recordBool(fnShape.findPlug('overrideEnabled', False), True)
+            self.journal.recordBool(fnShape.findPlug('overrideRGBColors', False), True)
+            colorPlug = fnShape.findPlug('overrideColorRGB', False)
+            for channel in range(3):
+                self.journal.record(colorPlug.child(channel), color[channel])
 
     # Window for control
+    # Built once, later calls push the flags given into the open window
     def createWindow(self):
-        self.window = "CCCWindow"
-        self.title = "Curve Color Changer"
-        self.size = (200, 100)
-
-        # close old window is open
-        if cmds.window(self.window, exists=True):
-            cmds.deleteUI(self.window, window=True)
-
-        # create new window
-        self.window = cmds.window(self.window, title=self.title, widthHeight=self.size)
+        values = {'color': self.color, 'endColor': self.endColor, 'mode': self.mode, 'hierarchy': self.hierarchy}
+        vsaWindow.showToolWindow(kWindowName, "Curve Color Changer", (200, 100), self.buildWindow, values,
+                                 self.changedKeys)
 
+    def buildWindow(self, window):
         cmds.columnLayout(adjustableColumn=True)
         
         cmds.separator()
-        self.colorInput = cmds.colorSliderGrp(label='Curve Color: ')
+        window.addControl('color', cmds.colorSliderGrp, cmds.colorSliderGrp(label='Curve Color: '), 'rgb')
+        window.addControl('endColor', cmds.colorSliderGrp, cmds.colorSliderGrp(label='End Color: '), 'rgb')
+        window.addControl('mode', cmds.optionMenuGrp, cmds.optionMenuGrp(label='Mode: '))
+        for mode in kModes:
+            cmds.menuItem(label=mode)
+        window.addControl('hierarchy', cmds.checkBox, cmds.checkBox(label='Hierarchy'))
         cmds.separator(height=20, width=100)
-        self.applyActionBtn = cmds.button(label='Apply', command=self.btnAction)
-
-        # display new window
-        cmds.showWindow()
+        cmds.button(label='Apply', command=self.btnAction)
 
     # Define the action of Special Deselect button
+    @vsaProfile.profiled(kPluginCmdName)
     def btnAction(self, args):
-        color = cmds.colorSliderGrp(self.colorInput, q=True, rgb=True)
-        getSelection = cmds.ls(selection=True)
-        print (getSelection)
-        if len(getSelection) > 0:
-            for item in getSelection:
-                self.curveColorChanger(item, color)
+        values = vsaWindow.getValues(kWindowName)
+        cmds.vsaCurveColorChanger(color=values['color'], endColor=values['endColor'], mode=values['mode'],
+                                  hierarchy=values['hierarchy'])
 
 
     def isUndoable(self):
         ''' Determines whether or not this command is undoable within Maya. '''
-        return True
+        return not self.journal.isEmpty()
 
     def redoIt(self):
         ''' Re-do the work of the command. '''
-        self.dagModifier.doIt()
+        self.journal.redo()
 
     def undoIt(self):
         ''' Undo the work performed by the command. '''
-        self.dagModifier.undoIt()
+        self.journal.undo()
+
+##########################################################
+# Colors, Maya free except for getSide.
+##########################################################
+# Colors blended from start to end by position, the largest position of each group gets end
+def computeGradient(positions, start, end, groups=None):
+    if groups is None:
+        groups = [0] * len(positions)
+    lasts = {}
+    for position, group in zip(positions, groups):
+        lasts[group] = max(lasts.get(group, 0), position)
+    colors = []
+    for position, group in zip(positions, groups):
+        t = float(position) / lasts[group] if lasts[group] > 0 else 0.0
+        colors.append(tuple(start[i] + (end[i] - start[i]) * t for i in range(3)))
+    return colors
+
+# Side of a curve from name tokens like L_hand or hand_R, then from the sign of its world X
+def getSide(shapePath):
+    transformPath = OpenMaya.MDagPath(shapePath)
+    if not transformPath.hasFn(OpenMaya.MFn.kTransform):
+        transformPath.pop()
+    side = getSideFromName(transformPath.partialPathName().split('|')[-1])
+    if side is not None:
+        return side
+    worldX = transformPath.inclusiveMatrix()(3, 0)
+    if worldX > kSideTolerance:
+        return 'left'
+    if worldX < -kSideTolerance:
+        return 'right'
+    return 'center'
+
+def getSideFromName(name):
+    tokens = name.split(':')[-1].lower().split('_')
+    for token in (tokens[0], tokens[-1]):
+        if token in kSideTokens:
+            return kSideTokens[token]
+    return None
+
+# Presets file contents by path, reloaded when the file changes
+presetFiles = {}
+
+# Get a named preset from a JSON presets file
+def loadPreset(path, name):
+    try:
+        modifiedTime = os.path.getmtime(path)
+        cached = presetFiles.get(path)
+        if cached is None or cached[0] != modifiedTime:
+            with open(path) as presetFile:
+                cached = (modifiedTime, json.load(presetFile))
+            presetFiles[path] = cached
+    except (IOError, OSError, ValueError) as e:
+        cmds.error("Can not read color presets " + path + ": " + str(e))
+    if name not in cached[1]:
+        cmds.error("No color preset named " + name + " in " + path + "!")
+    return cached[1][name]
 
 ##########################################################
 # Plug-in initialization.
@@ -81,11 +299,19 @@ def cmdCreator():
     ''' Creates an instance of the command. '''
     return OpenMayaMPx.asMPxPtr(CurveColorChangerCommand())
 
+def syntaxCreator():
+    ''' Defines the argument and flag syntax for this command. '''
+    return vsaRegistry.createSyntax(kPluginCmdName)
+
+def cleanupPlugin():
+    ''' Closes the tool window, its buttons call this module. '''
+    vsaWindow.closeToolWindow(kWindowName)
+
 def initializePlugin(mobject):
     ''' Initializes the plug-in. '''
     mplugin = OpenMayaMPx.MFnPlugin(mobject)
     try:
-        mplugin.registerCommand(kPluginCmdName, cmdCreator)
+        mplugin.registerCommand(kPluginCmdName, cmdCreator, syntaxCreator)
     except:
         sys.stderr.write('Failed to register command: ' + kPluginCmdName)
         raise
@@ -94,6 +320,7 @@ def initializePlugin(mobject):
 def uninitializePlugin(mobject):
     ''' Uninitializes the plug-in. '''
     mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    cleanupPlugin()
     try:
         mplugin.deregisterCommand(kPluginCmdName)
     except:
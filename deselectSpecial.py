@@ -2,19 +2,47 @@ import sys
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaMPx as OpenMayaMPx
 import maya.cmds as cmds
+import vsaJournal
+import vsaProfile
+import vsaProgress
+import vsaRegistry
+import vsaSelection
+import vsaTopology
+import vsaWindow
 
 # Intro: deselect objects/components which All % DeselectPerCom + Delta
 # Plug-in information:
 kPluginCmdName          = 'vsaDeselectSpecial'
 
-# Deselect per component, if dpc = 2 means deselect half, dpc = 3 means deselcect 1/3
+# Deselect per component, if dpc = 2 means deselect half, dpc = 3 means deselcect 1/3, at least 1
 kDeselectPerComFlag     = '-dpc'
 kDeselectPerComLongFlag = '-deselectPerComponent'
 defaultDeselectPerCom   = 2
 # Delta means deselect selected object by index 0,1,2,etc., if d >= dpc, it will be error
+# Can be used many times, -dpc 5 -d 0 -d 2 deselects indices 0 and 2 of every 5
 kDeltaFlag              = '-d'
 kDeltaLongFlag          = '-delta'
 defaultDelta            = 0
+# Pattern of deselection, stride over selection order or one of the mesh topology patterns
+# loop: every dpc-th edge loop, ring: every dpc-th edge ring, checker: faces by steps across edges,
+# path: every dpc-th vertex along a border or edge path
+kModeFlag               = '-m'
+kModeLongFlag           = '-mode'
+kStrideMode             = 'stride'
+kTopologyModes          = {
+    'loop': OpenMaya.MFn.kMeshEdgeComponent,
+    'ring': OpenMaya.MFn.kMeshEdgeComponent,
+    'checker': OpenMaya.MFn.kMeshPolygonComponent,
+    'path': OpenMaya.MFn.kMeshVertComponent,
+}
+defaultMode             = kStrideMode
+# Selected objects or components handled between progress updates and cancel checks
+kChunkSizeFlag          = '-cs'
+kChunkSizeLongFlag      = '-chunkSize'
+# Open the window instead of deselecting directly
+kUIFlag                 = '-ui'
+kUILongFlag             = '-userInterface'
+kWindowName             = 'DSCWindow'
 
 # Special deselect main function
 class DeselectSpecialCommand( OpenMayaMPx.MPxCommand):
@@ -24,94 +52,303 @@ class DeselectSpecialCommand( OpenMayaMPx.MPxCommand):
 
     def parseArgs(self, pArgs):
         # set default arguments
-        global defaultDeselectPerCom
-        self.deselectPerCom = defaultDeselectPerCom
-        global  defaultDelta
-        self.delta = defaultDelta
+        stride = defaultDeselectPerCom
+        deltas = [defaultDelta]
+        mode = defaultMode
+        self.chunkSize = vsaProgress.defaultChunkSize
+        self.showUI = False
+        # Window values given by flags, pushed into an open window
+        self.changedKeys = []
 
         # Obtain the flag value, if the flag is set
         argData = OpenMaya.MArgParser( self.syntax(), pArgs )
         if argData.isFlagSet( kDeselectPerComFlag ):
-            flagValue = argData.flagArgumentInt( kDeselectPerComFlag, 0 )
-            if flagValue > defaultDeselectPerCom:
-                self.deselectPerCom = flagValue
-
+            stride = argData.flagArgumentInt( kDeselectPerComFlag, 0 )
+            self.changedKeys.append('stride')
         if argData.isFlagSet( kDeltaFlag ):
-            flagValue = argData.flagArgumentInt( kDeltaFlag, 0 )
-            # dpc must >= delta + 1
-            if flagValue + 1 > self.deselectPerCom:
-                cmds.error("Delta has to lower than Deselect per component minus 1!")
-            if flagValue > defaultDelta:
-                self.delta = flagValue
-
+            deltas = []
+            for i in range(argData.numberOfFlagUses( kDeltaFlag )):
+                deltaArgs = OpenMaya.MArgList()
+                argData.getFlagArgumentList( kDeltaFlag, i, deltaArgs )
+                deltas.append(deltaArgs.asInt(0))
+            self.changedKeys.append('deltas')
+        if argData.isFlagSet( kModeFlag ):
+            mode = argData.flagArgumentString( kModeFlag, 0 )
+            self.changedKeys.append('mode')
+        if argData.isFlagSet( kChunkSizeFlag ):
+            self.chunkSize = argData.flagArgumentInt( kChunkSizeFlag, 0 )
+            if self.chunkSize < 1:
+                cmds.error("Chunk size must be at least 1!")
+        self.showUI = argData.isFlagSet( kUIFlag )
+
+        # Fail on bad values before the selection is read
+        self.parameters = DeselectParameters(stride, deltas, mode)
+        message = self.parameters.validate()
+        if message:
+            cmds.error(message)
+
+    @vsaProfile.profiled(kPluginCmdName)
     def doIt( self, args ):
         ''' Command Execution '''
         # Parse the passed arguments
         self.parseArgs( args )
-        # Create an instance of MDagModifier to keep track of the created objects,
-        # and to undo their creation in our undoIt() function
-        self.dagModifier = OpenMaya.MDagModifier()
-        self.createWindow()
+        # Selections before and after deselecting, restored by undoIt() and redoIt()
+        self.journal = vsaJournal.Journal()
+        if self.showUI:
+            self.createWindow()
+            return
+        try:
+            if self.parameters.mode in kTopologyModes:
+                self.topologyDeselect()
+            else:
+                self.specialDeselect()
+        except vsaProgress.Cancelled:
+            # The selection is only replaced after the last chunk
+            OpenMaya.MGlobal.displayWarning(kPluginCmdName + ' cancelled, the selection was not changed')
 
     # Special select implement
+    # Streams compact index ranges of the selection and replaces the selection in one call
     def specialDeselect(self):
-        cmds.selectPref(trackSelectionOrder=True)
-        getSelection = cmds.ls(selection=True, flatten=True)
-
-        if len(getSelection) < self.deselectPerCom:
-            cmds.error("the number of components selected must greater than Deselect per component")
-
-        for i in range(len(getSelection)):
-            if i % self.deselectPerCom == self.delta:
-                cmds.select(getSelection[i], deselect=True)
+        previousSelection = vsaSelection.getActiveSelection(ordered=True)
+
+        # Count selected elements without flattening, an object counts as one element
+        # offset keeps the index of each item's first element over the whole selection
+        items = []
+        sizes = []
+        count = 0
+        for dagPath, component in vsaSelection.iterSelection(previousSelection):
+            items.append((dagPath, component, count))
+            if dagPath is not None and vsaSelection.isIndexedComponent(component):
+                sizes.append(OpenMaya.MFnSingleIndexedComponent(component).elementCount())
+            else:
+                sizes.append(1)
+            count += sizes[-1]
+        message = self.parameters.validateCount(count)
+        if message:
+            cmds.error(message)
+
+        # Apply the stride filter in chunks of chunkSize elements, a large component spans several chunks
+        # Kept ranges are streamed straight into one new component per item
+        keptItems = set()
+        elementArrays = {}
+        newComponents = {}
+        def deselectChunk(chunks):
+            for index, start, stop in chunks[0]:
+                dagPath, component, offset = items[index]
+                if dagPath is None or not vsaSelection.isIndexedComponent(component):
+                    if not self.parameters.isDeselected(offset):
+                        keptItems.add(index)
+                    continue
+
+                if index not in newComponents:
+                    fnComponent = OpenMaya.MFnSingleIndexedComponent(component)
+                    elementArrays[index] = OpenMaya.MIntArray()
+                    fnComponent.getElements(elementArrays[index])
+                    fnNewComponent = OpenMaya.MFnSingleIndexedComponent()
+                    newComponents[index] = (fnNewComponent, fnNewComponent.create(fnComponent.componentType()))
+                keptRanges = iterElementKeptRanges(elementArrays[index], start, stop, offset, self.parameters)
+                vsaSelection.addIndexRanges(newComponents[index][0], keptRanges)
+                if stop == sizes[index]:
+                    del elementArrays[index]
+
+        vsaProgress.runChunked('Special deselect', vsaProgress.splitBySize(sizes, self.chunkSize), deselectChunk, 1)
+
+        newSelection = OpenMaya.MSelectionList()
+        for index, (dagPath, component, offset) in enumerate(items):
+            if index in newComponents:
+                fnNewComponent, newComponent = newComponents[index]
+                if fnNewComponent.elementCount() > 0:
+                    newSelection.add(dagPath, newComponent)
+            elif index in keptItems:
+                if dagPath is None:
+                    newSelection.add(component)
+                else:
+                    newSelection.add(dagPath, component)
+        self.journal.recordSelection(previousSelection, newSelection)
+        self.journal.redo()
+
+    # Topology pattern implement
+    # Adjacency is built once per mesh, each selected component is walked once
+    def topologyDeselect(self):
+        previousSelection = vsaSelection.getActiveSelection()
+        componentType = kTopologyModes[self.parameters.mode]
+
+        newSelection = OpenMaya.MSelectionList()
+        matchedItems = []
+        for dagPath, component in vsaSelection.iterSelection(previousSelection):
+            if dagPath is None or component.isNull() or not component.hasFn(componentType):
+                # Other items stay selected
+                if dagPath is None:
+                    newSelection.add(component)
+                else:
+                    newSelection.add(dagPath, component)
+                continue
+            matchedItems.append((dagPath, component))
+
+        if not matchedItems:
+            cmds.error("Mode " + self.parameters.mode + " needs selected mesh " +
+                       {'loop': 'edges', 'ring': 'edges', 'checker': 'faces', 'path': 'vertices'}[self.parameters.mode]
+                       + "!")
+
+        # The pattern of a component is walked at its first chunk, its elements are filtered in chunks
+        # of chunkSize elements
+        sizes = [OpenMaya.MFnSingleIndexedComponent(component).elementCount() for dagPath, component in matchedItems]
+        topologies = {}
+        walks = {}
+        newComponents = {}
+        def deselectChunk(chunks):
+            for index, start, stop in chunks[0]:
+                dagPath, component = matchedItems[index]
+                if index not in newComponents:
+                    meshName = dagPath.fullPathName()
+                    if meshName not in topologies:
+                        topologies[meshName] = vsaTopology.MeshTopology(dagPath)
+                    elementArray = OpenMaya.MIntArray()
+                    OpenMaya.MFnSingleIndexedComponent(component).getElements(elementArray)
+                    elements = sorted(elementArray[i] for i in range(elementArray.length()))
+                    walks[index] = (elements, walkPattern(topologies[meshName], self.parameters.mode, elements))
+                    fnNewComponent = OpenMaya.MFnSingleIndexedComponent()
+                    newComponents[index] = (fnNewComponent, fnNewComponent.create(componentType))
+
+                elements, steps = walks[index]
+                keptRanges = ((element, element) for element in elements[start:stop]
+                              if not self.parameters.isDeselected(steps[element]))
+                vsaSelection.addIndexRanges(newComponents[index][0], keptRanges)
+                if stop == sizes[index]:
+                    del walks[index]
+
+        vsaProgress.runChunked('Special deselect', vsaProgress.splitBySize(sizes, self.chunkSize), deselectChunk, 1)
+        for index, (dagPath, component) in enumerate(matchedItems):
+            fnNewComponent, newComponent = newComponents.get(index, (None, None))
+            if fnNewComponent is not None and fnNewComponent.elementCount() > 0:
+                newSelection.add(dagPath, newComponent)
+        self.journal.recordSelection(previousSelection, newSelection)
+        self.journal.redo()
 
     # Window for control
+    # Built once, later calls push the flags given into the open window
     def createWindow(self):
-        self.window = "DSCWindow"
-        self.title = "Special Deselect"
-        self.size = (400, 200)
-
-        # close old window is open
-        if cmds.window(self.window, exists=True):
-            cmds.deleteUI(self.window, window=True)
+        values = {'stride': self.parameters.stride,
+                  'deltas': ', '.join(str(delta) for delta in sorted(self.parameters.deltas)),
+                  'mode': self.parameters.mode}
+        vsaWindow.showToolWindow(kWindowName, "Special Deselect", (400, 200), self.buildWindow, values,
+                                 self.changedKeys)
 
-        # create new window
-        self.window = cmds.window(self.window, title=self.title, widthHeight=self.size)
+    def buildWindow(self, window):
         cmds.columnLayout(adjustableColumn=True)
         #Controls
-        self.dscIntInput = cmds.intSliderGrp(field=True, label='Deselect per component: ',
-                                        minValue=2, value=self.deselectPerCom)
-
-        global defaultDelta
-        self.deltaIntInput = cmds.intSliderGrp(field=True, label='Delta: ',
-                                        minValue=0, value=self.delta)
-        self.dscActionBtn = cmds.button(label='Special Deselect', command=self.dscAction)
-
-        # display new window
-        cmds.showWindow()
+        window.addControl('stride', cmds.intSliderGrp,
+                          cmds.intSliderGrp(field=True, label='Deselect per component: ', minValue=1))
+        window.addControl('deltas', cmds.textFieldGrp, cmds.textFieldGrp(label='Deltas: '), 'text')
+        window.addControl('mode', cmds.optionMenuGrp, cmds.optionMenuGrp(label='Mode: '))
+        for mode in [kStrideMode] + sorted(kTopologyModes):
+            cmds.menuItem(label=mode)
+        cmds.button(label='Special Deselect', command=self.dscAction)
 
     # Define the action of Special Deselect button
+    @vsaProfile.profiled(kPluginCmdName)
     def dscAction(self, args):
-        dsc = cmds.intSliderGrp(self.dscIntInput, query=True, value=True)
-        delta = cmds.intSliderGrp(self.deltaIntInput, query=True, value=True)
-        self.deselectPerCom = dsc
-        # dpc must >= delta + 1
-        if delta + 1 > self.deselectPerCom:
-            cmds.error("Delta has to lower than Deselect per component minus 1!")
-        self.delta = delta
-        self.specialDeselect()
+        values = vsaWindow.getValues(kWindowName)
+        dsc = values['stride']
+        mode = values['mode']
+        try:
+            deltas = [int(delta) for delta in values['deltas'].replace(',', ' ').split()]
+        except ValueError:
+            cmds.error("Deltas must be whole numbers separated by commas!")
+        parameters = DeselectParameters(dsc, deltas, mode)
+        message = parameters.validate()
+        if message:
+            cmds.error(message)
+        # Run through the command so that the deselection goes to the undo queue
+        cmds.vsaDeselectSpecial(deselectPerComponent=dsc, delta=deltas, mode=mode)
 
     def isUndoable(self):
         ''' Determines whether or not this command is undoable within Maya. '''
-        return True
+        return not self.journal.isEmpty()
 
     def redoIt(self):
         ''' Re-do the work of the command. '''
-        self.dagModifier.doIt()
+        self.journal.redo()
 
     def undoIt(self):
         ''' Undo the work performed by the command. '''
-        self.dagModifier.undoIt()
+        self.journal.undo()
+
+##########################################################
+# Parameters.
+##########################################################
+# Validated stride, deltas and mode of a deselection
+class DeselectParameters(object):
+    def __init__(self, stride=defaultDeselectPerCom, deltas=(defaultDelta,), mode=defaultMode):
+        self.stride = stride
+        self.deltas = frozenset(deltas)
+        self.mode = mode
+
+    # Error message for invalid values, None when they are valid
+    def validate(self):
+        if self.stride < 1:
+            return "Deselect per component must be at least 1!"
+        if not self.deltas:
+            return "At least one delta is needed!"
+        if min(self.deltas) < 0 or max(self.deltas) >= self.stride:
+            return "Delta has to lower than Deselect per component minus 1!"
+        if self.mode != kStrideMode and self.mode not in kTopologyModes:
+            return "Mode must be one of stride, " + ", ".join(sorted(kTopologyModes)) + "!"
+        return None
+
+    # Error message when a stride selection has fewer elements than one stride
+    def validateCount(self, count):
+        if self.mode == kStrideMode and count < self.stride:
+            return "the number of components selected must greater than Deselect per component"
+        return None
+
+    # Whether the element at a position of the stride pattern is deselected
+    def isDeselected(self, position):
+        return position % self.stride in self.deltas
+
+##########################################################
+# Topology patterns.
+##########################################################
+# Steps of each selected element from the start of its part, indexed by element
+def walkPattern(topology, mode, elements):
+    if mode == 'loop':
+        # Edges of one loop share a step, the next parallel loop is one step further
+        return vsaTopology.walkDepths(elements, topology.edgeCount, topology.ringNeighbors, topology.loopNeighbors)
+    if mode == 'ring':
+        return vsaTopology.walkDepths(elements, topology.edgeCount, topology.loopNeighbors, topology.ringNeighbors)
+    if mode == 'checker':
+        return vsaTopology.walkDepths(elements, topology.faceCount, topology.faceNeighbors)
+    return vsaTopology.walkPathOrder(elements, topology.vertexCount, topology.vertexNeighbors)
+
+##########################################################
+# Index ranges.
+##########################################################
+# Yield the index ranges of elements[start:stop] of a component left after the deselection
+# offset is the position of the component's first element
+def iterElementKeptRanges(elements, start, stop, offset, parameters):
+    offset += start
+    for first, last in vsaSelection.iterArrayRanges(elements, start, stop):
+        for keptRange in iterKeptRanges(first, last, offset, parameters.stride, parameters.deltas):
+            yield keptRange
+        offset += last - first + 1
+
+# Yield the ranges left of first..last, the position of first is given
+# Indices whose position % stride is one of deltas are removed
+def iterKeptRanges(first, last, position, stride, deltas):
+    starts = sorted((delta - position) % stride for delta in deltas)
+    keptFirst = first
+    blockFirst = first
+    while blockFirst <= last:
+        for start in starts:
+            removed = blockFirst + start
+            if removed > last:
+                break
+            if keptFirst < removed:
+                yield keptFirst, removed - 1
+            keptFirst = removed + 1
+        blockFirst += stride
+    if keptFirst <= last:
+        yield keptFirst, last
 
 ##########################################################
 # Plug-in initialization.
@@ -122,10 +359,11 @@ def cmdCreator():
 
 def syntaxCreator():
     ''' Defines the argument and flag syntax for this command. '''
-    syntax = OpenMaya.MSyntax()
-    syntax.addFlag(kDeselectPerComFlag, kDeselectPerComLongFlag, OpenMaya.MSyntax.kDouble)
-    syntax.addFlag(kDeltaFlag, kDeltaLongFlag, OpenMaya.MSyntax.kDouble)
-    return syntax
+    return vsaRegistry.createSyntax(kPluginCmdName)
+
+def cleanupPlugin():
+    ''' Closes the tool window, its buttons call this module. '''
+    vsaWindow.closeToolWindow(kWindowName)
 
 def initializePlugin(mobject):
     ''' Initializes the plug-in. '''
@@ -139,6 +377,7 @@ def initializePlugin(mobject):
 def uninitializePlugin(mobject):
     ''' Uninitializes the plug-in. '''
     mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    cleanupPlugin()
     try:
         mplugin.deregisterCommand(kPluginCmdName)
     except:
@@ -0,0 +1,198 @@
+import sys
+import json
+import timeit
+import maya.OpenMaya as OpenMaya
+import maya.OpenMayaMPx as OpenMayaMPx
+import maya.cmds as cmds
+import tailRigging
+import vsaProfile
+import vsaRegistry
+
+# Intro: Per frame evaluation cost of the scene and of each vsaTailRigging rig
+# Steps through a frame range once per evaluation manager mode, timing every frame, while Maya's profiler
+# records evaluation events. Events of rig nodes are summed per rig, so rig modes can be compared on
+# animated characters. Rigs without animation in the range are not evaluated and cost nothing
+# Plug-in information:
+kPluginCmdName = 'vsaEvaluationProfile'
+
+# Frame range, the playback range by default
+kStartFlag              = '-st'
+kStartLongFlag          = '-start'
+kEndFlag                = '-et'
+kEndLongFlag            = '-end'
+# Evaluation manager modes to compare, off (DG), serial or parallel, can be used multiple times
+# The current mode by default
+kEvaluationModeFlag     = '-em'
+kEvaluationModeLongFlag = '-evaluationMode'
+kEvaluationModes        = ('off', 'serial', 'parallel')
+# Write the measured frames and rigs to a JSON file
+kJsonFlag               = '-j'
+kJsonLongFlag           = '-json'
+
+# Profile evaluation, print and return the report
+class EvaluationProfileCommand( OpenMayaMPx.MPxCommand ):
+    def __init__(self):
+        ''' Constructor '''
+        OpenMayaMPx.MPxCommand.__init__(self)
+
+    @vsaProfile.profiled(kPluginCmdName)
+    def doIt( self, args ):
+        ''' Command Execution '''
+        argData = OpenMaya.MArgParser( self.syntax(), args )
+        start = cmds.playbackOptions(query=True, minTime=True)
+        end = cmds.playbackOptions(query=True, maxTime=True)
+        if argData.isFlagSet( kStartFlag ):
+            start = argData.flagArgumentDouble( kStartFlag, 0 )
+        if argData.isFlagSet( kEndFlag ):
+            end = argData.flagArgumentDouble( kEndFlag, 0 )
+        if end < start:
+            cmds.error("End frame must not be before the start frame!")
+        modes = []
+        for i in range(argData.numberOfFlagUses( kEvaluationModeFlag )):
+            modeArgs = OpenMaya.MArgList()
+            argData.getFlagArgumentList( kEvaluationModeFlag, i, modeArgs )
+            modes.append(modeArgs.asString(0))
+            if modes[-1] not in kEvaluationModes:
+                cmds.error("Evaluation mode must be one of " + ", ".join(kEvaluationModes) + "!")
+
+        results = profileEvaluation(start, end, modes or None)
+        if argData.isFlagSet( kJsonFlag ):
+            with open(argData.flagArgumentString( kJsonFlag, 0 ), 'w') as jsonFile:
+                json.dump(results, jsonFile, indent=2)
+
+        report = evaluationReport(results)
+        sys.stdout.write(report + '\n')
+        self.setResult(report)
+
+##########################################################
+# Measuring.
+##########################################################
+# Step through start to end once per evaluation manager mode, the current mode when modes is None
+# Returns {'start', 'end', 'modes': [{'mode', 'frameTimes', 'rigs': {rig: {'nodes', 'events', 'time'}}}]}
+# Times are in seconds. The evaluation mode, the current frame and profiler sampling are restored after
+def profileEvaluation(start, end, modes=None):
+    currentMode = cmds.evaluationManager(query=True, mode=True)[0]
+    currentFrame = cmds.currentTime(query=True)
+    frames = [start + i for i in range(int(end - start) + 1)]
+    rigByNode = getRigNodes()
+
+    results = {'start': start, 'end': end, 'modes': []}
+    try:
+        for mode in modes or [currentMode]:
+            cmds.evaluationManager(mode=mode)
+            # Let the evaluation manager build its graph before timing
+            cmds.currentTime(frames[0], update=True)
+            cmds.profiler(reset=True)
+            cmds.profiler(sampling=True)
+            frameTimes = []
+            try:
+                for frame in frames:
+                    startTime = timeit.default_timer()
+                    cmds.currentTime(frame, update=True)
+                    frameTimes.append(timeit.default_timer() - startTime)
+            finally:
+                cmds.profiler(sampling=False)
+            results['modes'].append({'mode': mode, 'frameTimes': frameTimes, 'rigs': readRigEvents(rigByNode)})
+    finally:
+        cmds.evaluationManager(mode=currentMode)
+        cmds.currentTime(currentFrame, update=True)
+    return results
+
+# Rig (IK handle) of every node a vsaTailRigging rig is made of, by short name
+def getRigNodes():
+    rigByNode = {}
+    for ikHandle, metadata in tailRigging.findRigs().values():
+        nodes = [ikHandle, metadata['curve'], metadata['rebuild'], metadata.get('driver')]
+        for cluster, clusterHandle in metadata['clusters']:
+            nodes.extend([cluster, clusterHandle])
+            if cmds.objExists(clusterHandle):
+                nodes.extend(cmds.listRelatives(clusterHandle, type='parentConstraint') or [])
+        for ctrller, circle in metadata['ctrllers']:
+            nodes.extend([ctrller, circle])
+        for node in nodes:
+            if node:
+                rigByNode[node.split('|')[-1]] = ikHandle
+    return rigByNode
+
+# Sum the recorded profiler events of rig nodes per rig, events name their node or describe it
+def readRigEvents(rigByNode):
+    rigs = {}
+    for ikHandle in set(rigByNode.values()):
+        rigs[ikHandle] = {'nodes': 0, 'events': 0, 'time': 0.0}
+    for node, ikHandle in rigByNode.items():
+        rigs[ikHandle]['nodes'] += 1
+    for i in range(cmds.profiler(query=True, eventCount=True)):
+        ikHandle = rigByNode.get(cmds.profiler(query=True, eventIndex=i, eventName=True))
+        if ikHandle is None:
+            ikHandle = rigByNode.get(cmds.profiler(query=True, eventIndex=i, eventDescription=True))
+        if ikHandle is not None:
+            rigs[ikHandle]['events'] += 1
+            # Durations are in microseconds
+            rigs[ikHandle]['time'] += cmds.profiler(query=True, eventIndex=i, eventDuration=True) * 1e-6
+    return rigs
+
+# Text table of frame times per mode, then of rig evaluation time per rig and mode
+def evaluationReport(results):
+    lines = ['vsaEvaluationProfile frames %g to %g' % (results['start'], results['end']),
+             '  %-10s %6s %10s %10s %10s' % ('mode', 'frames', 'mean ms', 'max ms', 'fps')]
+    for modeResult in results['modes']:
+        frameTimes = modeResult['frameTimes']
+        meanTime = sum(frameTimes) / len(frameTimes)
+        lines.append('  %-10s %6d %10.3f %10.3f %10.1f' % (
+            modeResult['mode'], len(frameTimes), meanTime * 1000.0, max(frameTimes) * 1000.0,
+            1.0 / meanTime if meanTime > 0.0 else 0.0))
+
+    lines.append('  %-24s %-10s %6s %8s %12s' % ('rig', 'mode', 'nodes', 'events', 'ms/frame'))
+    for modeResult in results['modes']:
+        frameCount = len(modeResult['frameTimes'])
+        for ikHandle, rig in sorted(modeResult['rigs'].items()):
+            lines.append('  %-24s %-10s %6d %8d %12.3f' % (
+                ikHandle, modeResult['mode'], rig['nodes'], rig['events'], rig['time'] * 1000.0 / frameCount))
+    return '\n'.join(lines)
+
+##########################################################
+# Plug-in initialization.
+##########################################################
+def cmdCreator():
+    ''' Creates an instance of the command. '''
+    return OpenMayaMPx.asMPxPtr(EvaluationProfileCommand())
+
+def syntaxCreator():
+    ''' Defines the argument and flag syntax for this command. '''
+    return vsaRegistry.createSyntax(kPluginCmdName)
+
+def initializePlugin(mobject):
+    ''' Initializes the plug-in. '''
+    mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    try:
+        mplugin.registerCommand(kPluginCmdName, cmdCreator, syntaxCreator)
+    except:
+        sys.stderr.write('Failed to register command: ' + kPluginCmdName)
+        raise
+
+def uninitializePlugin(mobject):
+    ''' Uninitializes the plug-in. '''
+    mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    try:
+        mplugin.deregisterCommand(kPluginCmdName)
+    except:
+        sys.stderr.write('Failed to unregister command: ' + kPluginCmdName)
+        raise
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
@@ -2,38 +2,207 @@ import sys
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaMPx as OpenMayaMPx
 import maya.cmds as cmds
+import vsaJournal
+import vsaPlan
+import vsaProfile
+import vsaProgress
+import vsaRegistry
+import vsaSelection
+
+# NumPy is optional, a pure Python path gives the same results without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Intro: Move selected Objects to World Center (0, 0, 0) by pivot translation
 # Plug-in information:
 kPluginCmdName = 'vsaMoveToWorldCenter'
 
+# World axes to move along, e.g. "xz" keeps objects on their ground height
+kAxisFlag               = '-ax'
+kAxisLongFlag           = '-axis'
+defaultAxis             = 'xyz'
+# Objects handled between progress updates and cancel checks
+kChunkSizeFlag          = '-cs'
+kChunkSizeLongFlag      = '-chunkSize'
+# Return the new translations as a float array, x y z per object, without moving anything
+kPlanFlag               = '-pl'
+kPlanLongFlag           = '-plan'
+# Write the plan to a JSON file instead, returns the number of objects
+kPlanFileFlag           = '-plf'
+kPlanLongFileFlag       = '-planFile'
+
 # Special deselect main function
 class MoveToWorldCenterCommand( OpenMayaMPx.MPxCommand):
     def __init__(self):
         ''' Constructor '''
         OpenMayaMPx.MPxCommand.__init__(self)
 
+    def parseArgs(self, pArgs):
+        # set default arguments
+        self.axisMask = parseAxisMask(defaultAxis)
+        self.chunkSize = vsaProgress.defaultChunkSize
+        self.planFile = None
+
+        # Obtain the flag value, if the flag is set
+        argData = OpenMaya.MArgParser( self.syntax(), pArgs )
+        if argData.isFlagSet( kAxisFlag ):
+            flagValue = argData.flagArgumentString( kAxisFlag, 0 )
+            if not flagValue or flagValue.strip('xyzXYZ'):
+                cmds.error("Axis must be a combination of x, y and z!")
+            self.axisMask = parseAxisMask(flagValue)
+        if argData.isFlagSet( kChunkSizeFlag ):
+            self.chunkSize = argData.flagArgumentInt( kChunkSizeFlag, 0 )
+            if self.chunkSize < 1:
+                cmds.error("Chunk size must be at least 1!")
+        if argData.isFlagSet( kPlanFileFlag ):
+            self.planFile = argData.flagArgumentString( kPlanFileFlag, 0 )
+        self.plan = argData.isFlagSet( kPlanFlag ) or self.planFile is not None
+
+    @vsaProfile.profiled(kPluginCmdName)
     def doIt( self, args ):
         ''' Command Execution '''
-        self.dagModifier = OpenMaya.MDagModifier()
+        # Parse the passed arguments
+        self.parseArgs( args )
+        # Keep before and after values of every changed plug for undoIt() and redoIt()
+        self.journal = vsaJournal.Journal()
 
         # Implement
-        getSelection = cmds.ls(selection=True, flatten=True)
-        for item in getSelection:
-            pivP = cmds.xform(item,q=True, piv=True, ws=True)
-            cmds.xform(item, t=(pivP[0] * -1, pivP[1] * -1,pivP[2] * -1), r=True)
+        selection = vsaSelection.getActiveSelection()
+        transformPaths = list(vsaSelection.iterTransformPaths(selection))
+        # Parents before children, each selected object only moves by what its moved ancestors did not
+        fullNames = [dagPath.fullPathName() for dagPath in transformPaths]
+        order = sorted(range(len(fullNames)), key=lambda i: fullNames[i].count('|'))
+        transformPaths = [transformPaths[i] for i in order]
+        fullNames = [fullNames[i] for i in order]
+        ancestors = findSelectedAncestors(fullNames)
+
+        # Snapshot of every world pivot and parent matrix before moving anything
+        pivots = []
+        parentInverses = []
+        translates = []
+        def readChunk(chunkPaths):
+            for dagPath in chunkPaths:
+                fnTransform = OpenMaya.MFnTransform(dagPath)
+                pivot = fnTransform.rotatePivot(OpenMaya.MSpace.kWorld)
+                pivots.extend((pivot.x, pivot.y, pivot.z))
+                parentInverse = dagPath.exclusiveMatrixInverse()
+                for row in range(3):
+                    for column in range(3):
+                        parentInverses.append(parentInverse(row, column))
+                translate = fnTransform.translation(OpenMaya.MSpace.kTransform)
+                translates.extend((translate.x, translate.y, translate.z))
+
+        # Write translations back chunk by chunk through the journal
+        def moveChunk(chunk):
+            start = self.journal.length()
+            for dagPath, newTranslate in chunk:
+                fnTransform = OpenMaya.MFnTransform(dagPath)
+                for i, axis in enumerate(('X', 'Y', 'Z')):
+                    plug = fnTransform.findPlug('translate' + axis, False)
+                    self.journal.record(plug, float(newTranslate[i]))
+            self.journal.redo(start)
+
+        try:
+            vsaProgress.runChunked('Reading transforms', transformPaths, readChunk, self.chunkSize)
+            newTranslates = computeTranslations(relativePivots(pivots, ancestors), parentInverses, translates,
+                                                self.axisMask)
+            if self.plan:
+                plan = vsaPlan.Plan(kPluginCmdName, ('translateX', 'translateY', 'translateZ'))
+                for fullName, newTranslate in zip(fullNames, newTranslates):
+                    plan.addRow(fullName, newTranslate)
+                vsaPlan.setPlanResult(self, plan, self.planFile)
+                return
+            vsaProgress.runChunked('Moving to world center', list(zip(transformPaths, newTranslates)), moveChunk,
+                                   self.chunkSize)
+        except vsaProgress.Cancelled:
+            # Roll back moved chunks
+            self.journal.undo()
+            self.journal = vsaJournal.Journal()
+            OpenMaya.MGlobal.displayWarning(kPluginCmdName + ' cancelled, nothing was moved')
 
     def isUndoable(self):
         ''' Determines whether or not this command is undoable within Maya. '''
-        return True
+        return not self.journal.isEmpty()
 
     def redoIt(self):
         ''' Re-do the work of the command. '''
-        self.dagModifier.doIt()
+        self.journal.redo()
 
     def undoIt(self):
         ''' Undo the work performed by the command. '''
-        self.dagModifier.undoIt()
+        self.journal.undo()
+
+##########################################################
+# Translation math, Maya free.
+##########################################################
+# Index of the nearest selected ancestor of every full path name, -1 for none
+def findSelectedAncestors(fullNames):
+    indices = dict((fullName, i) for i, fullName in enumerate(fullNames))
+    ancestors = []
+    for fullName in fullNames:
+        ancestor = -1
+        parentName = fullName.rsplit('|', 1)[0]
+        while parentName:
+            ancestor = indices.get(parentName, -1)
+            if ancestor >= 0:
+                break
+            parentName = parentName.rsplit('|', 1)[0]
+        ancestors.append(ancestor)
+    return ancestors
+
+# Pivots relative to the pivot of their nearest selected ancestor
+# An ancestor moving its pivot to the world center already carries its children along by its own pivot
+def relativePivots(pivots, ancestors):
+    if numpy is not None:
+        pivots = numpy.asarray(pivots, dtype=numpy.float64).reshape(-1, 3)
+        ancestors = numpy.asarray(ancestors, dtype=numpy.int64)
+        hasAncestor = ancestors >= 0
+        relative = pivots.copy()
+        relative[hasAncestor] -= pivots[ancestors[hasAncestor]]
+        return relative.reshape(-1)
+    relative = list(pivots)
+    for i, ancestor in enumerate(ancestors):
+        if ancestor >= 0:
+            for axis in range(3):
+                relative[i * 3 + axis] -= pivots[ancestor * 3 + axis]
+    return relative
+
+# Convert an axis string such as "xz" to a multiplier per world axis
+def parseAxisMask(axis):
+    axis = axis.lower()
+    return tuple(1.0 if name in axis else 0.0 for name in 'xyz')
+
+# Compute new local translations which move world pivots to the world center
+# pivots and translates are flat x, y, z lists, parentInverses are flat row-major 3x3 lists
+# Returns one x, y, z triple per object
+def computeTranslations(pivots, parentInverses, translates, axisMask=(1.0, 1.0, 1.0)):
+    if numpy is not None:
+        return computeTranslationsNumpy(pivots, parentInverses, translates, axisMask)
+    return computeTranslationsPython(pivots, parentInverses, translates, axisMask)
+
+def computeTranslationsNumpy(pivots, parentInverses, translates, axisMask=(1.0, 1.0, 1.0)):
+    pivots = numpy.asarray(pivots, dtype=numpy.float64).reshape(-1, 3)
+    parentInverses = numpy.asarray(parentInverses, dtype=numpy.float64).reshape(-1, 3, 3)
+    translates = numpy.asarray(translates, dtype=numpy.float64).reshape(-1, 3)
+
+    # Negate and mask all pivots at once, then bring offsets to parent space
+    offsets = pivots * -numpy.asarray(axisMask, dtype=numpy.float64)
+    return translates + numpy.einsum('ni,nij->nj', offsets, parentInverses)
+
+def computeTranslationsPython(pivots, parentInverses, translates, axisMask=(1.0, 1.0, 1.0)):
+    maskX, maskY, maskZ = axisMask
+    result = []
+    for i in range(len(pivots) // 3):
+        offsetX = -pivots[i * 3] * maskX
+        offsetY = -pivots[i * 3 + 1] * maskY
+        offsetZ = -pivots[i * 3 + 2] * maskZ
+        m = parentInverses[i * 9:i * 9 + 9]
+        result.append((translates[i * 3] + offsetX * m[0] + offsetY * m[3] + offsetZ * m[6],
+                       translates[i * 3 + 1] + offsetX * m[1] + offsetY * m[4] + offsetZ * m[7],
+                       translates[i * 3 + 2] + offsetX * m[2] + offsetY * m[5] + offsetZ * m[8]))
+    return result
 
 ##########################################################
 # Plug-in initialization.
@@ -42,12 +211,15 @@ def cmdCreator():
     ''' Creates an instance of the command. '''
     return OpenMayaMPx.asMPxPtr(MoveToWorldCenterCommand())
 
+def syntaxCreator():
+    ''' Defines the argument and flag syntax for this command. '''
+    return vsaRegistry.createSyntax(kPluginCmdName)
 
 def initializePlugin(mobject):
     ''' Initializes the plug-in. '''
     mplugin = OpenMayaMPx.MFnPlugin(mobject)
     try:
-        mplugin.registerCommand(kPluginCmdName, cmdCreator)
+        mplugin.registerCommand(kPluginCmdName, cmdCreator, syntaxCreator)
     except:
         sys.stderr.write('Failed to register command: ' + kPluginCmdName)
         raise
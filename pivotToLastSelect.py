@@ -1,52 +1,275 @@
 import sys
+import collections
+import ctypes
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaMPx as OpenMayaMPx
 import maya.cmds as cmds
+import vsaJournal
+import vsaPlan
+import vsaProfile
+import vsaRegistry
+import vsaSelection
+import vsaTransform
+
+# NumPy is optional, a pure Python path gives the same results without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Intro: Move Pivots to object center selected last
 # Plug-in information:
 kPluginCmdName = 'vsaPivotToLastSelect'
 
+# Return [hits, misses, cached centers] of the center cache instead of moving pivots
+kCacheInfoFlag          = '-ci'
+kCacheInfoLongFlag      = '-cacheInfo'
+# Drop all cached centers
+kClearCacheFlag         = '-cc'
+kClearCacheLongFlag     = '-clearCache'
+# Snap to the average of selected component positions instead of their bounding box center
+kCentroidFlag           = '-cen'
+kCentroidLongFlag       = '-centroid'
+# Return the new pivots as a float array without changing anything, per object x y z of
+# rotatePivot, scalePivot, rotatePivotTranslate and scalePivotTranslate
+kPlanFlag               = '-pl'
+kPlanLongFlag           = '-plan'
+# Write the plan to a JSON file instead, returns the number of objects
+kPlanFileFlag           = '-plf'
+kPlanLongFileFlag       = '-planFile'
+# Number of object centers kept between calls
+kCenterCacheSize        = 64
+# Pivot plugs do not move the geometry, changing them keeps cached centers
+kPivotPlugNames         = set(name + axis for name in ('rp', 'sp', 'rpt', 'spt') for axis in ('', 'x', 'y', 'z'))
+
+# World bounding box centers of objects keyed by DAG path
+# An entry is dropped when a plug of the object, its parents or its children gets dirty
+class CenterCache(object):
+    def __init__(self, capacity=kCenterCacheSize):
+        self.capacity = capacity
+        # Full path name: (center, callback ids), least recently used first
+        self.entries = collections.OrderedDict()
+        # Callbacks of dropped entries, removed outside of the callback that dropped them
+        self.staleCallbacks = []
+        self.hits = 0
+        self.misses = 0
+        # Above 0 while this command writes pivots, which also dirty matrices but never move geometry
+        self.suspended = 0
+
+    # Get the world bounding box center of a DAG path, same as objectCenter -gl
+    def center(self, dagPath):
+        self.removeStaleCallbacks()
+        key = dagPath.fullPathName()
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.hits += 1
+            self.entries[key] = entry
+            return entry[0]
+
+        self.misses += 1
+        center = cmds.objectCenter(key, gl=True)
+        self.entries[key] = (center, self.watch(dagPath, key))
+        while len(self.entries) > self.capacity:
+            self.invalidate(next(iter(self.entries)))
+        self.removeStaleCallbacks()
+        return center
+
+    # Register callbacks dropping the entry when the object, its parents or its children change
+    def watch(self, dagPath, key):
+        def onDirty(node, plug, *args):
+            if self.suspended == 0 and plug.partialName() not in kPivotPlugNames:
+                self.invalidate(key)
+
+        def onRemoval(*args):
+            self.invalidate(key)
+
+        nodes = []
+        parentPath = OpenMaya.MDagPath(dagPath)
+        while parentPath.length() > 0:
+            nodes.append(parentPath.node())
+            parentPath.pop()
+        dagIterator = OpenMaya.MItDag()
+        dagIterator.reset(dagPath, OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kInvalid)
+        dagIterator.next()
+        while not dagIterator.isDone():
+            nodes.append(dagIterator.currentItem())
+            dagIterator.next()
+
+        callbackIds = [OpenMaya.MNodeMessage.addNodeDirtyPlugCallback(node, onDirty) for node in nodes]
+        callbackIds.append(OpenMaya.MNodeMessage.addNodePreRemovalCallback(dagPath.node(), onRemoval))
+        return callbackIds
+
+    # Run function without dropping entries, for pivot writes only
+    def runSuspended(self, function):
+        self.suspended += 1
+        try:
+            function()
+        finally:
+            self.suspended -= 1
+
+    # Drop the entry of a full path name
+    def invalidate(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.staleCallbacks.extend(entry[1])
+
+    def removeStaleCallbacks(self):
+        for callbackId in self.staleCallbacks:
+            OpenMaya.MMessage.removeCallback(callbackId)
+        self.staleCallbacks = []
+
+    def clear(self):
+        for key in list(self.entries):
+            self.invalidate(key)
+        self.removeStaleCallbacks()
+
+centerCache = CenterCache()
+
 # Special deselect main function
 class PivotToLastSelectCommand( OpenMayaMPx.MPxCommand):
     def __init__(self):
         ''' Constructor '''
         OpenMayaMPx.MPxCommand.__init__(self)
 
+    @vsaProfile.profiled(kPluginCmdName)
     def doIt( self, args ):
         ''' Command Execution '''
 
-        # Create an instance of MDagModifier to keep track of the created objects,
-        # and to undo their creation in our undoIt() function
-        self.dagModifier = OpenMaya.MDagModifier()
-
-        # Implement
-        cmds.selectPref(trackSelectionOrder=True)
-        getSelection = cmds.ls(selection=True, flatten=True)
+        # Keep before and after values of every changed plug for undoIt() and redoIt()
+        self.journal = vsaJournal.Journal()
 
+        argData = OpenMaya.MArgParser( self.syntax(), args )
+        if argData.isFlagSet( kClearCacheFlag ):
+            centerCache.clear()
+            return
+        if argData.isFlagSet( kCacheInfoFlag ):
+            cacheInfo = OpenMaya.MIntArray()
+            for value in (centerCache.hits, centerCache.misses, len(centerCache.entries)):
+                cacheInfo.append(value)
+            self.setResult(cacheInfo)
+            return
 
-        lastObejct = getSelection[len(getSelection) - 1]
-        # Get type for transform
-        lastType = cmds.objectType(lastObejct)
-
-        if lastType == "transform":
-            center = cmds.objectCenter(lastObejct, gl=True)
-            for obj in getSelection:
-                cmds.xform(obj, pivots=center, ws=True)
+        # Implement
+        selection = vsaSelection.getActiveSelection(ordered=True)
+        if selection.length() == 0:
+            return
+
+        lastObejct = OpenMaya.MDagPath()
+        lastComponent = OpenMaya.MObject()
+        try:
+            selection.getDagPath(selection.length() - 1, lastObejct, lastComponent)
+        except RuntimeError:
+            return
+
+        if not lastComponent.isNull():
+            # Vertices, edges or faces of a mesh selected last
+            if not lastComponent.hasFn(OpenMaya.MFn.kMeshVertComponent) \
+                    and not lastComponent.hasFn(OpenMaya.MFn.kMeshEdgeComponent) \
+                    and not lastComponent.hasFn(OpenMaya.MFn.kMeshPolygonComponent):
+                cmds.error("Last selected components must be mesh vertices, edges or faces!")
+            if lastObejct.hasFn(OpenMaya.MFn.kTransform):
+                lastObejct.extendToShape()
+            coordinates = getComponentPointCoordinates(lastObejct, lastComponent)
+            if len(coordinates) == 0:
+                return
+            if argData.isFlagSet( kCentroidFlag ):
+                center = computeCentroid(coordinates)
+            else:
+                center = computeBoundingBoxCenter(coordinates)
+        elif OpenMaya.MFnDependencyNode(lastObejct.node()).typeName() == "transform":
+            center = centerCache.center(lastObejct)
         else:
-            pass
+            return
+
+        # Only the other selected objects get the new pivot, not the object or mesh selected last
+        selection.remove(selection.length() - 1)
+        transformPaths = vsaSelection.iterTransformPaths(selection)
+        worldPoint = OpenMaya.MPoint(center[0], center[1], center[2])
+        if argData.isFlagSet( kPlanFlag ) or argData.isFlagSet( kPlanFileFlag ):
+            planFile = argData.flagArgumentString( kPlanFileFlag, 0 ) if argData.isFlagSet( kPlanFileFlag ) else None
+            vsaPlan.setPlanResult(self, vsaTransform.planPivots(kPluginCmdName, transformPaths, worldPoint), planFile)
+            return
+        vsaTransform.recordPivots(self.journal, transformPaths, worldPoint)
+        centerCache.runSuspended(self.journal.redo)
 
     def isUndoable(self):
         ''' Determines whether or not this command is undoable within Maya. '''
-        return True
+        return not self.journal.isEmpty()
 
     def redoIt(self):
         ''' Re-do the work of the command. '''
-        self.dagModifier.doIt()
+        centerCache.runSuspended(self.journal.redo)
 
     def undoIt(self):
         ''' Undo the work performed by the command. '''
-        self.dagModifier.undoIt()
+        centerCache.runSuspended(self.journal.undo)
+
+##########################################################
+# Component centers.
+##########################################################
+# World positions of the vertices used by a mesh component, only the selected faces and edges are walked
+# With NumPy an N x 3 array gathered from the mesh's point buffer with one index array,
+# else a flat x, y, z list from one getPoints call
+def getComponentPointCoordinates(meshPath, component):
+    vertexIds = getComponentVertices(meshPath, component)
+    fnMesh = OpenMaya.MFnMesh(meshPath)
+    if numpy is not None:
+        points = readRawPoints(fnMesh)[numpy.asarray(vertexIds, dtype=numpy.int64)].astype(numpy.float64)
+        matrix = meshPath.inclusiveMatrix()
+        matrix = numpy.array([[matrix(row, column) for column in range(3)] for row in range(4)])
+        return points.dot(matrix[:3]) + matrix[3]
+
+    points = OpenMaya.MPointArray()
+    fnMesh.getPoints(points, OpenMaya.MSpace.kWorld)
+    coordinates = []
+    for vertexId in vertexIds:
+        point = points[vertexId]
+        coordinates.extend((point.x, point.y, point.z))
+    return coordinates
+
+# Object space points of a mesh as an N x 3 float32 array viewing Maya's own buffer
+# Only valid until the mesh changes, index it to get a copy
+def readRawPoints(fnMesh):
+    count = fnMesh.numVertices() * 3
+    buffer = (ctypes.c_float * count).from_address(int(fnMesh.getRawPoints()))
+    return numpy.frombuffer(buffer, dtype=numpy.float32, count=count).reshape(-1, 3)
+
+# Unique vertex indices of a vertex, edge or face component
+def getComponentVertices(meshPath, component):
+    if component.hasFn(OpenMaya.MFn.kMeshVertComponent):
+        elements = OpenMaya.MIntArray()
+        OpenMaya.MFnSingleIndexedComponent(component).getElements(elements)
+        return sorted(set(elements))
+
+    vertexIds = set()
+    if component.hasFn(OpenMaya.MFn.kMeshPolygonComponent):
+        faceIterator = OpenMaya.MItMeshPolygon(meshPath, component)
+        faceVertices = OpenMaya.MIntArray()
+        while not faceIterator.isDone():
+            faceIterator.getVertices(faceVertices)
+            vertexIds.update(faceVertices[i] for i in range(faceVertices.length()))
+            faceIterator.next()
+    else:
+        edgeIterator = OpenMaya.MItMeshEdge(meshPath, component)
+        while not edgeIterator.isDone():
+            vertexIds.add(edgeIterator.index(0))
+            vertexIds.add(edgeIterator.index(1))
+            edgeIterator.next()
+    return sorted(vertexIds)
+
+# Center of the bounding box of flat x, y, z coordinates, same as objectCenter -gl
+def computeBoundingBoxCenter(coordinates):
+    if numpy is not None:
+        points = numpy.asarray(coordinates, dtype=numpy.float64).reshape(-1, 3)
+        return tuple((points.min(axis=0) + points.max(axis=0)) * 0.5)
+    return tuple((min(coordinates[axis::3]) + max(coordinates[axis::3])) * 0.5 for axis in range(3))
+
+# Average of flat x, y, z coordinates
+def computeCentroid(coordinates):
+    if numpy is not None:
+        return tuple(numpy.asarray(coordinates, dtype=numpy.float64).reshape(-1, 3).mean(axis=0))
+    count = len(coordinates) // 3
+    return tuple(sum(coordinates[axis::3]) / count for axis in range(3))
 
 ##########################################################
 # Plug-in initialization.
@@ -55,11 +278,19 @@ def cmdCreator():
     ''' Creates an instance of the command. '''
     return OpenMayaMPx.asMPxPtr(PivotToLastSelectCommand())
 
+def syntaxCreator():
+    ''' Defines the argument and flag syntax for this command. '''
+    return vsaRegistry.createSyntax(kPluginCmdName)
+
+def cleanupPlugin():
+    ''' Removes callbacks of cached centers. '''
+    centerCache.clear()
+
 def initializePlugin(mobject):
     ''' Initializes the plug-in. '''
     mplugin = OpenMayaMPx.MFnPlugin(mobject)
     try:
-        mplugin.registerCommand(kPluginCmdName, cmdCreator)
+        mplugin.registerCommand(kPluginCmdName, cmdCreator, syntaxCreator)
     except:
         sys.stderr.write('Failed to register command: ' + kPluginCmdName)
         raise
@@ -67,6 +298,7 @@ def initializePlugin(mobject):
 def uninitializePlugin(mobject):
     ''' Uninitializes the plug-in. '''
     mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    cleanupPlugin()
     try:
         mplugin.deregisterCommand(kPluginCmdName)
     except:
@@ -2,37 +2,81 @@ import sys
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaMPx as OpenMayaMPx
 import maya.cmds as cmds
+import vsaJournal
+import vsaPlan
+import vsaProfile
+import vsaProgress
+import vsaRegistry
+import vsaSelection
+import vsaTransform
 
 # Intro: Move selected Objects' pivots to World Center (0, 0, 0)
 # Plug-in information:
 kPluginCmdName = 'vsaPivotToWorldCenter'
 
+# Objects handled between progress updates and cancel checks
+kChunkSizeFlag          = '-cs'
+kChunkSizeLongFlag      = '-chunkSize'
+# Return the new pivots as a float array without changing anything, per object x y z of
+# rotatePivot, scalePivot, rotatePivotTranslate and scalePivotTranslate
+kPlanFlag               = '-pl'
+kPlanLongFlag           = '-plan'
+# Write the plan to a JSON file instead, returns the number of objects
+kPlanFileFlag           = '-plf'
+kPlanLongFileFlag       = '-planFile'
+
 # Special deselect main function
 class PivotToWorldCenterCommand( OpenMayaMPx.MPxCommand):
     def __init__(self):
         ''' Constructor '''
         OpenMayaMPx.MPxCommand.__init__(self)
 
+    @vsaProfile.profiled(kPluginCmdName)
     def doIt( self, args ):
         ''' Command Execution '''
-        self.dagModifier = OpenMaya.MDagModifier()
+        # Keep before and after values of every changed plug for undoIt() and redoIt()
+        self.journal = vsaJournal.Journal()
+
+        chunkSize = vsaProgress.defaultChunkSize
+        argData = OpenMaya.MArgParser( self.syntax(), args )
+        if argData.isFlagSet( kChunkSizeFlag ):
+            chunkSize = argData.flagArgumentInt( kChunkSizeFlag, 0 )
+            if chunkSize < 1:
+                cmds.error("Chunk size must be at least 1!")
 
         # Implement
-        getSelection = cmds.ls(selection=True, flatten=True)
-        for obj in getSelection:
-            cmds.xform(obj, pivots=(0, 0, 0), ws=True)
+        # Resolve the selection once, then record and apply pivot changes chunk by chunk
+        selection = vsaSelection.getActiveSelection()
+        transformPaths = list(vsaSelection.iterTransformPaths(selection))
+        if argData.isFlagSet( kPlanFlag ) or argData.isFlagSet( kPlanFileFlag ):
+            planFile = argData.flagArgumentString( kPlanFileFlag, 0 ) if argData.isFlagSet( kPlanFileFlag ) else None
+            plan = vsaTransform.planPivots(kPluginCmdName, transformPaths, OpenMaya.MPoint(0, 0, 0))
+            vsaPlan.setPlanResult(self, plan, planFile)
+            return
+        def pivotChunk(chunkPaths):
+            start = self.journal.length()
+            vsaTransform.recordPivots(self.journal, chunkPaths, OpenMaya.MPoint(0, 0, 0))
+            self.journal.redo(start)
+
+        try:
+            vsaProgress.runChunked('Pivots to world center', transformPaths, pivotChunk, chunkSize)
+        except vsaProgress.Cancelled:
+            # Roll back changed chunks
+            self.journal.undo()
+            self.journal = vsaJournal.Journal()
+            OpenMaya.MGlobal.displayWarning(kPluginCmdName + ' cancelled, no pivot was changed')
 
     def isUndoable(self):
         ''' Determines whether or not this command is undoable within Maya. '''
-        return True
+        return not self.journal.isEmpty()
 
     def redoIt(self):
         ''' Re-do the work of the command. '''
-        self.dagModifier.doIt()
+        self.journal.redo()
 
     def undoIt(self):
         ''' Undo the work performed by the command. '''
-        self.dagModifier.undoIt()
+        self.journal.undo()
 
 ##########################################################
 # Plug-in initialization.
@@ -41,12 +85,16 @@ def cmdCreator():
     ''' Creates an instance of the command. '''
     return OpenMayaMPx.asMPxPtr(PivotToWorldCenterCommand())
 
+def syntaxCreator():
+    ''' Defines the argument and flag syntax for this command. '''
+    return vsaRegistry.createSyntax(kPluginCmdName)
+
 
 def initializePlugin(mobject):
     ''' Initializes the plug-in. '''
     mplugin = OpenMayaMPx.MFnPlugin(mobject)
     try:
-        mplugin.registerCommand(kPluginCmdName, cmdCreator)
+        mplugin.registerCommand(kPluginCmdName, cmdCreator, syntaxCreator)
     except:
         sys.stderr.write('Failed to register command: ' + kPluginCmdName)
         raise
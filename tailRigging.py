@@ -1,142 +1,805 @@
 import sys
+import json
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaMPx as OpenMayaMPx
 import maya.cmds as cmds
+import vsaCurveDriver
+import vsaPlan
+import vsaProfile
+import vsaProgress
+import vsaRegistry
+import vsaWindow
 
 # Intro: Simple plugin for tail-like rigging
 # Plug-in information:
 kPluginCmdName = 'vsaTailRigging'
 
+# Prefix of created clusters and controllers
+kPrefixFlag             = '-p'
+kPrefixLongFlag         = '-prefix'
+defaultPrefix           = 'name_'
+# Number of spans of the IK spline curve
+kSpansFlag              = '-sp'
+kSpansLongFlag          = '-spans'
+defaultSpans            = 4
+# Radius of controllers
+kSizeFlag               = '-sz'
+kSizeLongFlag           = '-size'
+defaultSize             = 1.0
+# Start and end joint of a chain, can be used multiple times to rig many chains
+kChainFlag              = '-ch'
+kChainLongFlag          = '-chain'
+# Rig every unbranched chain that ends in a leaf joint under the selected roots
+kLeafChainsFlag         = '-lc'
+kLeafChainsLongFlag     = '-leafChains'
+# Chains rigged between progress updates and cancel checks
+kChunkSizeFlag          = '-cs'
+kChunkSizeLongFlag      = '-chunkSize'
+defaultChunkSize        = 10
+# How controllers move the curve
+# cluster: one cluster deformer and parentConstraint per controller
+# direct: one vsaCurveDriver node per chain moves the CVs with the controller world matrices
+kDeformModeFlag         = '-dm'
+kDeformModeLongFlag     = '-deformMode'
+kDeformModes            = ('cluster', 'direct')
+defaultDeformMode       = 'cluster'
+# How controllers follow each other and move the clusters
+# parent: nested controllers and parentConstraints
+# matrix: controllers stay under the world, parent world matrices are connected to offsetParentMatrix,
+# which the parallel evaluator schedules without constraint nodes
+kHierarchyModeFlag      = '-hm'
+kHierarchyModeLongFlag  = '-hierarchyMode'
+kHierarchyModes         = ('parent', 'matrix')
+defaultHierarchyMode    = 'parent'
+# Open the window instead of rigging directly
+kUIFlag                 = '-ui'
+kUILongFlag             = '-userInterface'
+kWindowName             = 'TRWindow'
+# Return the planned controllers as a float array without creating anything, per controller
+# chain index, cluster index, position x y z, normal x y z and approximate
+# CVs are placed like rebuildCurve places them along a straight chain with evenly spaced joints,
+# approximate is 1 on other chains, whose rebuilt curve can put them elsewhere
+kPlanFlag               = '-pl'
+kPlanLongFlag           = '-plan'
+# Write the plan to a JSON file instead, returns the number of controllers
+kPlanFileFlag           = '-plf'
+kPlanLongFileFlag       = '-planFile'
+kPlanColumns            = ('chain', 'cluster', 'positionX', 'positionY', 'positionZ', 'normalX', 'normalY', 'normalZ',
+                           'approximate')
+# Joints further off the chain's line or from even spacing than this fraction of its length make a plan approximate
+kPlanTolerance          = 1e-4
+# Attribute holding the JSON metadata of a rigged chain on its IK handle, a later run on the chain updates it
+kMetadataAttr           = 'vsaTailRigChain'
+# Attribute holding the role of every node a rig is made of
+kTagAttr                = 'vsaTailRig'
+
 # Command function
 class TailRiggingCommand( OpenMayaMPx.MPxCommand ):
     def __init__(self):
         ''' Constructor '''
         OpenMayaMPx.MPxCommand.__init__(self)
-
+        # Nodes of new rigs and snapshots of updated chains of this call
+        self.createdNodes = []
+        self.snapshots = []
+
+    def parseArgs(self, pArgs):
+        # set default arguments
+        self.namePrefix = defaultPrefix
+        self.numOfSpans = defaultSpans
+        self.ctrllerSize = defaultSize
+        self.chains = []
+        self.chunkSize = defaultChunkSize
+        # Modes not given keep the modes of rigged chains, new chains get the defaults
+        self.deformMode = None
+        self.hierarchyMode = None
+        # Window values given by flags, pushed into an open window
+        self.changedKeys = []
+        self.planFile = None
+
+        # Obtain the flag value, if the flag is set
+        argData = OpenMaya.MArgParser( self.syntax(), pArgs )
+        if argData.isFlagSet( kPrefixFlag ):
+            self.namePrefix = argData.flagArgumentString( kPrefixFlag, 0 )
+            self.changedKeys.append('prefix')
+        if argData.isFlagSet( kSpansFlag ):
+            self.numOfSpans = argData.flagArgumentInt( kSpansFlag, 0 )
+            if self.numOfSpans < 1:
+                cmds.error("Number of spans must be at least 1!")
+            self.changedKeys.append('spans')
+        if argData.isFlagSet( kSizeFlag ):
+            self.ctrllerSize = argData.flagArgumentDouble( kSizeFlag, 0 )
+            self.changedKeys.append('size')
+        for i in range(argData.numberOfFlagUses( kChainFlag )):
+            chainArgs = OpenMaya.MArgList()
+            argData.getFlagArgumentList( kChainFlag, i, chainArgs )
+            self.chains.append((chainArgs.asString(0), chainArgs.asString(1)))
+        self.leafChains = argData.isFlagSet( kLeafChainsFlag )
+        if argData.isFlagSet( kChunkSizeFlag ):
+            self.chunkSize = argData.flagArgumentInt( kChunkSizeFlag, 0 )
+            if self.chunkSize < 1:
+                cmds.error("Chunk size must be at least 1!")
+        if argData.isFlagSet( kDeformModeFlag ):
+            self.deformMode = argData.flagArgumentString( kDeformModeFlag, 0 )
+            if self.deformMode not in kDeformModes:
+                cmds.error("Deform mode must be one of " + ", ".join(kDeformModes) + "!")
+        if argData.isFlagSet( kHierarchyModeFlag ):
+            self.hierarchyMode = argData.flagArgumentString( kHierarchyModeFlag, 0 )
+            if self.hierarchyMode not in kHierarchyModes:
+                cmds.error("Hierarchy mode must be one of " + ", ".join(kHierarchyModes) + "!")
+        if argData.isFlagSet( kPlanFileFlag ):
+            self.planFile = argData.flagArgumentString( kPlanFileFlag, 0 )
+        self.plan = argData.isFlagSet( kPlanFlag ) or self.planFile is not None
+        self.showUI = argData.isFlagSet( kUIFlag )
+
+    @vsaProfile.profiled(kPluginCmdName)
     def doIt( self, args ):
         ''' Command Execution '''
-        self.dagModifier = OpenMaya.MDagModifier()
+        # Parse the passed arguments
+        self.parseArgs( args )
+
+        if self.showUI:
+            # Create working window
+            self.createWindow()
+        elif self.plan:
+            plan = self.planRig(self.getChains(), self.namePrefix, self.numOfSpans)
+            vsaPlan.setPlanResult(self, plan, self.planFile)
+        else:
+            chains = self.getChains()
+            # One undo step for all chains, rigged a few chains at a time
+            # Chains rigged before are looked up once for all chunks
+            rigs = findRigs()
+            # Nodes of new rigs are deleted and updated chains restored when cancelled,
+            # which works with the undo queue off too
+            self.createdNodes = []
+            self.snapshots = []
+            # Spans and size not given keep the values of rigged chains too
+            numOfSpans = self.numOfSpans if 'spans' in self.changedKeys else None
+            ctrllerSize = self.ctrllerSize if 'size' in self.changedKeys else None
+            def rigChunk(chunkChains):
+                self.tailRigging(chunkChains, self.namePrefix, numOfSpans, ctrllerSize, rigs=rigs,
+                                 deformMode=self.deformMode, hierarchyMode=self.hierarchyMode)
+
+            cmds.undoInfo(openChunk=True)
+            try:
+                vsaProgress.runChunked('Tail rigging', chains, rigChunk, self.chunkSize)
+            except vsaProgress.Cancelled:
+                # New rigs go first, so restored nodes can take their old names back
+                deleteNodes(self.createdNodes)
+                for snapshot in reversed(list(self.snapshots)):
+                    self.restoreRig(snapshot)
+                OpenMaya.MGlobal.displayWarning(kPluginCmdName + ' cancelled, every chain was left as it was')
+            else:
+                # Controller shapes replaced by new circles were only kept for a cancel
+                deleteNodes([holder for snapshot in self.snapshots for index, holder in snapshot['stashes']])
+            finally:
+                cmds.undoInfo(closeChunk=True)
+
+    # Get (start joint, end joint) pairs from flags or the selection
+    def getChains(self):
+        if self.chains:
+            return self.chains
+
+        getSelection = cmds.ls(selection=True, long=True)
+        if self.leafChains:
+            chains = []
+            for root in getSelection:
+                chains.extend(findLeafChains(root))
+            if not chains:
+                cmds.error("No joint chain found under the selection!")
+            return chains
 
-        # Create working window
-        self.createWindow()
+        # Get all joints with start and end
+        if len(getSelection) < 2:
+            cmds.error("Select the start joint and the end joint!")
+        return [(getSelection[0], getSelection[len(getSelection) - 1])]
 
     # Tail rigging implement
-    def tailRigging(self, namePrefix, numOfSpans, ctrllerSize):
-        # Get all joints with start and end
-        getSelection = cmds.ls(selection=True)
-        startJoint = getSelection[0]
-        endEffector = getSelection[len(getSelection) - 1]
+    # Chains rigged before are found by their metadata and updated in place, the others are rigged from scratch
+    # Values left as None keep what a rigged chain was built with, new chains get the defaults
+    # Returns the controllers of every chain
+    def tailRigging(self, chains, namePrefix, numOfSpans=None, ctrllerSize=None, rigs=None, deformMode=None,
+                    hierarchyMode=None):
+        if rigs is None:
+            rigs = findRigs()
+        chainKeys = [getChainKey(startJoint, endEffector) for startJoint, endEffector in chains]
+        newChains = [chain for chain, chainKey in zip(chains, chainKeys) if chainKey not in rigs]
+        newCtrllers = iter(self.createRigs(newChains, namePrefix,
+                                           defaultSpans if numOfSpans is None else numOfSpans,
+                                           defaultSize if ctrllerSize is None else ctrllerSize,
+                                           deformMode or defaultDeformMode, hierarchyMode or defaultHierarchyMode))
+
+        chainCtrllers = []
+        for chainKey in chainKeys:
+            if chainKey in rigs:
+                ikHandle, metadata = rigs[chainKey]
+                chainCtrllers.append(self.updateRig(ikHandle, metadata, namePrefix, numOfSpans, ctrllerSize,
+                                                    deformMode, hierarchyMode))
+            else:
+                chainCtrllers.append(next(newCtrllers))
+        return chainCtrllers
 
-        # Create IK
+    # Rig chains from scratch and tag the created nodes with metadata for later updates
+    def createRigs(self, chains, namePrefix, numOfSpans, ctrllerSize, deformMode=defaultDeformMode,
+                   hierarchyMode=defaultHierarchyMode):
+        # Create IK and rebuild curves of all chains
         # Example: [u'ikHandle1', u'effector1', u'curve1']
-        ikResult = cmds.ikHandle(sj=startJoint, ee=endEffector, sol='ikSplineSolver', pcv=False, ns=3)
-        ctrlCurve = ikResult[2]
-
-        # Rebulid curve for setting spans
-        cmds.rebuildCurve(ctrlCurve, s=numOfSpans)
-
-        # Get all CV
-        cvCount = cmds.getAttr(ctrlCurve + '.spans') + cmds.getAttr(ctrlCurve + '.degree')
-        cvList = []
-        for i in range(cvCount):
-            cvList.append(ctrlCurve + '.cv[' + str(i) + ']')
+        ikResults = []
+        rebuildNodes = []
+        for startJoint, endEffector in chains:
+            ikResult = cmds.ikHandle(sj=startJoint, ee=endEffector, sol='ikSplineSolver', pcv=False, ns=3)
+            # Rebulid curve for setting spans, its history node changes the spans of later updates
+            rebuildNodes.append(cmds.rebuildCurve(ikResult[2], s=numOfSpans)[1])
+            ikResults.append(ikResult)
+            self.createdNodes.extend(ikResult[:3] + [rebuildNodes[-1]])
+        ctrlCurves = [ikResult[2] for ikResult in ikResults]
+
+        # Read the CVs and the start joint of every chain once
+        chainData = []
+        for (startJoint, endEffector), ctrlCurve in zip(chains, ctrlCurves):
+            chainData.append(readChainData(startJoint, ctrlCurve))
+
+        # Plan clusters and controllers of all chains
+        chainPlans = planChains(chainData)
 
         # Create clusters
-        clusterList = []
-        for i in range(len(cvList)):
-            newClusterName = namePrefix + 'cluster_' + str(i - 1) + '_'
-            # Ignore degrees
-            if i == 0 or i == 1 or i == len(cvList) - 1:
-                pass
-            elif i == len(cvList) - 2:
-                newCluster = cmds.cluster([cvList[len(cvList) - 1], cvList[len(cvList) - 2]], n=newClusterName)
-                clusterList.append(newCluster[1])
+        chainClusters = []
+        for ctrlCurve, (clusterGroups, ctrllerPlan) in zip(ctrlCurves, chainPlans):
+            if deformMode == 'cluster':
+                chainClusters.append(createClusters(ctrlCurve, clusterGroups, namePrefix))
             else:
-                newCluster = cmds.cluster(cvList[i], n=newClusterName)
-                clusterList.append(newCluster[1])
-
-        # List of all controllers
-        ctrllerList = []
-        for i in range(len(clusterList)):
-            # Get cluster world translation
-            tmpPos = cmds.xform(clusterList[i], q=True, ws=True, piv=True)
-            tmpPos = [tmpPos[0], tmpPos[1], tmpPos[2]]
-
-            # Create controllers
-            nameIndex = i + 1
-            while cmds.objExists(namePrefix + 'ctrller_' + str(nameIndex)):
-                nameIndex += 1
-
-            newCtrllerName = namePrefix + 'ctrller_' + str(nameIndex)
-            newCtrller = cmds.circle(n=newCtrllerName, r=ctrllerSize)
-
-            # Center pivot
-            newCtrllerCenter = cmds.objectCenter(newCtrller[0], gl=True)
-            cmds.xform(newCtrller, pivots=newCtrllerCenter, ws=True)
-
-            # Move and rotate controller to transform that perpendicular to first joint
-            cmds.parent(newCtrller, startJoint)
-            cmds.setAttr(newCtrller[0] + '.rotate', 0, 90, 0)
-            cmds.parent(newCtrller, w=True)
-            cmds.setAttr(newCtrller[0] + '.translate', tmpPos[0], tmpPos[1], tmpPos[2])
-            # Freeze transform
-            cmds.makeIdentity(newCtrller, apply=True)
-            # Make constraint with clusters
-            cmds.parentConstraint(newCtrller, clusterList[i])
-            ctrllerList.append(newCtrller[0])
+                chainClusters.append([])
+            self.createdNodes.extend(node for pair in chainClusters[-1] for node in pair)
+
+        # Create controllers, already perpendicular to the first joint at their cluster
+        nameAllocator = NameAllocator(namePrefix + 'ctrller_')
+        chainCtrllers = []
+        for clusterGroups, ctrllerPlan in chainPlans:
+            ctrllerList = []
+            for i, (position, normal) in enumerate(ctrllerPlan):
+                ctrllerList.append(createCtrller(nameAllocator.allocate(i + 1), ctrllerSize, position, normal))
+            chainCtrllers.append(ctrllerList)
+            self.createdNodes.extend(node for pair in ctrllerList for node in pair)
+
+        # Make clusters follow their controllers
+        for ctrllerList, clusterList in zip(chainCtrllers, chainClusters):
+            for (ctrller, circle), (cluster, clusterHandle) in zip(ctrllerList, clusterList):
+                attachCluster(ctrller, clusterHandle, hierarchyMode)
 
         # Make Hierarchy
-        for i in range(len(ctrllerList)):
-            if i != len(ctrllerList) - 1:
-                cmds.parent(ctrllerList[i + 1], ctrllerList[i])
+        for ctrllerList in chainCtrllers:
+            for (parentCtrller, parentCircle), (childCtrller, childCircle) in zip(ctrllerList[:-1], ctrllerList[1:]):
+                linkCtrller(parentCtrller, childCtrller, hierarchyMode)
+
+        # Drive the CVs of each curve from its controllers, once the hierarchy is final
+        drivers = []
+        for ctrlCurve, rebuildNode, (clusterGroups, ctrllerPlan), ctrllerList in zip(
+                ctrlCurves, rebuildNodes, chainPlans, chainCtrllers):
+            drivers.append(createDriver(ctrlCurve, rebuildNode, clusterGroups, ctrllerList)
+                           if deformMode == 'direct' else None)
+            if drivers[-1]:
+                self.createdNodes.append(drivers[-1])
+
+        # Remember what was built on the IK handle of each chain
+        for (startJoint, endEffector), ikResult, rebuildNode, clusterList, ctrllerList, driver in zip(
+                chains, ikResults, rebuildNodes, chainClusters, chainCtrllers, drivers):
+            tagNode(ikResult[2], 'curve')
+            tagNode(rebuildNode, 'rebuild')
+            metadata = {'chain': getChainKey(startJoint, endEffector), 'spans': numOfSpans, 'size': ctrllerSize,
+                        'mode': deformMode, 'hierarchy': hierarchyMode, 'curve': ikResult[2], 'rebuild': rebuildNode, 'clusters': clusterList,
+                        'driver': driver, 'ctrllers': ctrllerList}
+            writeMetadata(ikResult[0], metadata)
+        return [[ctrller for ctrller, circle in ctrllerList] for ctrllerList in chainCtrllers]
+
+    # Update a chain rigged before to new spans, size, deform and hierarchy mode, None keeps the stored value
+    # A size change only sets the radius of the controller circles. A span or mode change rebuilds the clusters
+    # or the driver, since CVs are renumbered, while existing controllers are moved and only missing or extra
+    # ones are created or deleted
+    def updateRig(self, ikHandle, metadata, namePrefix, numOfSpans=None, ctrllerSize=None, deformMode=None,
+                  hierarchyMode=None):
+        clusterList = metadata['clusters']
+        oldMode = metadata.get('mode', 'cluster')
+        oldHierarchy = metadata.get('hierarchy', 'parent')
+        numOfSpans = metadata['spans'] if numOfSpans is None else numOfSpans
+        ctrllerSize = metadata['size'] if ctrllerSize is None else ctrllerSize
+        deformMode = deformMode or oldMode
+        hierarchyMode = hierarchyMode or oldHierarchy
+        ctrllerList = [pair for pair in metadata['ctrllers'] if isTagged(pair[0], 'ctrller')]
+        # Circle history is often deleted on controls, their shapes are then made again below
+        intact = len(ctrllerList) == len(metadata['ctrllers']) \
+            and all(cmds.objExists(circle) for ctrller, circle in ctrllerList) \
+            and all(isTagged(clusterHandle, 'cluster') for cluster, clusterHandle in clusterList) \
+            and (oldMode != 'direct' or isTagged(metadata.get('driver'), 'driver'))
+
+        if metadata['spans'] == numOfSpans and oldMode == deformMode and oldHierarchy == hierarchyMode and intact:
+            if metadata['size'] != ctrllerSize:
+                self.snapshotRig(ikHandle, metadata)
+                for ctrller, circle in ctrllerList:
+                    cmds.setAttr(circle + '.radius', ctrllerSize)
+                metadata['size'] = ctrllerSize
+                writeMetadata(ikHandle, metadata)
+            return [ctrller for ctrller, circle in ctrllerList]
+
+        snapshot = self.snapshotRig(ikHandle, metadata)
+        # Clusters hold CV indices of the old curve
+        # Deleting a handle deletes its cluster too, delete clusters left without handle after
+        for nodes in ([clusterHandle for cluster, clusterHandle in clusterList],
+                      [cluster for cluster, clusterHandle in clusterList]):
+            nodes = [node for node in nodes if cmds.objExists(node)]
+            if nodes:
+                cmds.delete(nodes)
+        if metadata.get('driver'):
+            removeDriver(metadata['curve'], metadata['rebuild'], metadata['driver'])
+        cmds.setAttr(metadata['rebuild'] + '.spans', numOfSpans)
+        startJoint = metadata['chain'].split(' ')[0]
+        clusterGroups, ctrllerPlan = planChain(readChainData(startJoint, metadata['curve']))
+        clusterList = []
+        if deformMode == 'cluster':
+            clusterList = createClusters(metadata['curve'], clusterGroups, namePrefix)
+
+        # Keep controllers, delete extra ones, add missing ones at the end
+        keptCount = min(len(ctrllerList), len(ctrllerPlan))
+        if oldHierarchy != hierarchyMode:
+            for ctrller, circle in ctrllerList[1:]:
+                unlinkCtrller(ctrller, oldHierarchy)
+        for i, ((ctrller, circle), (position, normal)) in enumerate(zip(ctrllerList, ctrllerPlan)):
+            if not cmds.objExists(circle):
+                holder = stashShapes(ctrller)
+                if holder:
+                    snapshot['stashes'].append((i, holder))
+                ctrllerList[i] = [ctrller, replaceCtrllerShape(ctrller, ctrllerSize, position, normal)]
+        # Children first, nested ones are deleted with their parent
+        for ctrller, circle in reversed(ctrllerList[keptCount:]):
+            if cmds.objExists(ctrller):
+                cmds.delete(ctrller)
+        ctrllerList = ctrllerList[:keptCount]
+        nameAllocator = NameAllocator(namePrefix + 'ctrller_')
+        for i in range(keptCount, len(ctrllerPlan)):
+            position, normal = ctrllerPlan[i]
+            ctrllerList.append(createCtrller(nameAllocator.allocate(i + 1), ctrllerSize, position, normal))
+        # Link new controllers, or all of them after a hierarchy change
+        linkStart = 1 if oldHierarchy != hierarchyMode else max(1, keptCount)
+        for i in range(linkStart, len(ctrllerList)):
+            linkCtrller(ctrllerList[i - 1][0], ctrllerList[i][0], hierarchyMode)
+        # Move the circles once the hierarchy is final, controllers may be posed or follow a posed parent
+        for (ctrller, circle), (position, normal) in zip(ctrllerList, ctrllerPlan):
+            placeCtrller(ctrller, circle, ctrllerSize, position, normal)
+
+        for (ctrller, circle), (cluster, clusterHandle) in zip(ctrllerList, clusterList):
+            attachCluster(ctrller, clusterHandle, hierarchyMode)
+        driver = None
+        if deformMode == 'direct':
+            driver = createDriver(metadata['curve'], metadata['rebuild'], clusterGroups, ctrllerList)
+
+        metadata.update({'spans': numOfSpans, 'size': ctrllerSize, 'mode': deformMode, 'hierarchy': hierarchyMode,
+                         'clusters': clusterList, 'driver': driver, 'ctrllers': ctrllerList})
+        writeMetadata(ikHandle, metadata)
+        return [ctrller for ctrller, circle in ctrllerList]
+
+    # Keep what updateRig is about to change on a chain, restoreRig puts it back when the call is cancelled
+    # Only changed chains are read, reruns that change nothing cost nothing
+    # Shapes of controllers getting a new circle are stashed by updateRig, as (controller index, holder)
+    def snapshotRig(self, ikHandle, metadata):
+        ctrllers = []
+        for ctrller, circle in metadata['ctrllers']:
+            if not cmds.objExists(ctrller):
+                ctrllers.append(None)
+                continue
+            pivot = cmds.xform(ctrller, q=True, ws=True, rotatePivot=True)
+            circleValues = None
+            if cmds.objExists(circle):
+                circleValues = (cmds.getAttr(circle + '.radius'), cmds.getAttr(circle + '.center')[0],
+                                cmds.getAttr(circle + '.normal')[0])
+            ctrllers.append((pivot, circleValues))
+        # Offsets are taken from the controllers at the time a driver is made, a pose would be baked in again
+        driverOffsets = None
+        if metadata.get('driver') and cmds.objExists(metadata['driver']):
+            driverOffsets = [cmds.getAttr(metadata['driver'] + '.offset[' + str(entry) + ']')[0]
+                             for entry in range(metadata['spans'] + 1)]
+        snapshot = {'ikHandle': ikHandle, 'metadata': json.loads(json.dumps(metadata)), 'ctrllers': ctrllers,
+                    'driverOffsets': driverOffsets, 'stashes': []}
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    # Rebuild a chain to its snapshotted spans, size and modes, then give its nodes their old names,
+    # its circles their old radius, center, normal and pivot and its stashed shapes back
+    # Controllers the update deleted come back without the keys they had
+    def restoreRig(self, snapshot):
+        ikHandle = snapshot['ikHandle']
+        oldMetadata = snapshot['metadata']
+        metadata = json.loads(cmds.getAttr(ikHandle + '.' + kMetadataAttr))
+        self.updateRig(ikHandle, metadata, self.namePrefix, oldMetadata['spans'], oldMetadata['size'],
+                       oldMetadata.get('mode', 'cluster'), oldMetadata.get('hierarchy', 'parent'))
+
+        for key in ('ctrllers', 'clusters'):
+            oldPairs = oldMetadata[key]
+            metadata[key] = [[restoreName(node, oldNode) for node, oldNode in zip(pair, oldPairs[i])]
+                             if i < len(oldPairs) else pair for i, pair in enumerate(metadata[key])]
+        if metadata['driver'] and oldMetadata.get('driver'):
+            metadata['driver'] = restoreName(metadata['driver'], oldMetadata['driver'])
+            for entry, offset in enumerate(snapshot['driverOffsets'] or []):
+                cmds.setAttr(metadata['driver'] + '.offset[' + str(entry) + ']', offset[0], offset[1], offset[2],
+                             type='double3')
+        for (ctrller, circle), values in zip(metadata['ctrllers'], snapshot['ctrllers']):
+            if values is None:
+                continue
+            pivot, circleValues = values
+            if circleValues is not None and cmds.objExists(circle):
+                radius, center, normal = circleValues
+                cmds.setAttr(circle + '.radius', radius)
+                cmds.setAttr(circle + '.center', center[0], center[1], center[2])
+                cmds.setAttr(circle + '.normal', normal[0], normal[1], normal[2])
+            cmds.xform(ctrller, pivots=pivot, ws=True)
+        for index, holder in snapshot['stashes']:
+            unstashShapes(metadata['ctrllers'][index][0], metadata['ctrllers'][index][1], holder)
+
+        oldMetadata.update({'clusters': metadata['clusters'], 'driver': metadata['driver'],
+                            'ctrllers': metadata['ctrllers']})
+        writeMetadata(ikHandle, oldMetadata)
+
+    # Plan controllers of all chains from the joints only, nothing is created
+    def planRig(self, chains, namePrefix, numOfSpans):
+        chainData = []
+        approximates = []
+        for startJoint, endEffector in chains:
+            jointPositions = [cmds.xform(joint, q=True, ws=True, t=True)
+                              for joint in getChainJoints(startJoint, endEffector)]
+            cvCount = numOfSpans + 3
+            startMatrix = cmds.xform(startJoint, q=True, ws=True, matrix=True)
+            chainData.append((cvCount, planCurvePoints(jointPositions, cvCount), startMatrix))
+            approximates.append(not isStraightEvenChain(jointPositions))
+
+        plan = vsaPlan.Plan(kPluginCmdName, kPlanColumns)
+        nameAllocator = NameAllocator(namePrefix + 'ctrller_')
+        for chainIndex, ((clusterGroups, ctrllerPlan), approximate) in enumerate(zip(planChains(chainData),
+                                                                                     approximates)):
+            for i, ((index, members), (position, normal)) in enumerate(zip(clusterGroups, ctrllerPlan)):
+                plan.addRow(nameAllocator.allocate(i + 1),
+                            (chainIndex, index) + tuple(position) + tuple(normal) + (approximate,))
+        return plan
 
     # Window for control
+    # Built once, later calls push the flags given into the open window
     def createWindow(self):
-        self.window = "TRWindow"
-        self.title = "Quick Tail Rigging"
-        self.size = (400, 200)
-
-        # close old window is open
-        if cmds.window(self.window, exists=True):
-            cmds.deleteUI(self.window, window=True)
-
-        # create new window
-        self.window = cmds.window(self.window, title=self.title, widthHeight=self.size)
+        values = {'prefix': self.namePrefix, 'spans': self.numOfSpans, 'size': self.ctrllerSize}
+        vsaWindow.showToolWindow(kWindowName, "Quick Tail Rigging", (400, 200), self.buildWindow, values,
+                                 self.changedKeys)
 
+    def buildWindow(self, window):
         cmds.columnLayout(adjustableColumn=True)
         cmds.separator()
-        self.namePrefixInput = cmds.textFieldGrp(label='Name Prefix: ', text='name_')
+        window.addControl('prefix', cmds.textFieldGrp, cmds.textFieldGrp(label='Name Prefix: '), 'text')
         cmds.separator()
-        self.numOfSpansInput = cmds.intSliderGrp(field=True, label='Number of Spans: ',
-                                        minValue=1, value=4)
-
-        self.ctrllerSizeInput = cmds.floatSliderGrp(field=True, label='Size of Controllers: ',
-                                                    value=1.0)
-        self.applyActionBtn = cmds.button(label='Apply', command=self.btnAction)
+        window.addControl('spans', cmds.intSliderGrp,
+                          cmds.intSliderGrp(field=True, label='Number of Spans: ', minValue=1))
 
-        # display new window
-        cmds.showWindow()
+        window.addControl('size', cmds.floatSliderGrp,
+                          cmds.floatSliderGrp(field=True, label='Size of Controllers: '))
+        cmds.button(label='Apply', command=self.btnAction)
 
     # Define the action of Special Deselect button
+    @vsaProfile.profiled(kPluginCmdName)
     def btnAction(self, args):
-        namePrefix = cmds.textFieldGrp(self.namePrefixInput, q=True, text=True)
-        numOfSpans = cmds.intSliderGrp(self.numOfSpansInput, query=True, value=True)
-        ctrllerSize = cmds.floatSliderGrp(self.ctrllerSizeInput, query=True, value=True)
-
-        self.tailRigging(namePrefix, numOfSpans, ctrllerSize)
+        values = vsaWindow.getValues(kWindowName)
+        cmds.vsaTailRigging(prefix=values['prefix'], spans=values['spans'], size=values['size'])
 
 
     def isUndoable(self):
         ''' Determines whether or not this command is undoable within Maya. '''
-        return True
+        # Nodes are created with cmds inside one undo chunk, Maya undoes them as one step
+        return False
 
-    def redoIt(self):
-        ''' Re-do the work of the command. '''
-        self.dagModifier.doIt()
+##########################################################
+# Rig building and metadata.
+##########################################################
+# (cvCount, cvPositions, startMatrix) of a chain's curve, as planChain takes it
+def readChainData(startJoint, ctrlCurve):
+    cvCount = cmds.getAttr(ctrlCurve + '.spans') + cmds.getAttr(ctrlCurve + '.degree')
+    cvPositions = cmds.xform(ctrlCurve + '.cv[*]', q=True, ws=True, t=True)
+    startMatrix = cmds.xform(startJoint, q=True, ws=True, matrix=True)
+    return cvCount, cvPositions, startMatrix
+
+# Create one cluster per group of CVs, returns [cluster, cluster handle] pairs
+def createClusters(ctrlCurve, clusterGroups, namePrefix):
+    clusterList = []
+    for index, members in clusterGroups:
+        newClusterName = namePrefix + 'cluster_' + str(index) + '_'
+        newCluster = cmds.cluster([ctrlCurve + '.cv[' + str(m) + ']' for m in members], n=newClusterName)
+        tagNode(newCluster[1], 'cluster')
+        clusterList.append(newCluster[:2])
+    return clusterList
+
+# Create a controller circle with its pivot at position, returns [controller, makeNurbCircle]
+def createCtrller(name, ctrllerSize, position, normal):
+    newCtrller = cmds.circle(n=name, r=ctrllerSize, c=position, nr=normal)
+    cmds.xform(newCtrller[0], pivots=position, ws=True)
+    tagNode(newCtrller[0], 'ctrller')
+    return newCtrller[:2]
+
+# Move a controller circle to a world position and normal, in the space of the controller's transform
+def placeCtrller(ctrller, circle, ctrllerSize, position, normal):
+    inverse = getWorldInverseMatrix(ctrller)
+    center = OpenMaya.MPoint(position[0], position[1], position[2]) * inverse
+    axis = (OpenMaya.MVector(normal[0], normal[1], normal[2]) * inverse).normal()
+    cmds.setAttr(circle + '.radius', ctrllerSize)
+    cmds.setAttr(circle + '.center', center.x, center.y, center.z)
+    cmds.setAttr(circle + '.normal', axis.x, axis.y, axis.z)
+    cmds.xform(ctrller, pivots=position, ws=True)
+
+# Give a controller whose circle history was deleted a new circle shape with history, returns the makeNurbCircle
+def replaceCtrllerShape(ctrller, ctrllerSize, position, normal):
+    newCtrller, circle = cmds.circle(r=ctrllerSize, c=position, nr=normal)[:2]
+    oldShapes = cmds.listRelatives(ctrller, shapes=True, fullPath=True) or []
+    newShape = cmds.listRelatives(newCtrller, shapes=True, fullPath=True)[0]
+    newShape = cmds.parent(newShape, ctrller, shape=True, relative=True)[0]
+    if oldShapes:
+        cmds.delete(oldShapes)
+    cmds.delete(newCtrller)
+    cmds.rename(newShape, ctrller.split('|')[-1] + 'Shape')
+    return circle
+
+# Move the shapes of a controller under a hidden transform, returns the transform or None without shapes
+def stashShapes(ctrller):
+    shapes = cmds.listRelatives(ctrller, shapes=True, fullPath=True) or []
+    if not shapes:
+        return None
+    holder = cmds.createNode('transform', name=ctrller.split('|')[-1] + '_stashedShapes')
+    cmds.setAttr(holder + '.visibility', False)
+    for shape in shapes:
+        cmds.parent(shape, holder, shape=True, relative=True)
+    return holder
+
+# Replace the shapes and circle of a controller with the shapes stashed in holder
+def unstashShapes(ctrller, circle, holder):
+    shapes = cmds.listRelatives(ctrller, shapes=True, fullPath=True) or []
+    deleteNodes(shapes + [circle])
+    for shape in cmds.listRelatives(holder, shapes=True, fullPath=True) or []:
+        cmds.parent(shape, ctrller, shape=True, relative=True)
+    cmds.delete(holder)
+
+# Make childCtrller follow parentCtrller, by nesting it or through its offsetParentMatrix
+def linkCtrller(parentCtrller, childCtrller, hierarchyMode):
+    if hierarchyMode == 'parent':
+        cmds.parent(childCtrller, parentCtrller)
+    else:
+        cmds.connectAttr(parentCtrller + '.worldMatrix[0]', childCtrller + '.offsetParentMatrix', force=True)
+
+# Undo linkCtrller, the controller is left under the world
+def unlinkCtrller(ctrller, hierarchyMode):
+    if hierarchyMode == 'parent':
+        if cmds.listRelatives(ctrller, parent=True):
+            cmds.parent(ctrller, world=True)
+    else:
+        offsetPlug = ctrller + '.offsetParentMatrix'
+        for source in cmds.listConnections(offsetPlug, source=True, destination=False, plugs=True) or []:
+            cmds.disconnectAttr(source, offsetPlug)
+
+# Make a cluster handle follow its controller, the handle and the controller are both at rest
+def attachCluster(ctrller, clusterHandle, hierarchyMode):
+    if hierarchyMode == 'parent':
+        cmds.parentConstraint(ctrller, clusterHandle)
+    else:
+        cmds.connectAttr(ctrller + '.worldMatrix[0]', clusterHandle + '.offsetParentMatrix', force=True)
+
+# Create a vsaCurveDriver between the rebuilt curve and the curve shape, each controller drives the CVs
+# of its cluster group from where they are now, returns the driver
+def createDriver(ctrlCurve, rebuildNode, clusterGroups, ctrllerList):
+    curveShape = cmds.listRelatives(ctrlCurve, shapes=True, fullPath=True)[0]
+    cvPositions = cmds.xform(ctrlCurve + '.cv[*]', q=True, ws=True, t=True)
+    driver = cmds.createNode(vsaCurveDriver.kPluginNodeName, name=ctrlCurve.split('|')[-1] + '_driver')
+    cmds.connectAttr(rebuildNode + '.outputCurve', driver + '.inputCurve')
+    cmds.connectAttr(ctrlCurve + '.worldInverseMatrix[0]', driver + '.curveInverseMatrix')
+
+    entry = 0
+    for controllerIndex, ((index, members), (ctrller, circle)) in enumerate(zip(clusterGroups, ctrllerList)):
+        cmds.connectAttr(ctrller + '.worldMatrix[0]', driver + '.inputMatrix[' + str(controllerIndex) + ']')
+        inverse = getWorldInverseMatrix(ctrller)
+        for m in members:
+            offset = OpenMaya.MPoint(cvPositions[m * 3], cvPositions[m * 3 + 1], cvPositions[m * 3 + 2]) * inverse
+            cmds.setAttr(driver + '.cvIndex[' + str(entry) + ']', m)
+            cmds.setAttr(driver + '.controllerIndex[' + str(entry) + ']', controllerIndex)
+            cmds.setAttr(driver + '.offset[' + str(entry) + ']', offset.x, offset.y, offset.z, type='double3')
+            entry += 1
+    cmds.connectAttr(driver + '.outputCurve', curveShape + '.create', force=True)
+    tagNode(driver, 'driver')
+    return driver
+
+# Give the curve back its rebuilt shape and delete the driver
+def removeDriver(ctrlCurve, rebuildNode, driver):
+    curveShape = cmds.listRelatives(ctrlCurve, shapes=True, fullPath=True)[0]
+    cmds.connectAttr(rebuildNode + '.outputCurve', curveShape + '.create', force=True)
+    if cmds.objExists(driver):
+        cmds.delete(driver)
+
+def getWorldInverseMatrix(node):
+    selection = OpenMaya.MSelectionList()
+    selection.add(node)
+    dagPath = OpenMaya.MDagPath()
+    selection.getDagPath(0, dagPath)
+    return dagPath.inclusiveMatrixInverse()
+
+# "<start joint> <end joint>" with long names, identifies a rigged chain
+def getChainKey(startJoint, endJoint):
+    return ' '.join((cmds.ls(joint, long=True) or [joint])[0] for joint in (startJoint, endJoint))
+
+# Mark a newly created node with its role in the rig
+def tagNode(node, role):
+    cmds.addAttr(node, longName=kTagAttr, dataType='string')
+    cmds.setAttr(node + '.' + kTagAttr, role, type='string')
+
+# Whether node still exists and is the rig node of this role, users may delete or rename rig nodes
+def isTagged(node, role):
+    return bool(node) and cmds.objExists(node) and cmds.attributeQuery(kTagAttr, node=node, exists=True) \
+        and cmds.getAttr(node + '.' + kTagAttr) == role
+
+def writeMetadata(ikHandle, metadata):
+    if not cmds.attributeQuery(kMetadataAttr, node=ikHandle, exists=True):
+        cmds.addAttr(ikHandle, longName=kMetadataAttr, dataType='string')
+    cmds.setAttr(ikHandle + '.' + kMetadataAttr, json.dumps(metadata), type='string')
+
+# Give node back the short name of oldNode when it got another one and that name is free, returns its name
+def restoreName(node, oldNode):
+    oldName = oldNode.split('|')[-1]
+    if node.split('|')[-1] == oldName or cmds.objExists(oldName):
+        return node
+    return cmds.rename(node, oldName)
+
+# Delete nodes which still exist, last created first
+# Deleting a node can delete others, such as its children, constraints or cluster, so each is checked on its turn
+def deleteNodes(nodes):
+    for node in reversed(nodes):
+        if cmds.objExists(node):
+            cmds.delete(node)
+
+# Rigged chains of the scene as {chain key: (ikHandle, metadata)}
+def findRigs():
+    rigs = {}
+    for ikHandle in cmds.ls('*.' + kMetadataAttr, objectsOnly=True, recursive=True) or []:
+        metadata = json.loads(cmds.getAttr(ikHandle + '.' + kMetadataAttr))
+        rigs[metadata['chain']] = (ikHandle, metadata)
+    return rigs
 
-    def undoIt(self):
-        ''' Undo the work performed by the command. '''
-        self.dagModifier.undoIt()
+##########################################################
+# Rig planning.
+##########################################################
+# Group curve CVs into clusters as (name index, CV indices)
+# The first two CVs follow the start joint, the last two CVs share one cluster
+def planClusters(cvCount):
+    clusterGroups = []
+    for i in range(2, cvCount - 1):
+        if i == cvCount - 2:
+            clusterGroups.append((i - 1, [cvCount - 1, cvCount - 2]))
+        else:
+            clusterGroups.append((i - 1, [i]))
+    return clusterGroups
+
+# Compute (position, normal) of every controller
+# cvPositions is a flat x, y, z list, startMatrix the flat world matrix of the start joint
+# Controllers sit on their cluster center and face along the start joint's X axis
+def planControllers(cvPositions, clusterGroups, startMatrix):
+    normal = startMatrix[0:3]
+    length = (normal[0] ** 2 + normal[1] ** 2 + normal[2] ** 2) ** 0.5
+    normal = tuple(value / length for value in normal)
+
+    ctrllerPlan = []
+    for index, members in clusterGroups:
+        position = [0.0, 0.0, 0.0]
+        for m in members:
+            for axis in range(3):
+                position[axis] += cvPositions[m * 3 + axis] / len(members)
+        ctrllerPlan.append((tuple(position), normal))
+    return ctrllerPlan
+
+# Plan one chain from (cvCount, cvPositions, startMatrix)
+def planChain(chainData):
+    cvCount, cvPositions, startMatrix = chainData
+    clusterGroups = planClusters(cvCount)
+    return clusterGroups, planControllers(cvPositions, clusterGroups, startMatrix)
+
+# Plan all chains before the scene is changed
+def planChains(chainData):
+    return [planChain(data) for data in chainData]
+
+# CV parameters of a uniform curve scaled to 0..1, the Greville abscissae of its clamped knots
+# rebuildCurve puts the CVs there, e.g. 0, 1/12, 1/4, 1/2, 3/4, 11/12, 1 for 4 cubic spans
+def grevilleParameters(spans, degree=3):
+    knots = [0] * (degree + 1) + list(range(1, spans)) + [spans] * (degree + 1)
+    return [sum(knots[i + 1:i + degree + 1]) / float(degree * spans) for i in range(spans + degree)]
+
+# CVs of a cubic curve of cvCount CVs rebuilt along joint positions as a flat x, y, z list
+def planCurvePoints(jointPositions, cvCount):
+    lengths = [0.0]
+    for a, b in zip(jointPositions[:-1], jointPositions[1:]):
+        lengths.append(lengths[-1] + sum((b[axis] - a[axis]) ** 2 for axis in range(3)) ** 0.5)
+
+    cvPositions = []
+    segment = 0
+    for parameter in grevilleParameters(cvCount - 3):
+        target = lengths[-1] * parameter
+        while segment < len(jointPositions) - 2 and lengths[segment + 1] < target:
+            segment += 1
+        if len(jointPositions) == 1:
+            cvPositions.extend(jointPositions[0])
+            continue
+        a, b = jointPositions[segment], jointPositions[segment + 1]
+        weight = (target - lengths[segment]) / ((lengths[segment + 1] - lengths[segment]) or 1.0)
+        cvPositions.extend(a[axis] + (b[axis] - a[axis]) * weight for axis in range(3))
+    return cvPositions
+
+# Whether joints lie on one line at even spacing, only then planCurvePoints is where rebuildCurve puts the CVs
+def isStraightEvenChain(jointPositions, tolerance=kPlanTolerance):
+    if len(jointPositions) < 3:
+        return True
+    first, last = jointPositions[0], jointPositions[-1]
+    axis = [last[i] - first[i] for i in range(3)]
+    length = sum(value ** 2 for value in axis) ** 0.5
+    if length == 0.0:
+        return False
+    axis = [value / length for value in axis]
+    step = length / (len(jointPositions) - 1)
+    for index, position in enumerate(jointPositions):
+        offset = [position[i] - first[i] for i in range(3)]
+        along = sum(offset[i] * axis[i] for i in range(3))
+        across = sum((offset[i] - along * axis[i]) ** 2 for i in range(3)) ** 0.5
+        if across > tolerance * length or abs(along - index * step) > tolerance * length:
+            return False
+    return True
+
+# Joints from startJoint down to endJoint as long names
+def getChainJoints(startJoint, endJoint):
+    start = (cmds.ls(startJoint, long=True) or [startJoint])[0]
+    joints = [(cmds.ls(endJoint, long=True) or [endJoint])[0]]
+    while joints[-1] != start:
+        parents = cmds.listRelatives(joints[-1], parent=True, fullPath=True)
+        if not parents:
+            cmds.error(endJoint + " is not below " + startJoint + "!")
+        joints.append(parents[0])
+    joints.reverse()
+    return joints
+
+# Find unbranched joint chains ending in a leaf joint under root as (start, end) pairs
+# A chain starts below the nearest branching joint, or at root
+def findLeafChains(root):
+    joints = cmds.listRelatives(root, allDescendents=True, type='joint', fullPath=True) or []
+    if cmds.objectType(root, isAType='joint'):
+        joints.append(root)
+
+    # Count joint children of every joint, then walk up from each leaf
+    childCount = dict((joint, 0) for joint in joints)
+    for joint in joints:
+        parent = joint.rsplit('|', 1)[0]
+        if joint != root and parent in childCount:
+            childCount[parent] += 1
+
+    chains = []
+    for leaf in joints:
+        if childCount[leaf] != 0:
+            continue
+        start = leaf
+        while start != root:
+            parent = start.rsplit('|', 1)[0]
+            if parent not in childCount or childCount[parent] > 1:
+                break
+            start = parent
+        if start != leaf:
+            chains.append((start, leaf))
+    return chains
+
+# Hands out unused "<base><index>" names from one snapshot of the scene
+class NameAllocator(object):
+    def __init__(self, base):
+        self.base = base
+        self.used = set(name.split('|')[-1] for name in cmds.ls(base + '*'))
+        self.nextIndex = 1
+
+    # Get the first free name at or after index, never reusing a name it handed out
+    def allocate(self, index):
+        index = max(index, self.nextIndex)
+        while self.base + str(index) in self.used:
+            index += 1
+        name = self.base + str(index)
+        self.used.add(name)
+        self.nextIndex = index + 1
+        return name
 
 ##########################################################
 # Plug-in initialization.
@@ -145,23 +808,34 @@ def cmdCreator():
     ''' Creates an instance of the command. '''
     return OpenMayaMPx.asMPxPtr(TailRiggingCommand())
 
+def syntaxCreator():
+    ''' Defines the argument and flag syntax for this command. '''
+    return vsaRegistry.createSyntax(kPluginCmdName)
+
+def cleanupPlugin():
+    ''' Closes the tool window, its buttons call this module. '''
+    vsaWindow.closeToolWindow(kWindowName)
+
 def initializePlugin(mobject):
     ''' Initializes the plug-in. '''
     mplugin = OpenMayaMPx.MFnPlugin(mobject)
     try:
-        mplugin.registerCommand(kPluginCmdName, cmdCreator)
+        mplugin.registerCommand(kPluginCmdName, cmdCreator, syntaxCreator)
     except:
         sys.stderr.write('Failed to register command: ' + kPluginCmdName)
         raise
+    vsaCurveDriver.initializePlugin(mobject)
 
 def uninitializePlugin(mobject):
     ''' Uninitializes the plug-in. '''
     mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    cleanupPlugin()
     try:
         mplugin.deregisterCommand(kPluginCmdName)
     except:
         sys.stderr.write('Failed to unregister command: ' + kPluginCmdName)
         raise
+    vsaCurveDriver.uninitializePlugin(mobject)
 
 
 
@@ -0,0 +1,212 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import timeit
+import traceback
+
+# Intro: Run one vsa* command over many scene files with mayapy
+# Usage: mayapy vsaBatch.py vsaPivotToWorldCenter a.ma b.mb --type nurbsCurve --workers 4 --log timing.csv
+#        mayapy vsaBatch.py vsaCurveColorChanger --jobs jobs.json --flags '{"preset": "sides", "hierarchy": true}'
+# Each file is opened in a pool of mayapy worker processes, its objects are selected by a query, the command
+# runs on them and the file is saved. Every file gets a row in the timing log, failed files do not stop the batch
+# Maya is only started in the workers, the main process just hands out files and writes the log
+
+# Plugin loaded in every worker, it registers every vsa* command
+defaultPlugin           = 'vsaPlugins.py'
+defaultWorkers          = max(1, multiprocessing.cpu_count() // 2)
+kLogColumns             = ('file', 'status', 'selected', 'openTime', 'commandTime', 'saveTime', 'totalTime',
+                           'worker', 'error')
+kFileTypes              = {'.ma': 'mayaAscii', '.mb': 'mayaBinary'}
+
+# Whether this worker process has started Maya and loaded the plugin
+mayaStarted = [False]
+
+def startMaya(plugin):
+    if mayaStarted[0]:
+        return
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    import maya.cmds as cmds
+    # Nothing is undone in a batch, keeping undo history only costs memory
+    cmds.undoInfo(state=False)
+    cmds.loadPlugin(plugin, quiet=True)
+    mayaStarted[0] = True
+
+##########################################################
+# Jobs.
+##########################################################
+# A job is one file with its selection query: {'file', 'names', 'type', 'set'}
+# names are ls patterns such as '*_ctrl', type is a node type and set is an object set whose members are kept
+def makeJob(path, names=None, nodeType=None, setName=None):
+    return {'file': path, 'names': list(names or []), 'type': nodeType, 'set': setName}
+
+# Jobs from a JSON list, entries without a query use the default query
+def readJobs(path, defaultJob):
+    with open(path) as jsonFile:
+        entries = json.load(jsonFile)
+    jobs = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            entry = {'file': entry}
+        jobs.append(makeJob(entry['file'], entry.get('names', defaultJob['names']),
+                            entry.get('type', defaultJob['type']), entry.get('set', defaultJob['set'])))
+    return jobs
+
+# Paths from a text file, one per line, empty lines and lines starting with # are skipped
+def readFileList(path):
+    with open(path) as listFile:
+        return [line.strip() for line in listFile if line.strip() and not line.strip().startswith('#')]
+
+##########################################################
+# Worker.
+##########################################################
+# Long names of the objects matching a job's query
+def queryObjects(job):
+    import maya.cmds as cmds
+    kwargs = {'long': True}
+    if job['type']:
+        kwargs['type'] = job['type']
+    nodes = cmds.ls(*job['names'], **kwargs) if job['names'] else cmds.ls(**kwargs)
+    if job['set']:
+        members = set(cmds.ls(cmds.sets(job['set'], query=True) or [], long=True))
+        nodes = [node for node in nodes or [] if node in members]
+    return nodes or []
+
+# Open a job's file, run the command on its query and save it, returns one timing log row
+def processJob(job, commandName, flags, plugin, outputDir=None):
+    row = dict((column, '') for column in kLogColumns)
+    row.update({'file': job['file'], 'status': 'failed', 'selected': 0, 'worker': os.getpid()})
+    startTime = timeit.default_timer()
+    try:
+        startMaya(plugin)
+        import maya.cmds as cmds
+
+        cmds.file(job['file'], open=True, force=True, prompt=False)
+        row['openTime'] = timeit.default_timer() - startTime
+
+        nodes = queryObjects(job)
+        row['selected'] = len(nodes)
+        if not nodes:
+            row['status'] = 'skipped'
+            return row
+        cmds.select(nodes, replace=True)
+        commandStart = timeit.default_timer()
+        getattr(cmds, commandName)(**flags)
+        row['commandTime'] = timeit.default_timer() - commandStart
+
+        saveStart = timeit.default_timer()
+        if outputDir:
+            cmds.file(rename=os.path.join(outputDir, os.path.basename(job['file'])))
+        extension = os.path.splitext(job['file'])[1].lower()
+        cmds.file(save=True, force=True, type=kFileTypes.get(extension, 'mayaAscii'))
+        row['saveTime'] = timeit.default_timer() - saveStart
+        row['status'] = 'done'
+    except Exception as e:
+        row['error'] = str(e).strip() or traceback.format_exc().strip().split('\n')[-1]
+    finally:
+        row['totalTime'] = timeit.default_timer() - startTime
+    return row
+
+# Pool entry point, pool tasks take one argument
+def processTask(task):
+    return processJob(*task)
+
+##########################################################
+# Batch.
+##########################################################
+# Run commandName with flags over jobs in workers processes, calls report(row) as each file finishes
+# maxFilesPerWorker restarts workers after that many files, Maya does not give all memory back between files
+def runBatch(jobs, commandName, flags, workers=defaultWorkers, plugin=defaultPlugin, outputDir=None,
+             maxFilesPerWorker=None, report=None):
+    tasks = [(job, commandName, flags, plugin, outputDir) for job in jobs]
+    rows = []
+    pool = multiprocessing.Pool(processes=max(1, workers), maxtasksperchild=maxFilesPerWorker)
+    try:
+        # One file per task, files differ a lot in size
+        for row in pool.imap_unordered(processTask, tasks, 1):
+            rows.append(row)
+            if report is not None:
+                report(row)
+    finally:
+        pool.close()
+        pool.join()
+    return rows
+
+# Timing log as CSV, rows are written as files finish so an interrupted batch keeps its log
+class TimingLog(object):
+    def __init__(self, path):
+        ''' Constructor '''
+        self.logFile = open(path, 'w')
+        self.writer = csv.DictWriter(self.logFile, fieldnames=kLogColumns)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.logFile.flush()
+
+    def close(self):
+        self.logFile.close()
+
+def formatRow(row):
+    line = '%-8s %6s %8.2f s  %s' % (row['status'], row['selected'], row['totalTime'], row['file'])
+    if row['error']:
+        line += '  ' + row['error']
+    return line
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run a vsa* command over many Maya files in mayapy workers.')
+    parser.add_argument('command', help='Command to run, e.g. vsaPivotToWorldCenter')
+    parser.add_argument('files', nargs='*', help='.ma/.mb files')
+    parser.add_argument('--file-list', help='Text file with one scene file per line')
+    parser.add_argument('--jobs', help='JSON list of {"file", "names", "type", "set"}, a query per file')
+    parser.add_argument('--names', nargs='+', default=[], help='ls patterns of the objects, e.g. "*_ctrl"')
+    parser.add_argument('--type', help='Node type of the objects, e.g. nurbsCurve')
+    parser.add_argument('--set', help='Only objects in this set')
+    parser.add_argument('--flags', default='{}', help='Command flags as a JSON object')
+    parser.add_argument('--workers', type=int, default=defaultWorkers, help='Number of mayapy processes')
+    parser.add_argument('--files-per-worker', type=int, help='Restart a worker after this many files')
+    parser.add_argument('--plugin', default=defaultPlugin, help='Plugin registering the command')
+    parser.add_argument('--output-dir', help='Save files here instead of overwriting them')
+    parser.add_argument('--log', help='Write the per file timing log to this CSV file')
+    args = parser.parse_args(argv)
+
+    flags = json.loads(args.flags)
+    if not isinstance(flags, dict):
+        parser.error('--flags must be a JSON object')
+    defaultJob = makeJob(None, args.names, args.type, args.set)
+    paths = list(args.files)
+    if args.file_list:
+        paths.extend(readFileList(args.file_list))
+    jobs = [makeJob(path, args.names, args.type, args.set) for path in paths]
+    if args.jobs:
+        jobs.extend(readJobs(args.jobs, defaultJob))
+    if not jobs:
+        parser.error('No files given')
+    if args.output_dir and not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    log = TimingLog(args.log) if args.log else None
+    def report(row):
+        print(formatRow(row))
+        if log is not None:
+            log.write(row)
+
+    startTime = timeit.default_timer()
+    try:
+        rows = runBatch(jobs, args.command, flags, args.workers, args.plugin, args.output_dir,
+                        args.files_per_worker, report)
+    finally:
+        if log is not None:
+            log.close()
+
+    counts = dict((status, len([row for row in rows if row['status'] == status]))
+                  for status in ('done', 'skipped', 'failed'))
+    print('%d files in %.1f s: %d done, %d skipped, %d failed' % (
+        len(rows), timeit.default_timer() - startTime, counts['done'], counts['skipped'], counts['failed']))
+    return 1 if counts['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import sys
+import maya.OpenMaya as OpenMaya
+import maya.OpenMayaMPx as OpenMayaMPx
+
+# Intro: One node moving the CVs of a curve with controller matrices
+# Replaces one cluster deformer and one parentConstraint per CV, every driven CV is
+# offset * controller world matrix * curve world inverse matrix, other CVs keep the input curve
+# Plug-in information:
+kPluginNodeName = 'vsaCurveDriver'
+# Maya's range for local nodes, change it before sharing scenes using this node outside the studio
+kPluginNodeId   = OpenMaya.MTypeId(0x0007F001)
+
+class CurveDriverNode( OpenMayaMPx.MPxNode ):
+    # Curve before driving, e.g. the output of a rebuildCurve node
+    inputCurve = OpenMaya.MObject()
+    # World inverse matrix of the driven curve's transform
+    curveInverseMatrix = OpenMaya.MObject()
+    # World matrices of the controllers
+    inputMatrix = OpenMaya.MObject()
+    # Per driven CV, its index, the index of its controller and its position in the controller's space
+    cvIndex = OpenMaya.MObject()
+    controllerIndex = OpenMaya.MObject()
+    offset = OpenMaya.MObject()
+    outputCurve = OpenMaya.MObject()
+
+    def __init__(self):
+        ''' Constructor '''
+        OpenMayaMPx.MPxNode.__init__(self)
+
+    def compute(self, plug, dataBlock):
+        ''' Computes the output curve. '''
+        if plug != CurveDriverNode.outputCurve:
+            return OpenMaya.kUnknownParameter
+
+        inputCurve = dataBlock.inputValue(CurveDriverNode.inputCurve).asNurbsCurve()
+        curveInverse = dataBlock.inputValue(CurveDriverNode.curveInverseMatrix).asMatrix()
+        matrices = readArray(dataBlock.inputArrayValue(CurveDriverNode.inputMatrix),
+                             lambda handle: handle.asMatrix())
+        cvIndices = readArray(dataBlock.inputArrayValue(CurveDriverNode.cvIndex), lambda handle: handle.asInt())
+        controllerIndices = readArray(dataBlock.inputArrayValue(CurveDriverNode.controllerIndex),
+                                      lambda handle: handle.asInt())
+        offsets = readArray(dataBlock.inputArrayValue(CurveDriverNode.offset),
+                            lambda handle: OpenMaya.MPoint(handle.asVector()))
+
+        # Copy the input curve and move its driven CVs
+        curveData = OpenMaya.MFnNurbsCurveData()
+        outputData = curveData.create()
+        fnCurve = OpenMaya.MFnNurbsCurve()
+        fnCurve.setObject(fnCurve.copy(inputCurve, outputData))
+        points = OpenMaya.MPointArray()
+        fnCurve.getCVs(points, OpenMaya.MSpace.kObject)
+        for entry, cv in cvIndices.items():
+            matrix = matrices.get(controllerIndices.get(entry))
+            if matrix is None or entry not in offsets or cv >= points.length():
+                continue
+            points.set(offsets[entry] * matrix * curveInverse, cv)
+        fnCurve.setCVs(points, OpenMaya.MSpace.kObject)
+        fnCurve.updateCurve()
+
+        outputHandle = dataBlock.outputValue(CurveDriverNode.outputCurve)
+        outputHandle.setMObject(outputData)
+        outputHandle.setClean()
+
+# Values of an array data handle by logical index
+def readArray(arrayHandle, readValue):
+    values = {}
+    for i in range(arrayHandle.elementCount()):
+        arrayHandle.jumpToArrayElement(i)
+        values[arrayHandle.elementIndex()] = readValue(arrayHandle.inputValue())
+    return values
+
+##########################################################
+# Plug-in initialization.
+##########################################################
+def nodeCreator():
+    ''' Creates an instance of the node. '''
+    return OpenMayaMPx.asMPxPtr(CurveDriverNode())
+
+def nodeInitializer():
+    ''' Defines the attributes of the node. '''
+    fnTyped = OpenMaya.MFnTypedAttribute()
+    fnMatrix = OpenMaya.MFnMatrixAttribute()
+    fnNumeric = OpenMaya.MFnNumericAttribute()
+
+    CurveDriverNode.inputCurve = fnTyped.create('inputCurve', 'ic', OpenMaya.MFnData.kNurbsCurve)
+    CurveDriverNode.curveInverseMatrix = fnMatrix.create('curveInverseMatrix', 'cim')
+    CurveDriverNode.inputMatrix = fnMatrix.create('inputMatrix', 'im')
+    fnMatrix.setArray(True)
+    CurveDriverNode.cvIndex = fnNumeric.create('cvIndex', 'cvi', OpenMaya.MFnNumericData.kInt, 0)
+    fnNumeric.setArray(True)
+    CurveDriverNode.controllerIndex = fnNumeric.create('controllerIndex', 'cti', OpenMaya.MFnNumericData.kInt, 0)
+    fnNumeric.setArray(True)
+    CurveDriverNode.offset = fnNumeric.create('offset', 'of', OpenMaya.MFnNumericData.k3Double)
+    fnNumeric.setArray(True)
+    CurveDriverNode.outputCurve = fnTyped.create('outputCurve', 'oc', OpenMaya.MFnData.kNurbsCurve)
+    fnTyped.setWritable(False)
+    fnTyped.setStorable(False)
+
+    CurveDriverNode.addAttribute(CurveDriverNode.outputCurve)
+    for attribute in (CurveDriverNode.inputCurve, CurveDriverNode.curveInverseMatrix, CurveDriverNode.inputMatrix,
+                      CurveDriverNode.cvIndex, CurveDriverNode.controllerIndex, CurveDriverNode.offset):
+        CurveDriverNode.addAttribute(attribute)
+        CurveDriverNode.attributeAffects(attribute, CurveDriverNode.outputCurve)
+
+def initializePlugin(mobject):
+    ''' Initializes the plug-in. '''
+    mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    try:
+        mplugin.registerNode(kPluginNodeName, kPluginNodeId, nodeCreator, nodeInitializer)
+    except:
+        sys.stderr.write('Failed to register node: ' + kPluginNodeName)
+        raise
+
+def uninitializePlugin(mobject):
+    ''' Uninitializes the plug-in. '''
+    mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    try:
+        mplugin.deregisterNode(kPluginNodeId)
+    except:
+        sys.stderr.write('Failed to unregister node: ' + kPluginNodeName)
+        raise
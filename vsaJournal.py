@@ -0,0 +1,93 @@
+import array
+import maya.OpenMaya as OpenMaya
+
+# Intro: Compact undo/redo journal shared by the vsa* commands
+# Plug changes are kept as node/attribute indices with before and after values in flat arrays,
+# so a command touching 100k objects keeps a few numbers per plug instead of one modifier operation each
+
+# Value kinds
+kDoubleValue    = 0
+kBoolValue      = 1
+
+class Journal(object):
+    def __init__(self):
+        ''' Constructor '''
+        self.nodes = OpenMaya.MObjectArray()
+        self.lastNode = None
+        self.attributes = []
+        self.attributeIndices = {}
+
+        self.nodeIndices = array.array('L')
+        self.attributeIndexList = array.array('H')
+        self.kinds = array.array('b')
+        self.beforeValues = array.array('d')
+        self.afterValues = array.array('d')
+
+        self.previousSelection = None
+        self.newSelection = None
+
+    # Record a new value of a numeric plug, the current value is kept for undo
+    def record(self, plug, value, kind=kDoubleValue):
+        node = plug.node()
+        if self.lastNode is None or not (node == self.lastNode):
+            self.nodes.append(node)
+            self.lastNode = node
+        self.nodeIndices.append(self.nodes.length() - 1)
+
+        # Attributes are shared by all nodes of a type, keep each one once
+        key = (node.apiType(), plug.partialName())
+        attributeIndex = self.attributeIndices.get(key)
+        if attributeIndex is None:
+            attributeIndex = len(self.attributes)
+            self.attributes.append(plug.attribute())
+            self.attributeIndices[key] = attributeIndex
+        self.attributeIndexList.append(attributeIndex)
+
+        self.kinds.append(kind)
+        if kind == kBoolValue:
+            self.beforeValues.append(plug.asBool())
+        else:
+            self.beforeValues.append(plug.asDouble())
+        self.afterValues.append(value)
+
+    # Record a boolean plug value
+    def recordBool(self, plug, value):
+        self.record(plug, bool(value), kBoolValue)
+
+    # Record the selection before and after the command
+    def recordSelection(self, previousSelection, newSelection):
+        self.previousSelection = previousSelection
+        self.newSelection = newSelection
+
+    # Whether anything has been recorded
+    def isEmpty(self):
+        return len(self.kinds) == 0 and self.newSelection is None
+
+    # Number of recorded plug changes
+    def length(self):
+        return len(self.kinds)
+
+    # Apply after values, from the start-th recorded change on
+    def redo(self, start=0):
+        self.apply(self.afterValues, start)
+        if self.newSelection is not None:
+            OpenMaya.MGlobal.setActiveSelectionList(self.newSelection)
+
+    # Restore all before values
+    def undo(self):
+        self.apply(self.beforeValues)
+        if self.previousSelection is not None:
+            OpenMaya.MGlobal.setActiveSelectionList(self.previousSelection)
+
+    def apply(self, values, start=0):
+        nodes = self.nodes
+        attributes = self.attributes
+        kinds = self.kinds
+        nodeIndices = self.nodeIndices
+        attributeIndexList = self.attributeIndexList
+        for i in range(start, len(kinds)):
+            plug = OpenMaya.MPlug(nodes[nodeIndices[i]], attributes[attributeIndexList[i]])
+            if kinds[i] == kBoolValue:
+                plug.setBool(bool(values[i]))
+            else:
+                plug.setDouble(values[i])
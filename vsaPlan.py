@@ -0,0 +1,44 @@
+import array
+import json
+import maya.OpenMaya as OpenMaya
+
+# Intro: Read-only plans of the vsa* commands
+# A plan is a table with one row of floats per object, computed without touching the scene
+# It is returned flat, row after row, as a float array, or written to a JSON file
+
+class Plan(object):
+    def __init__(self, commandName, columns):
+        ''' Constructor '''
+        self.commandName = commandName
+        self.columns = list(columns)
+        self.names = []
+        self.values = array.array('d')
+
+    # Add the row of an object, values has one float per column
+    def addRow(self, name, values):
+        self.names.append(name)
+        self.values.extend(float(value) for value in values)
+
+    def rowCount(self):
+        return len(self.names)
+
+    def asDoubleArray(self):
+        result = OpenMaya.MDoubleArray()
+        for value in self.values:
+            result.append(value)
+        return result
+
+    def write(self, path):
+        columnCount = len(self.columns)
+        rows = [list(self.values[i * columnCount:(i + 1) * columnCount]) for i in range(len(self.names))]
+        with open(path, 'w') as jsonFile:
+            json.dump({'command': self.commandName, 'columns': self.columns, 'names': self.names, 'rows': rows},
+                      jsonFile, indent=2)
+
+# Set the result of a planning command, the float array or, with path, the row count after writing the file
+def setPlanResult(command, plan, path=None):
+    if path:
+        plan.write(path)
+        command.setResult(plan.rowCount())
+    else:
+        command.setResult(plan.asDoubleArray())
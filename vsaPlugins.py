@@ -0,0 +1,122 @@
+import sys
+import importlib
+import timeit
+import maya.OpenMayaMPx as OpenMayaMPx
+import vsaRegistry
+
+# Intro: One plugin loading every vsa* command from vsaRegistry
+# Implementation modules are imported on the first call of their command, so loading stays fast
+# Plug-in information:
+kPluginCmdName = 'vsaStartupReport'
+
+# Seconds spent registering commands, and importing each implementation module
+registerTime = 0.0
+importTimes = {}
+
+# Creators handed to Maya, kept alive while the plugin is loaded
+creators = {}
+
+# Import the implementation module of a command, timing the first import
+def importCommandModule(command):
+    moduleName = command['module']
+    module = sys.modules.get(moduleName)
+    if module is None:
+        startTime = timeit.default_timer()
+        module = importlib.import_module(moduleName)
+        importTimes[command['name']] = timeit.default_timer() - startTime
+    return module
+
+# Make the creator of a command which imports its module on first use
+def makeCmdCreator(command):
+    def cmdCreator():
+        module = importCommandModule(command)
+        return OpenMayaMPx.asMPxPtr(getattr(module, command['class'])())
+    return cmdCreator
+
+def makeSyntaxCreator(command):
+    def syntaxCreator():
+        return vsaRegistry.createSyntax(command['name'])
+    return syntaxCreator
+
+# Text table of startup and first call import times
+def startupReport():
+    lines = ['vsaPlugins registered %d commands and %d nodes in %.2f ms' % (
+        len(vsaRegistry.kCommands), len(vsaRegistry.kNodes), registerTime * 1000.0)]
+    for command in vsaRegistry.kCommands:
+        importTime = importTimes.get(command['name'])
+        if importTime is None:
+            lines.append('  %-24s not loaded' % command['name'])
+        else:
+            lines.append('  %-24s loaded in %.2f ms' % (command['name'], importTime * 1000.0))
+    return '\n'.join(lines)
+
+# Print and return the startup report
+class StartupReportCommand( OpenMayaMPx.MPxCommand ):
+    def __init__(self):
+        ''' Constructor '''
+        OpenMayaMPx.MPxCommand.__init__(self)
+
+    def doIt( self, args ):
+        ''' Command Execution '''
+        report = startupReport()
+        sys.stdout.write(report + '\n')
+        self.setResult(report)
+
+##########################################################
+# Plug-in initialization.
+##########################################################
+def cmdCreator():
+    ''' Creates an instance of the command. '''
+    return OpenMayaMPx.asMPxPtr(StartupReportCommand())
+
+def initializePlugin(mobject):
+    ''' Initializes the plug-in. '''
+    global registerTime
+    startTime = timeit.default_timer()
+    mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    for command in vsaRegistry.kCommands:
+        creators[command['name']] = (makeCmdCreator(command), makeSyntaxCreator(command))
+        try:
+            mplugin.registerCommand(command['name'], *creators[command['name']])
+        except:
+            sys.stderr.write('Failed to register command: ' + command['name'])
+            raise
+    for node in vsaRegistry.kNodes:
+        module = importlib.import_module(node['module'])
+        try:
+            mplugin.registerNode(node['name'], module.kPluginNodeId, module.nodeCreator, module.nodeInitializer)
+        except:
+            sys.stderr.write('Failed to register node: ' + node['name'])
+            raise
+    try:
+        mplugin.registerCommand(kPluginCmdName, cmdCreator)
+    except:
+        sys.stderr.write('Failed to register command: ' + kPluginCmdName)
+        raise
+    registerTime = timeit.default_timer() - startTime
+
+def uninitializePlugin(mobject):
+    ''' Uninitializes the plug-in. '''
+    mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    for command in vsaRegistry.kCommands:
+        # Let loaded modules remove their callbacks
+        module = sys.modules.get(command['module'])
+        if module is not None and hasattr(module, 'cleanupPlugin'):
+            module.cleanupPlugin()
+        try:
+            mplugin.deregisterCommand(command['name'])
+        except:
+            sys.stderr.write('Failed to unregister command: ' + command['name'])
+            raise
+    for node in vsaRegistry.kNodes:
+        try:
+            mplugin.deregisterNode(sys.modules[node['module']].kPluginNodeId)
+        except:
+            sys.stderr.write('Failed to unregister node: ' + node['name'])
+            raise
+    try:
+        mplugin.deregisterCommand(kPluginCmdName)
+    except:
+        sys.stderr.write('Failed to unregister command: ' + kPluginCmdName)
+        raise
+    creators.clear()
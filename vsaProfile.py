@@ -0,0 +1,235 @@
+import sys
+import collections
+import cProfile
+import json
+import time
+import timeit
+import maya.OpenMaya as OpenMaya
+import maya.OpenMayaMPx as OpenMayaMPx
+import maya.cmds as cmds
+import vsaRegistry
+
+# Intro: Instrumentation of the vsa* commands
+# Every profiled call keeps its wall time and selection size in a ring buffer, which costs two timer reads
+# and one selection query. Counting cmds/OpenMaya calls and cProfile stats are switched on with vsaProfileReport
+# Plug-in information:
+kPluginCmdName = 'vsaProfileReport'
+
+# Forget every recorded call
+kClearFlag              = '-cl'
+kClearLongFlag          = '-clear'
+# Write recorded calls to a JSON file
+kJsonFlag               = '-j'
+kJsonLongFlag           = '-json'
+# Write cProfile stats of profiled calls to a file, readable with pstats
+kStatsFlag              = '-st'
+kStatsLongFlag          = '-stats'
+# Count cmds and OpenMaya calls of each profiled function, slows commands down
+kCountCallsFlag         = '-cc'
+kCountCallsLongFlag     = '-countCalls'
+# Run profiled calls under cProfile, replaces call counting while on
+kCProfileFlag           = '-cp'
+kCProfileLongFlag       = '-cProfile'
+
+# Number of calls kept
+kHistorySize            = 256
+history = collections.deque(maxlen=kHistorySize)
+
+# Switched by vsaProfileReport
+countCalls = False
+profiler = None
+
+# Profiled calls running now, nested calls are recorded but only the outermost one installs hooks
+activeCalls = [0]
+
+# Module names whose calls are counted as cmds or OpenMaya calls
+kCmdsModules            = ('maya.cmds',)
+kApiModules             = ('maya.OpenMaya', 'maya.OpenMayaMPx', '_OpenMaya', '_OpenMayaMPx')
+
+# Decorate a command method so each call is recorded under commandName
+def profiled(commandName):
+    def decorator(function):
+        def wrapper(*args, **kwargs):
+            return callProfiled(commandName, function, args, kwargs)
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        return wrapper
+    return decorator
+
+def callProfiled(commandName, function, args, kwargs):
+    selectionSize = getSelectionSize()
+    outermost = activeCalls[0] == 0
+    counter = None
+    if outermost and profiler is not None:
+        profiler.enable()
+    elif outermost and countCalls:
+        counter = CallCounter()
+        sys.setprofile(counter.profile)
+    activeCalls[0] += 1
+    startTime = timeit.default_timer()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        wallTime = timeit.default_timer() - startTime
+        activeCalls[0] -= 1
+        if counter is not None:
+            sys.setprofile(None)
+        elif outermost and profiler is not None:
+            profiler.disable()
+        history.append({
+            'command': commandName,
+            'function': function.__name__,
+            'time': time.time(),
+            'wallTime': wallTime,
+            'selectionSize': selectionSize,
+            'calls': counter.calls if counter is not None else None,
+        })
+
+# Number of items in the active selection, components of one object are one item
+def getSelectionSize():
+    selection = OpenMaya.MSelectionList()
+    OpenMaya.MGlobal.getActiveSelectionList(selection)
+    return selection.length()
+
+# Counts cmds and OpenMaya calls per calling function from a sys.setprofile hook
+class CallCounter(object):
+    def __init__(self):
+        # Calling function name: [cmds calls, OpenMaya calls]
+        self.calls = {}
+
+    def profile(self, frame, event, arg):
+        if event == 'call':
+            # OpenMaya methods are Python wrappers, count them by their module
+            if frame.f_globals.get('__name__') in kApiModules and frame.f_back is not None \
+                    and frame.f_back.f_globals.get('__name__') not in kApiModules:
+                self.count(frame.f_back, 1)
+        elif event == 'c_call':
+            if frame.f_globals.get('__name__') in kApiModules:
+                # Inside an OpenMaya wrapper, already counted
+                return
+            module = getattr(arg, '__module__', None)
+            if module in kCmdsModules:
+                self.count(frame, 0)
+            elif module in kApiModules:
+                self.count(frame, 1)
+
+    def count(self, frame, kind):
+        counts = self.calls.get(frame.f_code.co_name)
+        if counts is None:
+            counts = self.calls[frame.f_code.co_name] = [0, 0]
+        counts[kind] += 1
+
+# Text table of recorded calls per command and function
+def profileReport():
+    totals = collections.OrderedDict()
+    for entry in history:
+        key = (entry['command'], entry['function'])
+        total = totals.get(key)
+        if total is None:
+            total = totals[key] = {'count': 0, 'wallTime': 0.0, 'maxTime': 0.0, 'selectionSize': 0,
+                                   'cmdsCalls': None, 'apiCalls': None}
+        total['count'] += 1
+        total['wallTime'] += entry['wallTime']
+        total['maxTime'] = max(total['maxTime'], entry['wallTime'])
+        total['selectionSize'] = entry['selectionSize']
+        if entry['calls'] is not None:
+            total['cmdsCalls'] = (total['cmdsCalls'] or 0) + sum(counts[0] for counts in entry['calls'].values())
+            total['apiCalls'] = (total['apiCalls'] or 0) + sum(counts[1] for counts in entry['calls'].values())
+
+    lines = ['vsaProfileReport %d of the last %d calls' % (len(history), kHistorySize),
+             '  %-24s %-10s %6s %10s %10s %9s %8s %8s' % ('command', 'function', 'calls', 'mean ms', 'max ms',
+                                                          'selected', 'cmds', 'api')]
+    for (commandName, functionName), total in totals.items():
+        lines.append('  %-24s %-10s %6d %10.2f %10.2f %9d %8s %8s' % (
+            commandName, functionName, total['count'], total['wallTime'] * 1000.0 / total['count'],
+            total['maxTime'] * 1000.0, total['selectionSize'],
+            '-' if total['cmdsCalls'] is None else total['cmdsCalls'],
+            '-' if total['apiCalls'] is None else total['apiCalls']))
+    return '\n'.join(lines)
+
+# Write recorded calls to a JSON file
+def dumpJson(path):
+    with open(path, 'w') as jsonFile:
+        json.dump(list(history), jsonFile, indent=2)
+
+# Print and return the profile report, switch counters and write dumps
+class ProfileReportCommand( OpenMayaMPx.MPxCommand ):
+    def __init__(self):
+        ''' Constructor '''
+        OpenMayaMPx.MPxCommand.__init__(self)
+
+    def doIt( self, args ):
+        ''' Command Execution '''
+        global countCalls
+        global profiler
+
+        argData = OpenMaya.MArgParser( self.syntax(), args )
+        if argData.isFlagSet( kCountCallsFlag ):
+            countCalls = argData.flagArgumentBool( kCountCallsFlag, 0 )
+        if argData.isFlagSet( kCProfileFlag ):
+            if argData.flagArgumentBool( kCProfileFlag, 0 ):
+                profiler = profiler or cProfile.Profile()
+            else:
+                profiler = None
+        if argData.isFlagSet( kJsonFlag ):
+            dumpJson(argData.flagArgumentString( kJsonFlag, 0 ))
+        if argData.isFlagSet( kStatsFlag ):
+            if profiler is None:
+                cmds.error("Turn on cProfile with -cProfile true before writing stats!")
+            profiler.dump_stats(argData.flagArgumentString( kStatsFlag, 0 ))
+
+        report = profileReport()
+        if argData.isFlagSet( kClearFlag ):
+            history.clear()
+            if profiler is not None:
+                profiler = cProfile.Profile()
+        sys.stdout.write(report + '\n')
+        self.setResult(report)
+
+##########################################################
+# Plug-in initialization.
+##########################################################
+def cmdCreator():
+    ''' Creates an instance of the command. '''
+    return OpenMayaMPx.asMPxPtr(ProfileReportCommand())
+
+def syntaxCreator():
+    ''' Defines the argument and flag syntax for this command. '''
+    return vsaRegistry.createSyntax(kPluginCmdName)
+
+def initializePlugin(mobject):
+    ''' Initializes the plug-in. '''
+    mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    try:
+        mplugin.registerCommand(kPluginCmdName, cmdCreator, syntaxCreator)
+    except:
+        sys.stderr.write('Failed to register command: ' + kPluginCmdName)
+        raise
+
+def uninitializePlugin(mobject):
+    ''' Uninitializes the plug-in. '''
+    mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    try:
+        mplugin.deregisterCommand(kPluginCmdName)
+    except:
+        sys.stderr.write('Failed to unregister command: ' + kPluginCmdName)
+        raise
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
@@ -0,0 +1,86 @@
+import maya.cmds as cmds
+
+# Intro: Chunked execution with progress and cancel for long running vsa* commands
+# Work is split in chunks, progress is shown between chunks and Esc stops before the next one
+
+# Number of items handled between two progress updates and cancel checks
+defaultChunkSize        = 1000
+
+# Raised by runChunked when the user cancels, commands roll back what was done
+class Cancelled(Exception):
+    pass
+
+# Progress in Maya's progressWindow, cancelled with Esc
+class WindowReporter(object):
+    def begin(self, title, total):
+        self.total = total
+        cmds.progressWindow(title=title, progress=0, maxValue=max(1, total),
+                            status='0 / %d' % total, isInterruptable=True)
+
+    def update(self, done):
+        cmds.progressWindow(edit=True, progress=done, status='%d / %d' % (done, self.total))
+
+    def isCancelled(self):
+        return cmds.progressWindow(query=True, isCancelled=True)
+
+    def end(self):
+        cmds.progressWindow(endProgress=True)
+
+# No progress in batch mode, never cancelled
+class BatchReporter(object):
+    def begin(self, title, total):
+        pass
+
+    def update(self, done):
+        pass
+
+    def isCancelled(self):
+        return False
+
+    def end(self):
+        pass
+
+def createReporter():
+    if cmds.about(batch=True):
+        return BatchReporter()
+    return WindowReporter()
+
+# Split items of the given sizes into chunks of at most chunkSize elements, for work counted in components
+# A large item is spread over several chunks, each chunk is a list of (item index, start, stop) slices
+def splitBySize(sizes, chunkSize=defaultChunkSize):
+    chunkSize = max(1, chunkSize)
+    chunks = []
+    chunk = []
+    room = chunkSize
+    for index, size in enumerate(sizes):
+        start = 0
+        while start < size:
+            stop = min(size, start + room)
+            chunk.append((index, start, stop))
+            room -= stop - start
+            start = stop
+            if room == 0:
+                chunks.append(chunk)
+                chunk = []
+                room = chunkSize
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+# Call function with consecutive chunks of items, report progress after each
+# Raises Cancelled when the user cancels before the last chunk
+def runChunked(title, items, function, chunkSize=defaultChunkSize, reporter=None):
+    if reporter is None:
+        reporter = createReporter()
+    total = len(items)
+    chunkSize = max(1, chunkSize)
+    reporter.begin(title, total)
+    try:
+        for start in range(0, total, chunkSize):
+            function(items[start:start + chunkSize])
+            done = min(total, start + chunkSize)
+            reporter.update(done)
+            if done < total and reporter.isCancelled():
+                raise Cancelled(title)
+    finally:
+        reporter.end()
@@ -0,0 +1,138 @@
+import maya.OpenMaya as OpenMaya
+
+# Intro: Registry of every vsa* command
+# Lists where each command is implemented and its flags, so the loader plugin can register
+# all commands without importing their implementation modules
+
+# Flags are (short name, long name, argument types, multi use)
+# Argument types are MSyntax type names such as 'kDouble'
+kCommands = [
+    {
+        'name': 'vsaCurveColorChanger',
+        'module': 'curveColorChanger',
+        'class': 'CurveColorChangerCommand',
+        'flags': [
+            ('-c', '-color', ('kDouble', 'kDouble', 'kDouble'), False),
+            ('-m', '-mode', ('kString',), False),
+            ('-ec', '-endColor', ('kDouble', 'kDouble', 'kDouble'), False),
+            ('-hi', '-hierarchy', (), False),
+            ('-pr', '-preset', ('kString',), False),
+            ('-pf', '-presetFile', ('kString',), False),
+            ('-ui', '-userInterface', (), False),
+        ],
+    },
+    {
+        'name': 'vsaDeselectSpecial',
+        'module': 'deselectSpecial',
+        'class': 'DeselectSpecialCommand',
+        'flags': [
+            ('-dpc', '-deselectPerComponent', ('kLong',), False),
+            ('-d', '-delta', ('kLong',), True),
+            ('-m', '-mode', ('kString',), False),
+            ('-cs', '-chunkSize', ('kLong',), False),
+            ('-ui', '-userInterface', (), False),
+        ],
+    },
+    {
+        'name': 'vsaEvaluationProfile',
+        'module': 'evaluationProfiler',
+        'class': 'EvaluationProfileCommand',
+        'flags': [
+            ('-st', '-start', ('kDouble',), False),
+            ('-et', '-end', ('kDouble',), False),
+            ('-em', '-evaluationMode', ('kString',), True),
+            ('-j', '-json', ('kString',), False),
+        ],
+    },
+    {
+        'name': 'vsaMoveToWorldCenter',
+        'module': 'moveToWorldCenter',
+        'class': 'MoveToWorldCenterCommand',
+        'flags': [
+            ('-ax', '-axis', ('kString',), False),
+            ('-cs', '-chunkSize', ('kLong',), False),
+            ('-pl', '-plan', (), False),
+            ('-plf', '-planFile', ('kString',), False),
+        ],
+    },
+    {
+        'name': 'vsaPivotToLastSelect',
+        'module': 'pivotToLastSelect',
+        'class': 'PivotToLastSelectCommand',
+        'flags': [
+            ('-ci', '-cacheInfo', (), False),
+            ('-cc', '-clearCache', (), False),
+            ('-cen', '-centroid', (), False),
+            ('-pl', '-plan', (), False),
+            ('-plf', '-planFile', ('kString',), False),
+        ],
+    },
+    {
+        'name': 'vsaPivotToWorldCenter',
+        'module': 'pivotToWorldCenter',
+        'class': 'PivotToWorldCenterCommand',
+        'flags': [
+            ('-cs', '-chunkSize', ('kLong',), False),
+            ('-pl', '-plan', (), False),
+            ('-plf', '-planFile', ('kString',), False),
+        ],
+    },
+    {
+        'name': 'vsaProfileReport',
+        'module': 'vsaProfile',
+        'class': 'ProfileReportCommand',
+        'flags': [
+            ('-cl', '-clear', (), False),
+            ('-j', '-json', ('kString',), False),
+            ('-st', '-stats', ('kString',), False),
+            ('-cc', '-countCalls', ('kBoolean',), False),
+            ('-cp', '-cProfile', ('kBoolean',), False),
+        ],
+    },
+    {
+        'name': 'vsaTailRigging',
+        'module': 'tailRigging',
+        'class': 'TailRiggingCommand',
+        'flags': [
+            ('-p', '-prefix', ('kString',), False),
+            ('-sp', '-spans', ('kLong',), False),
+            ('-sz', '-size', ('kDouble',), False),
+            ('-ch', '-chain', ('kString', 'kString'), True),
+            ('-lc', '-leafChains', (), False),
+            ('-cs', '-chunkSize', ('kLong',), False),
+            ('-pl', '-plan', (), False),
+            ('-plf', '-planFile', ('kString',), False),
+            ('-dm', '-deformMode', ('kString',), False),
+            ('-hm', '-hierarchyMode', ('kString',), False),
+            ('-ui', '-userInterface', (), False),
+        ],
+    },
+]
+
+# Nodes are registered with their module's kPluginNodeId, nodeCreator and nodeInitializer
+# Scenes may hold them, so their modules are imported when the loader plugin loads
+kNodes = [
+    {
+        'name': 'vsaCurveDriver',
+        'module': 'vsaCurveDriver',
+    },
+]
+
+# Get the registry entry of a command
+def getCommand(commandName):
+    for command in kCommands:
+        if command['name'] == commandName:
+            return command
+    raise KeyError(commandName)
+
+# Build the MSyntax of a command from its registered flags
+def createSyntax(commandName):
+    syntax = OpenMaya.MSyntax()
+    for shortName, longName, argTypes, multiUse in getCommand(commandName)['flags']:
+        if argTypes:
+            syntax.addFlag(shortName, longName, *[getattr(OpenMaya.MSyntax, argType) for argType in argTypes])
+        else:
+            syntax.addFlag(shortName, longName, OpenMaya.MSyntax.kNoArg)
+        if multiUse:
+            syntax.makeFlagMultiUse(shortName)
+    return syntax
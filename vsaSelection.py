@@ -0,0 +1,99 @@
+import maya.OpenMaya as OpenMaya
+import maya.cmds as cmds
+
+# Intro: Streaming selection reader shared by the vsa* commands
+# Walks selections with MItSelectionList, components stay compact Maya arrays and are never
+# flattened into one Python string per element
+
+# Get the active selection, in the order it was selected when ordered is True
+def getActiveSelection(ordered=False):
+    if ordered:
+        cmds.selectPref(trackSelectionOrder=True)
+    selection = OpenMaya.MSelectionList()
+    OpenMaya.MGlobal.getActiveSelectionList(selection, ordered)
+    return selection
+
+# Yield (dagPath, component) for every selected item, component is a null MObject for whole objects
+# Dependency nodes are yielded as (None, node)
+def iterSelection(selection):
+    iterator = OpenMaya.MItSelectionList(selection)
+    while not iterator.isDone():
+        if iterator.itemType() == OpenMaya.MItSelectionList.kDagSelectionItem:
+            dagPath = OpenMaya.MDagPath()
+            component = OpenMaya.MObject()
+            iterator.getDagPath(dagPath, component)
+            yield dagPath, component
+        else:
+            node = OpenMaya.MObject()
+            iterator.getDependNode(node)
+            yield None, node
+        iterator.next()
+
+# Yield unique transforms of selected objects, shapes and components
+def iterTransformPaths(selection):
+    visited = set()
+    for dagPath, component in iterSelection(selection):
+        if dagPath is None:
+            continue
+        if not dagPath.hasFn(OpenMaya.MFn.kTransform):
+            dagPath.pop()
+        if not dagPath.hasFn(OpenMaya.MFn.kTransform):
+            continue
+        fullName = dagPath.fullPathName()
+        if fullName in visited:
+            continue
+        visited.add(fullName)
+        yield dagPath
+
+# Whether a selected component holds single indices such as vertices, edges, faces or CVs
+def isIndexedComponent(component):
+    return not component.isNull() and component.hasFn(OpenMaya.MFn.kSingleIndexedComponent)
+
+# Yield (first, last) ranges of consecutive indices of a single indexed component
+# e.g. vtx[0:9] and vtx[20] give (0, 9) then (20, 20)
+def iterIndexRanges(component):
+    elements = OpenMaya.MIntArray()
+    OpenMaya.MFnSingleIndexedComponent(component).getElements(elements)
+    for indexRange in iterArrayRanges(elements):
+        yield indexRange
+
+# Yield (first, last) ranges of consecutive indices of elements[start:stop] of an MIntArray
+def iterArrayRanges(elements, start=0, stop=None):
+    stop = elements.length() if stop is None else min(stop, elements.length())
+    if start >= stop:
+        return
+    first = last = elements[start]
+    for i in range(start + 1, stop):
+        element = elements[i]
+        if element == last + 1:
+            last = element
+            continue
+        yield first, last
+        first = last = element
+    yield first, last
+
+# Indices handed to Maya per addElements call, bounds the Python list built on the way
+kIndexChunkSize = 4096
+
+# Create a single indexed component of componentType holding (first, last) index ranges
+def createIndexedComponent(componentType, indexRanges):
+    fnComponent = OpenMaya.MFnSingleIndexedComponent()
+    component = fnComponent.create(componentType)
+    addIndexRanges(fnComponent, indexRanges)
+    return component
+
+# Add (first, last) index ranges to the component of fnComponent
+def addIndexRanges(fnComponent, indexRanges):
+    chunk = []
+    for first, last in indexRanges:
+        chunk.extend(range(first, last + 1))
+        if len(chunk) >= kIndexChunkSize:
+            addElements(fnComponent, chunk)
+            chunk = []
+    if chunk:
+        addElements(fnComponent, chunk)
+
+def addElements(fnComponent, elements):
+    elementArray = OpenMaya.MIntArray()
+    OpenMaya.MScriptUtil().createIntArrayFromList(elements, elementArray)
+    fnComponent.addElements(elementArray)
@@ -0,0 +1,167 @@
+import array
+import collections
+import maya.OpenMaya as OpenMaya
+
+# Intro: Mesh adjacency in flat integer arrays, built once per mesh
+# Offsets arrays give the slice of each element, e.g. the edges of face f are
+# faceEdges[faceEdgeOffsets[f]:faceEdgeOffsets[f + 1]]
+
+class MeshTopology(object):
+    def __init__(self, meshPath):
+        ''' Constructor '''
+        # Two vertices per edge
+        self.edgeVertices = array.array('i')
+        edgeIterator = OpenMaya.MItMeshEdge(meshPath)
+        while not edgeIterator.isDone():
+            self.edgeVertices.append(edgeIterator.index(0))
+            self.edgeVertices.append(edgeIterator.index(1))
+            edgeIterator.next()
+        self.edgeCount = len(self.edgeVertices) // 2
+
+        # Edges of every face
+        self.faceEdgeOffsets = array.array('i', [0])
+        self.faceEdges = array.array('i')
+        faceEdgeArray = OpenMaya.MIntArray()
+        polygonIterator = OpenMaya.MItMeshPolygon(meshPath)
+        while not polygonIterator.isDone():
+            polygonIterator.getEdges(faceEdgeArray)
+            for i in range(faceEdgeArray.length()):
+                self.faceEdges.append(faceEdgeArray[i])
+            self.faceEdgeOffsets.append(len(self.faceEdges))
+            polygonIterator.next()
+        self.faceCount = len(self.faceEdgeOffsets) - 1
+
+        # Reverse lookups
+        self.edgeFaceOffsets, self.edgeFaces = invertAdjacency(self.faceEdgeOffsets, self.faceEdges, self.edgeCount)
+        edgeVertexOffsets = array.array('i', range(0, self.edgeCount * 2 + 1, 2))
+        self.vertexCount = OpenMaya.MFnMesh(meshPath).numVertices()
+        self.vertexEdgeOffsets, self.vertexEdges = invertAdjacency(edgeVertexOffsets, self.edgeVertices,
+                                                                   self.vertexCount)
+
+    def facesOfEdge(self, edgeId):
+        return self.edgeFaces[self.edgeFaceOffsets[edgeId]:self.edgeFaceOffsets[edgeId + 1]]
+
+    def edgesOfFace(self, faceId):
+        return self.faceEdges[self.faceEdgeOffsets[faceId]:self.faceEdgeOffsets[faceId + 1]]
+
+    def edgesOfVertex(self, vertexId):
+        return self.vertexEdges[self.vertexEdgeOffsets[vertexId]:self.vertexEdgeOffsets[vertexId + 1]]
+
+    # Faces sharing an edge with a face
+    def faceNeighbors(self, faceId):
+        neighbors = []
+        for edgeId in self.edgesOfFace(faceId):
+            for neighbor in self.facesOfEdge(edgeId):
+                if neighbor != faceId:
+                    neighbors.append(neighbor)
+        return neighbors
+
+    # Vertices sharing an edge with a vertex
+    def vertexNeighbors(self, vertexId):
+        neighbors = []
+        for edgeId in self.edgesOfVertex(vertexId):
+            a = self.edgeVertices[edgeId * 2]
+            neighbors.append(self.edgeVertices[edgeId * 2 + 1] if a == vertexId else a)
+        return neighbors
+
+    # Edges continuing an edge loop through both ends of an edge
+    # A loop goes on through a vertex with four edges, to the edge sharing no face with this one,
+    # and along the border through a border vertex with three edges
+    def loopNeighbors(self, edgeId):
+        neighbors = []
+        edgeFaces = set(self.facesOfEdge(edgeId))
+        isBorder = len(edgeFaces) == 1
+        for vertexId in self.edgeVertices[edgeId * 2:edgeId * 2 + 2]:
+            vertexEdges = self.edgesOfVertex(vertexId)
+            if len(vertexEdges) == 4:
+                for otherEdge in vertexEdges:
+                    if otherEdge != edgeId and not edgeFaces.intersection(self.facesOfEdge(otherEdge)):
+                        neighbors.append(otherEdge)
+            elif len(vertexEdges) == 3 and isBorder:
+                for otherEdge in vertexEdges:
+                    if otherEdge != edgeId and len(self.facesOfEdge(otherEdge)) == 1:
+                        neighbors.append(otherEdge)
+        return neighbors
+
+    # Opposite edges of an edge across its quad faces
+    def ringNeighbors(self, edgeId):
+        neighbors = []
+        edgeEnds = self.edgeVertices[edgeId * 2:edgeId * 2 + 2]
+        for faceId in self.facesOfEdge(edgeId):
+            faceEdges = self.edgesOfFace(faceId)
+            if len(faceEdges) != 4:
+                continue
+            for otherEdge in faceEdges:
+                if self.edgeVertices[otherEdge * 2] not in edgeEnds \
+                        and self.edgeVertices[otherEdge * 2 + 1] not in edgeEnds:
+                    neighbors.append(otherEdge)
+        return neighbors
+
+# Invert element -> items adjacency into item -> elements with a counting sort
+def invertAdjacency(offsets, values, itemCount):
+    counts = array.array('i', [0]) * (itemCount + 1)
+    for value in values:
+        counts[value + 1] += 1
+    for i in range(itemCount):
+        counts[i + 1] += counts[i]
+    inverted = array.array('i', [0]) * len(values)
+    cursor = array.array('i', counts)
+    for element in range(len(offsets) - 1):
+        for i in range(offsets[element], offsets[element + 1]):
+            value = values[i]
+            inverted[cursor[value]] = element
+            cursor[value] += 1
+    return counts, inverted
+
+# Number of steps from the first element of each connected part, walking only through selected elements
+# Steps to sameNeighbors cost nothing, steps to nextNeighbors cost one, a single 0-1 BFS over all parts
+# Returns a flat array of depths indexed by element, -1 for elements not selected
+def walkDepths(elements, elementCount, nextNeighbors, sameNeighbors=None):
+    selected = bytearray(elementCount)
+    for element in elements:
+        selected[element] = 1
+    depths = array.array('i', [-1]) * elementCount
+    for seed in sorted(elements):
+        if depths[seed] >= 0:
+            continue
+        depths[seed] = 0
+        queue = collections.deque([seed])
+        while queue:
+            element = queue.popleft()
+            depth = depths[element]
+            if sameNeighbors is not None:
+                for neighbor in sameNeighbors(element):
+                    if selected[neighbor] and (depths[neighbor] < 0 or depths[neighbor] > depth):
+                        depths[neighbor] = depth
+                        queue.appendleft(neighbor)
+            for neighbor in nextNeighbors(element):
+                if selected[neighbor] and (depths[neighbor] < 0 or depths[neighbor] > depth + 1):
+                    depths[neighbor] = depth + 1
+                    queue.append(neighbor)
+    return depths
+
+# Positions of selected elements walking along paths, path ends first, then closed loops
+# Returns a flat array of positions indexed by element, -1 for elements not selected
+def walkPathOrder(elements, elementCount, neighbors):
+    selected = bytearray(elementCount)
+    for element in elements:
+        selected[element] = 1
+    order = array.array('i', [-1]) * elementCount
+    elements = sorted(elements)
+    ends = [element for element in elements
+            if sum(1 for neighbor in neighbors(element) if selected[neighbor]) <= 1]
+    for seed in ends + elements:
+        if order[seed] >= 0:
+            continue
+        position = 0
+        stack = [seed]
+        while stack:
+            element = stack.pop()
+            if order[element] >= 0:
+                continue
+            order[element] = position
+            position += 1
+            for neighbor in reversed(neighbors(element)):
+                if selected[neighbor] and order[neighbor] < 0:
+                    stack.append(neighbor)
+    return order
@@ -0,0 +1,43 @@
+import maya.OpenMaya as OpenMaya
+import vsaPlan
+
+# Intro: Transform helpers shared by the vsa* commands
+
+# Plugs set by recordPivots, in the order of planPivots columns
+kPivotPlugNames = ('rotatePivot', 'scalePivot', 'rotatePivotTranslate', 'scalePivotTranslate')
+
+# Record pivot changes of all transforms to worldPoint in journal, same as xform -ws -pivots
+# Pivot translates are compensated so that objects do not move
+def recordPivots(journal, transformPaths, worldPoint):
+    for dagPath in transformPaths:
+        fnTransform = OpenMaya.MFnTransform(dagPath)
+        for attrName, value in zip(kPivotPlugNames, computePivots(dagPath, fnTransform, worldPoint)):
+            recordDouble3(journal, fnTransform, attrName, value)
+
+# Plan of recordPivots without changing anything, x, y, z of every plug in kPivotPlugNames per transform
+def planPivots(commandName, transformPaths, worldPoint):
+    plan = vsaPlan.Plan(commandName, [attrName + axis for attrName in kPivotPlugNames for axis in ('X', 'Y', 'Z')])
+    for dagPath in transformPaths:
+        values = []
+        for value in computePivots(dagPath, OpenMaya.MFnTransform(dagPath), worldPoint):
+            values.extend((value[0], value[1], value[2]))
+        plan.addRow(dagPath.fullPathName(), values)
+    return plan
+
+# New rotatePivot, scalePivot, rotatePivotTranslate and scalePivotTranslate of a transform
+def computePivots(dagPath, fnTransform, worldPoint):
+    localPivot = worldPoint * dagPath.inclusiveMatrixInverse()
+    transformation = fnTransform.transformation()
+
+    rotateDelta = fnTransform.rotatePivot(OpenMaya.MSpace.kTransform) - localPivot
+    scaleDelta = fnTransform.scalePivot(OpenMaya.MSpace.kTransform) - localPivot
+    rotatePivotTranslate = fnTransform.rotatePivotTranslation(OpenMaya.MSpace.kTransform) \
+        + rotateDelta - rotateDelta * transformation.asRotateMatrix()
+    scalePivotTranslate = fnTransform.scalePivotTranslation(OpenMaya.MSpace.kTransform) \
+        + scaleDelta - scaleDelta * transformation.asScaleMatrix()
+    return localPivot, localPivot, rotatePivotTranslate, scalePivotTranslate
+
+# Record a new value for a double3 plug such as rotatePivot
+def recordDouble3(journal, fnNode, attrName, value):
+    for i, axis in enumerate(('X', 'Y', 'Z')):
+        journal.record(fnNode.findPlug(attrName + axis, False), value[i])
@@ -0,0 +1,70 @@
+import maya.cmds as cmds
+
+# Intro: Tool windows of the vsa* commands, built once and reused
+# Later calls only push new values into the existing controls and raise the window
+
+# Tool windows built this session by window name
+toolWindows = {}
+
+# One tool window and the handles of its value controls
+class ToolWindow(object):
+    def __init__(self, name, title, size):
+        ''' Constructor '''
+        self.name = name
+        self.title = title
+        self.size = size
+        # Value key: (control command, control handle, value flag)
+        self.controls = {}
+
+    # Keep a control whose value is read and written with controlCommand(handle, valueFlag=...)
+    def addControl(self, key, controlCommand, handle, valueFlag='value'):
+        self.controls[key] = (controlCommand, handle, valueFlag)
+        return handle
+
+    def exists(self):
+        return cmds.window(self.name, exists=True)
+
+    # Push values into the controls, keys without a control are ignored
+    def setValues(self, values):
+        for key, value in values.items():
+            control = self.controls.get(key)
+            if control is None:
+                continue
+            controlCommand, handle, valueFlag = control
+            controlCommand(handle, edit=True, **{valueFlag: value})
+
+    def getValue(self, key):
+        controlCommand, handle, valueFlag = self.controls[key]
+        return controlCommand(handle, query=True, **{valueFlag: True})
+
+    def getValues(self):
+        return dict((key, self.getValue(key)) for key in self.controls)
+
+# Show the tool window called name, build(window) creates its controls the first time only
+# The first time all values are shown, later only the values of keys in changedKeys are pushed
+def showToolWindow(name, title, size, build, values, changedKeys=None):
+    window = toolWindows.get(name)
+    if window is None or not window.exists():
+        # Handles of a window built before a plugin reload are unknown, build it again
+        if cmds.window(name, exists=True):
+            cmds.deleteUI(name, window=True)
+        window = ToolWindow(name, title, size)
+        cmds.window(name, title=title, widthHeight=size)
+        build(window)
+        toolWindows[name] = window
+        window.setValues(values)
+    elif changedKeys is None:
+        window.setValues(values)
+    else:
+        window.setValues(dict((key, values[key]) for key in changedKeys if key in values))
+    cmds.showWindow(name)
+    return window
+
+# Values of the controls of a shown tool window
+def getValues(name):
+    return toolWindows[name].getValues()
+
+# Close a tool window when its plugin is unloaded, its buttons call the unloaded module
+def closeToolWindow(name):
+    if toolWindows.pop(name, None) is not None and cmds.window(name, exists=True):
+        cmds.deleteUI(name, window=True)